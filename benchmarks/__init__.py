@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks for habito.
+
+Each `bench_*` module is runnable with `python -m benchmarks.<module>` and
+prints the results as JSON. Run all the benchmarks with `python -m
+benchmarks.suite`.
+"""
+
+import time
+
+
+def measure(func, *args, repeat=5, setup=None):
+    """Get the wall times of `func` in milliseconds.
+
+    `setup` is called before each run of `func` and is not timed.
+
+    Returns
+    -------
+        Dict with the best and mean time, and the number of runs.
+
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "best_ms": round(min(timings), 3),
+        "mean_ms": round(sum(timings) / len(timings), 3),
+        "repeat": repeat,
+    }
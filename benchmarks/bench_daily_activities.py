@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""Benchmark daily activities of habits for the `list` command.
+
+Compares `models.get_daily_activities` with the earlier implementation which
+aggregated raw activities in Python.
+
+Usage: python -m benchmarks.bench_daily_activities --sizes 10000 100000
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+from benchmarks import measure
+from habito import models
+
+
+def legacy_get_daily_activities(days):
+    """Get daily activities from raw activities (before daily totals)."""
+    habits_with_activities = models.get_activities(days)
+    daily_habits = []
+    for habit in habits_with_activities:
+        habit_data = []
+
+        activity_index = 0
+        activities = habit.activities
+        for day in range(0, days):
+            quanta = 0.0
+            if activity_index < len(activities):
+                a = activities[activity_index]
+            else:
+                a = None
+
+            for_date = datetime.today() - timedelta(days=day)
+            if a is None or a.update_date.date() != for_date.date():
+                quanta = None
+            else:
+                while a.update_date.date() == for_date.date():
+                    quanta += a.quantum
+                    activity_index += 1
+                    if activity_index >= len(activities):
+                        break
+                    a = activities[activity_index]
+
+            habit_data.append((day, quanta))
+
+        daily_habits.append((habit, habit_data))
+
+    return daily_habits
+
+
+def seed(activities, habits, years):
+    """Add habits with `activities` spread randomly over `years`."""
+    rng = random.Random(42)
+    ids = [
+        models.Habit.add(name=f"habit {i}", quantum=5, units="units", magica="").id
+        for i in range(habits)
+    ]
+    now = datetime.now()
+    seconds = years * 365 * 24 * 3600
+    models.Activity.add_many(
+        {
+            "for_habit": rng.choice(ids),
+            "quantum": rng.randint(1, 10),
+            "update_date": now - timedelta(seconds=rng.randrange(seconds)),
+        }
+        for _ in range(activities)
+    )
+
+
+def run(size, days, habits, years):
+    """Run the benchmark for a database with `size` activities."""
+    with tempfile.TemporaryDirectory() as tmp:
+        models.setup(os.path.join(tmp, "habito.db"))
+        seed(size, habits, years)
+        legacy = measure(legacy_get_daily_activities, days)["best_ms"]
+        current = measure(models.get_daily_activities, days)["best_ms"]
+        models.db.close()
+    return {
+        "activities": size,
+        "habits": habits,
+        "days": days,
+        "legacy_ms": legacy,
+        "current_ms": current,
+        "speedup": round(legacy / current, 2),
+    }
+
+
+def main():
+    """Run the benchmark and print the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--days", type=int, nargs="+", default=[7, 365])
+    parser.add_argument("--habits", type=int, default=50)
+    parser.add_argument("--years", type=int, default=5)
+    args = parser.parse_args()
+
+    results = [
+        run(size, days, args.habits, args.years)
+        for size in args.sizes
+        for days in args.days
+    ]
+    print(json.dumps({"benchmark": "daily_activities", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""Benchmark the upgrade of a large version 1 database to the latest version.
+
+A habito 1.0 database with random activities is created once. Each run
+upgrades a fresh copy of it with `models.setup`.
+
+Usage: python -m benchmarks.bench_migrations --activities 1000000 --repeat 3
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from benchmarks import measure
+from benchmarks.suite import V1_SCHEMA
+from habito import models
+
+
+def create_v1_database(path, habits, activities, years, seed=0):
+    """Create a version 1 database with random habits and activities."""
+    rng = random.Random(seed)
+    start = datetime.now() - timedelta(days=365 * years)
+    seconds = 365 * years * 86400
+
+    def get_activities():
+        for i in range(1, activities + 1):
+            update_date = start + timedelta(seconds=rng.randrange(seconds))
+            yield i, rng.randint(1, habits), float(rng.randint(1, 10)), str(update_date)
+
+    with sqlite3.connect(path) as conn:
+        conn.executescript(V1_SCHEMA)
+        conn.executemany(
+            "INSERT INTO habitmodel VALUES (?, ?, ?, 1, ?, 'units', '', 1)",
+            [
+                (i, f"habit {i}", str(start.date()), float(rng.randint(1, 10)))
+                for i in range(1, habits + 1)
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO activitymodel VALUES (?, ?, ?, ?)", get_activities()
+        )
+    conn.close()
+
+
+def main():
+    """Run the migration benchmark and print the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--habits", type=int, default=100)
+    parser.add_argument("--activities", type=int, default=1000000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        v1_db = os.path.join(tmp, "v1.db")
+        v1_copy = os.path.join(tmp, "v1-copy.db")
+        create_v1_database(v1_db, args.habits, args.activities, args.years)
+
+        def copy_v1_db():
+            if not models.db.is_closed():
+                models.db.close()
+            shutil.copyfile(v1_db, v1_copy)
+
+        result = measure(models.setup, v1_copy, repeat=args.repeat, setup=copy_v1_db)
+        models.db.close()
+
+    report = {
+        "benchmark": "migrations",
+        "environment": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "config": {
+            "habits": args.habits,
+            "activities": args.activities,
+            "years": args.years,
+            "db_version": models.DB_VERSION,
+        },
+        "results": {"migration_v1_db": result},
+    }
+    sys.stdout.write(json.dumps(report, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
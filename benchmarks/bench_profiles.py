@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""Benchmark the database profiles with the check-in and list commands.
+
+Each profile gets its own copy of a synthetic database. Ratios of the best
+times with the `default` profile are in `comparison`.
+
+Usage: python -m benchmarks.bench_profiles --habits 20 --years 2 --repeat 20
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+import habito.commands
+from benchmarks.suite import bench_commands, compare
+from habito import models
+from habito.commands.dev import generate
+
+
+def run(source, tmp, profile, repeat):
+    """Benchmark the commands for a copy of `source` with a profile."""
+    path = os.path.join(tmp, f"{profile}.db")
+    shutil.copyfile(source, path)
+    habito.commands.database_name = path
+    results = bench_commands(tmp, repeat, profile=profile)
+    models.db.close()
+    return results
+
+
+def main():
+    """Run the benchmarks for all profiles and print the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--habits", type=int, default=20)
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--checkins", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "habito.db")
+        models.setup(source, profile="default")
+        activities = generate(args.habits, args.years, args.checkins)
+        models.db.close()
+
+        results = {
+            profile: run(source, tmp, profile, args.repeat)
+            for profile in sorted(models.PROFILES)
+        }
+
+    baseline = {"results": results["default"]}
+    report = {
+        "benchmark": "profiles",
+        "environment": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "config": {
+            "habits": args.habits,
+            "years": args.years,
+            "checkins": args.checkins,
+            "activities": activities,
+        },
+        "results": results,
+        "comparison": {
+            profile: compare(result, baseline)
+            for profile, result in results.items()
+            if profile != "default"
+        },
+    }
+    sys.stdout.write(json.dumps(report, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""Benchmark suite for the hot paths of habito.
+
+Builds a synthetic database with the `habito dev seed` generator and times the
+model functions, commands and migrations. Results are printed as JSON. Use
+`--compare` with the results of an earlier run to see the change.
+
+Usage: python -m benchmarks.suite --habits 50 --years 3 --output results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+from click.testing import CliRunner
+
+import habito.commands
+from benchmarks import measure
+from habito import analytics, models
+from habito.commands.dev import generate
+
+# Schema of a database created with habito 1.0 (version 1)
+V1_SCHEMA = """
+CREATE TABLE "habitmodel" (
+    "id" INTEGER NOT NULL PRIMARY KEY,
+    "name" VARCHAR(255) NOT NULL,
+    "created_date" DATE NOT NULL,
+    "frequency" INTEGER NOT NULL,
+    "quantum" REAL NOT NULL,
+    "units" VARCHAR(255) NOT NULL,
+    "magica" TEXT NOT NULL,
+    "active" INTEGER NOT NULL
+);
+CREATE TABLE "activitymodel" (
+    "id" INTEGER NOT NULL PRIMARY KEY,
+    "for_habit_id" INTEGER NOT NULL,
+    "quantum" REAL NOT NULL,
+    "update_date" DATETIME NOT NULL,
+    FOREIGN KEY ("for_habit_id") REFERENCES "habitmodel" ("id")
+);
+CREATE INDEX "activitymodel_for_habit_id" ON "activitymodel" ("for_habit_id");
+"""
+
+
+def create_v1_database(path, source):
+    """Create a version 1 database with the habits and activities of `source`."""
+    with sqlite3.connect(path) as conn:
+        conn.executescript(V1_SCHEMA)
+        conn.execute("ATTACH DATABASE ? AS source", (source,))
+        conn.execute(
+            "INSERT INTO habitmodel SELECT id, name, created_date, frequency,"
+            " quantum, units, magica, active FROM source.habit"
+        )
+        # Dates of a version 1 database are local time text
+        conn.execute(
+            "INSERT INTO activitymodel SELECT id, for_habit_id, quantum,"
+            " datetime(update_date / 1000000, 'unixepoch', 'localtime')"
+            " || printf('.%06d', update_date % 1000000) FROM source.activity"
+        )
+    conn.close()
+
+
+def bench_models(repeat):
+    """Benchmark the model functions used by the commands."""
+    habits = list(models.Habit.all_active())
+    results = {
+        "get_activities_7": measure(models.get_activities, 7, repeat=repeat),
+        "get_activities_365": measure(models.get_activities, 365, repeat=repeat),
+        "get_daily_activities_7": measure(
+            models.get_daily_activities, 7, repeat=repeat
+        ),
+        "get_daily_activities_365": measure(
+            models.get_daily_activities, 365, repeat=repeat
+        ),
+        "update_streak_all_habits": measure(
+            lambda: [models.Summary.update_streak(h) for h in habits], repeat=repeat
+        ),
+        "update_all_streaks": measure(models.Summary.update_all_streaks, repeat=repeat),
+        "get_stats_array": measure(analytics.get_stats, None, "array", repeat=repeat),
+    }
+    if analytics.np is not None:
+        results["get_stats_numpy"] = measure(
+            analytics.get_stats, None, "numpy", repeat=repeat
+        )
+    return results
+
+
+def bench_commands(tmp, repeat, profile=None):
+    """Benchmark the commands including database setup."""
+    runner = CliRunner()
+
+    # Keep the app directory of habito in `tmp`
+    env = {"COLUMNS": "120", "XDG_CONFIG_HOME": tmp, "APPDATA": tmp}
+    if profile is not None:
+        env[models.PROFILE_ENV] = profile
+
+    def invoke(*args):
+        result = runner.invoke(habito.commands.cli, args, env=env)
+        assert result.exit_code == 0, result.output
+
+    # Output of `list` is cached. Time the query and render path without it.
+    return {
+        "list_table": measure(invoke, "list", "--no-cache", repeat=repeat),
+        "list_table_long": measure(invoke, "list", "-l", "--no-cache", repeat=repeat),
+        "list_csv_1_year": measure(
+            invoke, "list", "-f", "csv", "-d", "1 year", "--no-cache", repeat=repeat
+        ),
+        "list_table_cached": measure(invoke, "list", repeat=repeat),
+        "checkin": measure(invoke, "checkin", "habit 0", "-q", "1", repeat=repeat),
+    }
+
+
+def bench_migrations(tmp, source, repeat):
+    """Benchmark migrations for a new and a version 1 database."""
+    new_db = os.path.join(tmp, "new.db")
+    v1_db = os.path.join(tmp, "v1.db")
+    v1_copy = os.path.join(tmp, "v1-copy.db")
+    create_v1_database(v1_db, source)
+
+    def remove_new_db():
+        models.db.close()
+        if os.path.exists(new_db):
+            os.remove(new_db)
+
+    def copy_v1_db():
+        models.db.close()
+        shutil.copyfile(v1_db, v1_copy)
+
+    def migrate(path):
+        models.setup(path)
+
+    return {
+        "migration_new_db": measure(
+            migrate, new_db, repeat=repeat, setup=remove_new_db
+        ),
+        "migration_v1_db": measure(migrate, v1_copy, repeat=repeat, setup=copy_v1_db),
+        "migration_latest_db": measure(migrate, source, repeat=repeat),
+    }
+
+
+def compare(results, baseline):
+    """Get the ratio of the best times with a baseline run for each benchmark."""
+    base = baseline["results"]
+    return {
+        name: round(result["best_ms"] / base[name]["best_ms"], 3)
+        for name, result in results.items()
+        if name in base and base[name]["best_ms"] > 0
+    }
+
+
+def main():
+    """Run the benchmark suite and print the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--habits", type=int, default=20)
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--checkins", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write the results to a file.")
+    parser.add_argument("--compare", help="Results of an earlier run to compare.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "habito.db")
+        models.setup(source)
+        activities = generate(args.habits, args.years, args.checkins)
+        habito.commands.database_name = source
+
+        results = {}
+        results.update(bench_models(args.repeat))
+        results.update(bench_commands(tmp, args.repeat))
+        results.update(bench_migrations(tmp, source, args.repeat))
+        models.db.close()
+
+    report = {
+        "benchmark": "suite",
+        "environment": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "config": {
+            "habits": args.habits,
+            "years": args.years,
+            "checkins": args.checkins,
+            "activities": activities,
+        },
+        "results": results,
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            report["comparison"] = compare(results, json.load(f))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""Analytics of habit activities.
+
+Daily totals of a habit are loaded into an array with one value for each day
+from the start date of the habit till today. Statistics are computed with
+array operations: NumPy if it is installed, the `array` module otherwise.
+"""
+
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from habito import models
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+@dataclass
+class HabitStats:
+    """Statistics of a habit.
+
+    A slot is a tracking interval of `frequency` days. A slot is complete if
+    the goal is met for the total activity in the slot. The current slot is
+    counted only if it is complete.
+
+    Attributes
+    ----------
+        habit (Habit): The habit.
+        days (int): Number of days from the start date till today.
+        completion_rate (float): Ratio of complete slots to all slots.
+        average_7 (float): Average activity per day for the last 7 days, or
+        from the start date if the habit is younger.
+        average_30 (float): Average activity per day for the last 30 days, or
+        from the start date if the habit is younger.
+        current_streak (int): Complete slots till the current slot.
+        best_streak (int): Longest run of complete slots.
+        weekdays (list): Total activity for each day of the week, from Monday.
+
+    """
+
+    habit: models.Habit
+    days: int
+    completion_rate: float = 0.0
+    average_7: float = 0.0
+    average_30: float = 0.0
+    current_streak: int = 0
+    best_streak: int = 0
+    weekdays: list = field(default_factory=lambda: [0.0] * 7)
+
+
+def get_stats(today=None, backend=None):
+    """Get statistics of all active habits.
+
+    Args:
+    ----
+        today (date): Last day of the statistics. Default: today.
+        backend (str): `numpy` or `array`. Default: `numpy` if installed.
+
+    Returns:
+    -------
+        List of HabitStats.
+
+    """
+    today = today or datetime.now().date()
+    ops = _get_backend(backend)
+
+    # Read the day of each total as an offset from the start date of the habit
+    fn = models.fn
+    start_date = fn.date(
+        fn.COALESCE(models.Habit.start_date, models.Habit.created_date)
+    )
+    offset = fn.julianday(models.DailyTotal.day) - fn.julianday(start_date)
+    totals = (
+        models.DailyTotal.select(
+            models.DailyTotal.for_habit,
+            offset.cast("INTEGER"),
+            models.DailyTotal.total_quantum,
+        )
+        .join(models.Habit)
+        .where(
+            models.Habit.active
+            & (models.DailyTotal.day >= start_date)
+            & (models.DailyTotal.day <= today)
+        )
+        .order_by(models.DailyTotal.for_habit)
+    )
+
+    # Skip the conversion of each row to python types in the ORM. Rows are
+    # plain numbers.
+    days_by_habit = ops.group(models.db.execute(totals).fetchall())
+
+    stats = []
+    for habit in models.Habit.all_active().order_by(models.Habit.id):
+        start = habit.start_date or habit.created_date
+        days = (today - start).days + 1
+        if days < 1:
+            stats.append(HabitStats(habit, 0))
+            continue
+
+        offsets, values = days_by_habit.get(habit.id, ([], []))
+        daily, active = ops.daily(days, offsets, values)
+        stats.append(_get_habit_stats(habit, start, daily, active, ops))
+    return stats
+
+
+def _get_habit_stats(habit, start, daily, active, ops):
+    days = len(daily)
+    slot_totals = ops.slot_sums(daily, habit.frequency)
+    slot_active = ops.slot_sums(active, habit.frequency)
+    complete = ops.goal_met(slot_totals, slot_active, habit.quantum, habit.minimize)
+
+    # Current slot is in progress. Count it only if it is complete.
+    slots = len(complete) if complete[-1] else len(complete) - 1
+    runs = ops.runs(complete)
+    current = 0
+    if runs and runs[-1][1] == slots:
+        current = runs[-1][1] - runs[-1][0]
+
+    return HabitStats(
+        habit=habit,
+        days=days,
+        completion_rate=ops.count(complete) / slots if slots > 0 else 0.0,
+        average_7=ops.window_mean(daily, 7),
+        average_30=ops.window_mean(daily, 30),
+        current_streak=current,
+        best_streak=max((end - begin for begin, end in runs), default=0),
+        weekdays=ops.weekday_sums(daily, start.weekday()),
+    )
+
+
+def _get_backend(name):
+    if name is None:
+        name = "array" if np is None else "numpy"
+    if name == "numpy":
+        if np is None:
+            raise ValueError("NumPy is not installed.")
+        return _NumpyBackend
+    if name == "array":
+        return _ArrayBackend
+    raise ValueError(f"Unknown backend '{name}'. Try numpy or array.")
+
+
+class _NumpyBackend:
+    @staticmethod
+    def group(rows):
+        # Split the rows ordered by habit at the first row of each habit
+        data = np.array(rows, dtype=float).reshape(-1, 3)
+        habit_ids, starts = np.unique(data[:, 0], return_index=True)
+        parts = np.split(data[:, 1:], starts[1:])
+        return {
+            int(habit_id): (part[:, 0].astype(np.intp), part[:, 1])
+            for habit_id, part in zip(habit_ids, parts)
+        }
+
+    @staticmethod
+    def daily(days, offsets, values):
+        daily = np.zeros(days)
+        daily[offsets] = values
+        active = np.zeros(days)
+        active[offsets] = 1.0
+        return daily, active
+
+    @staticmethod
+    def slot_sums(daily, frequency):
+        slots = -(-len(daily) // frequency)
+        padded = np.zeros(slots * frequency)
+        padded[: len(daily)] = daily
+        return padded.reshape(slots, frequency).sum(axis=1)
+
+    @staticmethod
+    def goal_met(totals, active, quantum, minimize):
+        met = totals <= quantum if minimize else totals >= quantum
+        return met & (active > 0)
+
+    @staticmethod
+    def runs(flags):
+        # Start and end (exclusive) index of each run of True values
+        edges = np.diff(np.concatenate(([0], flags.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        return list(zip(starts.tolist(), ends.tolist()))
+
+    @staticmethod
+    def count(flags):
+        return int(np.count_nonzero(flags))
+
+    @staticmethod
+    def window_mean(daily, window):
+        return float(daily[-window:].mean())
+
+    @staticmethod
+    def weekday_sums(daily, first_weekday):
+        weekdays = (np.arange(len(daily)) + first_weekday) % 7
+        return np.bincount(weekdays, weights=daily, minlength=7).tolist()
+
+
+class _ArrayBackend:
+    @staticmethod
+    def group(rows):
+        days_by_habit = {}
+        for habit_id, offset, total in rows:
+            offsets, values = days_by_habit.setdefault(habit_id, ([], []))
+            offsets.append(offset)
+            values.append(total)
+        return days_by_habit
+
+    @staticmethod
+    def daily(days, offsets, values):
+        daily = array("d", bytes(8 * days))
+        active = array("d", bytes(8 * days))
+        for offset, value in zip(offsets, values):
+            daily[offset] = value
+            active[offset] = 1.0
+        return daily, active
+
+    @staticmethod
+    def slot_sums(daily, frequency):
+        return array(
+            "d",
+            (sum(daily[i : i + frequency]) for i in range(0, len(daily), frequency)),
+        )
+
+    @staticmethod
+    def goal_met(totals, active, quantum, minimize):
+        return [
+            a > 0 and (t <= quantum if minimize else t >= quantum)
+            for t, a in zip(totals, active)
+        ]
+
+    @staticmethod
+    def runs(flags):
+        runs = []
+        start = None
+        for i, flag in enumerate(flags):
+            if flag and start is None:
+                start = i
+            elif not flag and start is not None:
+                runs.append((start, i))
+                start = None
+        if start is not None:
+            runs.append((start, len(flags)))
+        return runs
+
+    @staticmethod
+    def count(flags):
+        return sum(flags)
+
+    @staticmethod
+    def window_mean(daily, window):
+        values = daily[-window:]
+        return sum(values) / len(values)
+
+    @staticmethod
+    def weekday_sums(daily, first_weekday):
+        sums = [0.0] * 7
+        for i, value in enumerate(daily):
+            sums[(i + first_weekday) % 7] += value
+        return sums
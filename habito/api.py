@@ -0,0 +1,415 @@
+# -*- coding: utf-8 -*-
+"""HTTP API for habito on localhost.
+
+Endpoints return JSON:
+
+- `GET /habits`: active habits with their streaks.
+- `GET /activities?days=N`: daily activities of the habits for N days.
+- `GET /summaries`: streak state of the habits.
+- `POST /checkins`: add an activity. Body is a JSON object with `habit` (id or
+  name), `quantum` and an optional `date`, e.g. `yesterday`.
+
+Requests must have a localhost `Host`, and POST requests must have the
+`application/json` content type.
+
+Check-ins from concurrent requests are written together by `CheckinWriter`.
+"""
+
+import json
+import math
+import queue
+import threading
+import time
+from concurrent import futures
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from habito import dates, models
+
+HOST = "127.0.0.1"
+
+# Names of localhost in the `Host` header of the requests. Other names are
+# rejected, so that a web page can't reach the API by DNS rebinding.
+LOCAL_HOSTS = ("127.0.0.1", "localhost", "[::1]")
+
+# Time in seconds to wait for more check-ins after the first one in a commit,
+# and the maximum check-ins in a commit
+COMMIT_WINDOW = 0.005
+MAX_BATCH = 100
+
+# Time in seconds for a request to wait for its check-in to be committed
+CHECKIN_TIMEOUT = 30
+
+
+class ApiError(Exception):
+    """Error response with an HTTP status."""
+
+    def __init__(self, status, message):
+        """Create an error with the HTTP status and a message."""
+        super().__init__(message)
+        self.status = status
+
+
+class CheckinWriter:
+    """Write check-ins from many threads in group commits.
+
+    A thread waits for the first check-in, then collects the check-ins which
+    arrive in `window` seconds and writes them in one transaction. Streak of a
+    habit is updated once for all its check-ins in the transaction. If a
+    transaction fails, its check-ins are written one at a time so that only
+    the invalid ones fail. If the thread fails, the pending check-ins fail
+    with its error.
+
+    Args:
+    ----
+        window (float): Time to wait for more check-ins in seconds.
+        max_batch (int): Maximum check-ins in a transaction.
+        profile (str): Database profile for the connection of the writer.
+        timeout (float): Time to wait for a check-in to be committed.
+
+    """
+
+    def __init__(
+        self,
+        window=COMMIT_WINDOW,
+        max_batch=MAX_BATCH,
+        profile=None,
+        timeout=CHECKIN_TIMEOUT,
+    ):
+        """Create a writer. Call `start` to write the check-ins."""
+        self.window = window
+        self.max_batch = max_batch
+        self.profile = profile
+        self.timeout = timeout
+        self.commits = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """Start writing the check-ins."""
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Write the pending check-ins and stop."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def checkin(self, habit, quantum, update_date):
+        """Add an activity and wait till it is committed.
+
+        Returns
+        -------
+            Tuple of the Activity and the streak of the habit after the commit.
+
+        Raises
+        ------
+            ApiError with status 503 if it is not committed in `timeout`.
+
+        """
+        future = futures.Future()
+        self._queue.put(((habit, quantum, update_date), future))
+        try:
+            return future.result(timeout=self.timeout)
+        except futures.TimeoutError:
+            raise ApiError(
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                "Check-in was not committed in time. Try again later.",
+            )
+
+    def _run(self):
+        batch = []
+        try:
+            _connect(self.profile)
+            stopped = False
+            while not stopped:
+                item = self._queue.get()
+                if item is None:
+                    break
+                batch = [item]
+                deadline = time.monotonic() + self.window
+                while len(batch) < self.max_batch:
+                    try:
+                        timeout = max(deadline - time.monotonic(), 0)
+                        item = self._queue.get(timeout=timeout)
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stopped = True
+                        break
+                    batch.append(item)
+                self._commit(batch)
+                batch = []
+        except Exception as e:
+            models.logger.exception("api: Check-in writer failed.")
+            self._fail(batch, e)
+        finally:
+            models.db.close()
+
+    def _fail(self, batch, error):
+        # Requests waiting for the check-ins in the batch and the queue
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                batch.append(item)
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    def _commit(self, batch):
+        self.commits += 1
+        try:
+            results = models.write(_add_checkins, [checkin for checkin, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            # Find the failed check-ins
+            for item in batch:
+                self._commit([item])
+            return
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+def _add_checkins(checkins):
+    activities = [models.Activity.add(h, q, d) for h, q, d in checkins]
+
+    by_habit = {}
+    for (habit, _, _), activity in zip(checkins, activities):
+        by_habit.setdefault(habit.id, (habit, []))[1].append(activity)
+    streaks = {
+        habit_id: models.Summary.update_streak_batch(habit, habit_activities).streak
+        for habit_id, (habit, habit_activities) in by_habit.items()
+    }
+    return [(a, streaks[h.id]) for (h, _, _), a in zip(checkins, activities)]
+
+
+def _connect(profile):
+    # Connections are per thread. Apply the database profile to a new one.
+    if models.db.is_closed():
+        models.db.connect()
+        models.set_profile(profile or "default")
+
+
+class ApiServer(ThreadingHTTPServer):
+    """HTTP server for the API on localhost.
+
+    Args:
+    ----
+        port (int): Port to listen on. Use 0 for any free port.
+        writer (CheckinWriter): Writer for the check-ins.
+
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port, writer):
+        """Create a server and bind it to the port."""
+        super().__init__((HOST, port), _Handler)
+        self.writer = writer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "habito"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        routes = {
+            "/habits": get_habits,
+            "/activities": get_activities,
+            "/summaries": get_summaries,
+        }
+        self._respond(routes.get(url.path), parse_qs(url.query))
+
+    def do_POST(self):
+        routes = {"/checkins": self._checkin}
+        self._respond(
+            routes.get(urlparse(self.path).path), self._read_body(), post=True
+        )
+
+    def log_message(self, format, *args):
+        models.logger.debug("api: " + format % args)
+
+    def _checkin(self, body):
+        habit, quantum, update_date = parse_checkin(body)
+        activity, streak = self.server.writer.checkin(habit, quantum, update_date)
+        return HTTPStatus.CREATED, {
+            "id": activity.id,
+            "habit": habit.id,
+            "quantum": activity.quantum,
+            "date": activity.update_date.isoformat(),
+            "streak": streak,
+        }
+
+    def _check_headers(self, post):
+        port = self.server.server_address[1]
+        if self.headers.get("Host") not in [f"{h}:{port}" for h in LOCAL_HOSTS]:
+            raise ApiError(HTTPStatus.FORBIDDEN, "Host must be localhost.")
+
+        # Web pages can't send JSON to another site without a CORS preflight
+        content_type = self.headers.get("Content-Type", "").split(";")[0]
+        if post and content_type.strip().lower() != "application/json":
+            raise ApiError(
+                HTTPStatus.UNSUPPORTED_MEDIA_TYPE,
+                "Content-Type must be application/json.",
+            )
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length)
+
+    def _respond(self, route, arg, post=False):
+        _connect(self.server.writer.profile)
+        try:
+            self._check_headers(post)
+            if route is None:
+                raise ApiError(HTTPStatus.NOT_FOUND, f"Unknown path {self.path}.")
+            result = route(arg)
+            status, body = (
+                result if isinstance(result, tuple) else (HTTPStatus.OK, result)
+            )
+        except ApiError as e:
+            status, body = e.status, {"error": str(e)}
+        except Exception as e:
+            models.logger.exception("api: Request failed.")
+            status, body = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+        finally:
+            models.db.close()
+
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def get_habits(query):
+    """Get the active habits with their streaks."""
+    # Daily activities for 0 days are the habits with their streaks
+    return [
+        {
+            "id": h.id,
+            "name": h.name,
+            "quantum": h.quantum,
+            "units": h.units,
+            "frequency": h.frequency,
+            "minimize": h.minimize,
+            "streak": h.streak,
+        }
+        for h, _ in models.get_daily_activities(0)
+    ]
+
+
+def get_activities(query):
+    """Get the daily activities of the active habits for `days` days."""
+    try:
+        days = int(query.get("days", ["7"])[0])
+        if days < 1:
+            raise ValueError()
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "days must be a positive integer.")
+
+    today = datetime.now().date()
+    return [
+        {
+            "habit": habit.id,
+            "days": [
+                {"date": (today - timedelta(days=d)).isoformat(), "quantum": q}
+                for d, q in daily
+            ],
+        }
+        for habit, daily in models.get_daily_activities(days)
+    ]
+
+
+def get_summaries(query):
+    """Get the streak state of the active habits."""
+    summaries = (
+        models.Summary.select()
+        .join(models.Habit)
+        .where(models.Habit.active)
+        .order_by(models.Summary.for_habit)
+    )
+    return [
+        {
+            "habit": s.for_habit_id,
+            "streak": s.streak,
+            "slot_start": s.slot_start and s.slot_start.isoformat(),
+            "slot_quantum": s.slot_quantum,
+            "previous_streak": s.previous_streak,
+        }
+        for s in summaries
+    ]
+
+
+def parse_checkin(body):
+    """Parse the body of a check-in request.
+
+    Returns
+    -------
+        Tuple of the habit, quantum and the date of the activity.
+
+    Raises
+    ------
+        ApiError if the body is invalid or the habit is not found.
+
+    """
+    try:
+        checkin = json.loads(body)
+        quantum = float(checkin["quantum"])
+        name = checkin["habit"]
+    except (ValueError, TypeError, KeyError):
+        raise ApiError(
+            HTTPStatus.BAD_REQUEST,
+            "Body must be a JSON object with habit and quantum.",
+        )
+    # JSON numbers are parsed with `NaN` and `Infinity`, and booleans are ints
+    if not math.isfinite(quantum):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "quantum must be a finite number.")
+    if isinstance(name, bool):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "habit must be an id or a name.")
+
+    update_date = dates.parse(str(checkin.get("date") or "today"))
+    if update_date is None:
+        error = f"Unable to parse date: {checkin['date']}."
+        raise ApiError(HTTPStatus.BAD_REQUEST, error)
+
+    if isinstance(name, int):
+        habits = list(models.Habit.all_active().where(models.Habit.id == name))
+    else:
+        habits = models.Habit.find(str(name))
+    if len(habits) != 1:
+        error = "No habit" if not habits else "More than one habits"
+        raise ApiError(HTTPStatus.NOT_FOUND, f"{error} matched '{name}'.")
+    return habits[0], quantum, update_date
+
+
+def serve(port, window=COMMIT_WINDOW, ready=None):
+    """Serve the API till interrupted.
+
+    Database must be set up before serving.
+
+    Args:
+    ----
+        port (int): Port on localhost.
+        window (float): Time to wait for more check-ins in a commit in seconds.
+        ready (callable): Called with the server when it accepts requests.
+
+    """
+    writer = CheckinWriter(window, profile=models.get_profile()).start()
+    server = ApiServer(port, writer)
+    try:
+        if ready:
+            ready(server)
+        server.serve_forever()
+    finally:
+        server.server_close()
+        writer.stop()
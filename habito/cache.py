@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""Cache for the output of the read only commands.
+
+An output is stored in a file named by the change marker of the database, the
+current date and a digest of the other inputs, e.g. the terminal width. Writes
+to the database change the marker, so a cached output is never stale. Files
+for an older marker or date are removed when a new output is stored.
+"""
+
+import hashlib
+import os
+import tempfile
+from datetime import datetime
+
+DIR_NAME = "cache"
+
+
+def get_dir():
+    """Get the path of the cache directory in the app directory."""
+    import click
+
+    return os.path.join(click.get_app_dir("habito"), DIR_NAME)
+
+
+class OutputCache:
+    """Output of a command for the state of the database.
+
+    Args:
+    ----
+        name (str): Name of the command.
+        marker (str): Change marker of the database.
+        key (tuple): Other inputs of the output.
+        path (str): Cache directory. Default is `get_dir()`.
+
+    """
+
+    def __init__(self, name, marker, key, path=None):
+        """Create a cache entry. Output is read with `get` and stored with `open`."""
+        self.path = path or get_dir()
+        self.prefix = f"{name}-{marker}-{datetime.now().date()}-"
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        self.file_name = self.prefix + digest
+
+    def get(self):
+        """Get the path of the cached output.
+
+        Returns
+        -------
+            Path of the output file or None if it is not cached.
+
+        """
+        path = os.path.join(self.path, self.file_name)
+        return path if os.path.exists(path) else None
+
+    def open(self):
+        """Open a writer for the output.
+
+        Output is stored when the writer is closed. It is discarded if the
+        writer is closed for an exception.
+        """
+        return _Writer(self)
+
+    def _prune(self):
+        name = self.prefix.split("-", 1)[0] + "-"
+        for file_name in os.listdir(self.path):
+            if file_name.startswith(name) and not file_name.startswith(self.prefix):
+                try:
+                    os.remove(os.path.join(self.path, file_name))
+                except OSError:
+                    pass
+
+
+class _Writer:
+    def __init__(self, cache):
+        self._cache = cache
+        self._file = None
+
+    def __enter__(self):
+        os.makedirs(self._cache.path, exist_ok=True)
+        fd, self._temp_path = tempfile.mkstemp(dir=self._cache.path, prefix=".")
+        self._file = os.fdopen(fd, "w", encoding="utf-8")
+        return self._file
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        if exc_type is not None:
+            os.remove(self._temp_path)
+            return False
+
+        # Concurrent writers store the same output. Replace is atomic.
+        os.replace(
+            self._temp_path, os.path.join(self._cache.path, self._cache.file_name)
+        )
+        self._cache._prune()
+        return False
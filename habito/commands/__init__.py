@@ -1,28 +1,180 @@
 # -*- coding: utf-8 -*-
 """Commands for Habito."""
+
+import importlib
 import os
+import shutil
+
+# Telemetry measures the imports from here. Import it before the dependencies.
+from habito import telemetry
+
 import click
 
-from habito import models
-from .add import add
-from .checkin import checkin
-from .delete import delete
-from .edit import edit
-from .list import list
+# Map of command names to their modules. A command module is imported only if
+# the command is invoked, so that slow imports like `dateparser` are paid only
+# by the commands using them.
+COMMANDS = {
+    "add": "add",
+    "api": "api",
+    "checkin": "checkin",
+    "compact": "compact",
+    "config": "config",
+    "delete": "delete",
+    "dev": "dev",
+    "edit": "edit",
+    "import": "import_",
+    "list": "list",
+    "perf": "perf",
+    "rebuild-rollups": "rebuild_rollups",
+    "recompute": "recompute",
+    "serve": "serve",
+    "stats": "stats",
+}
+
+# Commands which are run by `habito serve` if it is running
+FORWARDED = ("list", "checkin")
+
+# Key of the command name and its arguments in the context of the group
+COMMAND_ARGS_KEY = "habito.command_args"
 
 database_name = os.path.join(click.get_app_dir("habito"), "habito.db")
 
 
-@click.group()
-def cli():
+def can_forward(args):
+    """Check if the command line arguments can be run by the server.
+
+    `checkin` is forwarded only if it doesn't prompt for the progress, i.e. a
+    quantum is provided without `--review`.
+    """
+    if not args or args[0] not in FORWARDED:
+        return False
+    if args[0] == "checkin":
+        options = [a for a in args[1:] if a.startswith("-")]
+        review = any(a in ("-r", "--review") for a in options)
+        quantum = any(a.startswith(("-q", "--quantum")) for a in options)
+        return quantum and not review
+    return True
+
+
+class LazyGroup(click.Group):
+    """Command group which imports a command when it is invoked."""
+
+    def list_commands(self, ctx):
+        """Get the names of all commands."""
+        return sorted(COMMANDS)
+
+    def get_command(self, ctx, cmd_name):
+        """Get a command by name. Import the command module if required."""
+        if cmd_name not in COMMANDS:
+            return None
+        return _load_command(COMMANDS[cmd_name])
+
+    def parse_args(self, ctx, args):
+        """Parse the options of the group. Keep the arguments of the command."""
+        # `list` is the list command once it is loaded
+        given = [*args]
+        rest = super().parse_args(ctx, args)
+        # Options of the group are parsed till the command name, so the command
+        # name and its arguments are the tail of the given arguments. Without a
+        # command, the tail is the last option of the group and isn't forwarded.
+        ctx.meta[COMMAND_ARGS_KEY] = given[len(given) - len(rest) - 1 :]
+        return rest
+
+    def invoke(self, ctx):
+        """Invoke a command. Forward it to `habito serve` if it is running."""
+        args = ctx.meta[COMMAND_ARGS_KEY]
+        in_process = ctx.params["profile"] or ctx.params["profile_json"]
+        if in_process or telemetry.is_enabled():
+            return super().invoke(ctx)
+
+        # Client of the server is imported only for the forwarded commands
+        if can_forward(args):
+            from habito import daemon
+
+            response = daemon.forward(daemon.get_socket_path(), args)
+            if response is not None:
+                click.echo(response["stdout"], nl=False)
+                click.echo(response["stderr"], nl=False, err=True)
+                ctx.exit(response["exit_code"])
+        return super().invoke(ctx)
+
+
+@click.group(cls=LazyGroup)
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Show the time of the SQL statements run by the command.",
+)
+@click.option(
+    "--profile-json",
+    type=click.Path(dir_okay=False),
+    help="Write the time of the SQL statements run by the command to a JSON file.",
+)
+@click.pass_context
+def cli(ctx, profile, profile_json):
     """Habito - a simple command line habit tracker."""
-    if not os.path.exists(click.get_app_dir("habito")):
-        os.mkdir(click.get_app_dir("habito"))
-    models.setup(database_name)
+    if telemetry.is_enabled():
+        telemetry.start(ctx.invoked_subcommand)
+        ctx.call_on_close(lambda: telemetry.finish(telemetry.get_path()))
+
+    with telemetry.phase("import"):
+        from habito import models
+
+    if profile or profile_json:
+        _start_profiler(ctx, models.db, profile, profile_json)
+
+    with telemetry.phase("app_dir"):
+        if not os.path.exists(click.get_app_dir("habito")):
+            os.mkdir(click.get_app_dir("habito"))
+    with telemetry.phase("setup"):
+        try:
+            models.setup(database_name, progress=_show_progress)
+        except ValueError as e:
+            click.secho(str(e), fg="red")
+            raise SystemExit(1)
+
+
+def _show_progress(version, done, total):
+    # Upgrades of large databases take a while. Show the progress on a line.
+    click.echo(
+        f"\rUpgrading the database: #{version} {done * 100 // total}%",
+        nl=False,
+        err=True,
+    )
+    if done == total:
+        click.echo(err=True)
+
+
+def _start_profiler(ctx, database, show, path):
+    from habito.profiler import QueryProfiler
+
+    profiler = QueryProfiler(database).start()
+
+    # Report when the command ends, including the errors and exits
+    def report():
+        profiler.stop()
+        if show:
+            width = shutil.get_terminal_size().columns
+            click.echo(profiler.format(width), err=True)
+        if path:
+            with open(path, "w") as f:
+                f.write(profiler.to_json())
+
+    ctx.call_on_close(report)
+
+
+def __getattr__(name):
+    """Get a command by its module name, e.g. `habito.commands.add`."""
+    if name in COMMANDS.values():
+        return _load_command(name)
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
 
+def _load_command(name):
+    module = importlib.import_module(f"{__name__}.{name}")
+    command = getattr(module, name)
 
-cli.add_command(add)
-cli.add_command(checkin)
-cli.add_command(delete)
-cli.add_command(edit)
-cli.add_command(list)
+    # Importing a submodule sets it as an attribute of this package. Replace it
+    # with the command so that `habito.commands.add` is always the command.
+    globals()[name] = command
+    return command
@@ -3,9 +3,9 @@
 from datetime import datetime
 
 import click
-import dateparser
 import sys
 
+from habito import dates
 from habito import models as models
 
 EXAMPLES = """
@@ -48,7 +48,7 @@ EXAMPLES = """
 def add(name, quantum, units, interval, minimize, start_date):
     """Add a habit NAME with QUANTUM goal."""
     habit_name = " ".join(name)
-    track_date = dateparser.parse(start_date)
+    track_date = dates.parse(start_date)
     if track_date is None:
         click.echo(f"Unable to parse start date: {start_date}.")
         sys.exit(1)
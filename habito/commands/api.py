@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""Habito api command."""
+
+import signal
+import sys
+
+import click
+
+EXAMPLES = """
+    Endpoints:
+
+    \b
+    GET  /habits                Active habits with their streaks.
+    GET  /activities?days=7     Daily activities of the habits.
+    GET  /summaries             Streak state of the habits.
+    POST /checkins              Add an activity. Body is a JSON object, e.g.
+                                {"habit": "running", "quantum": 3}.
+
+    Examples:
+
+    \b
+    habito api --port 8765 &
+    curl -d '{"habit": 1, "quantum": 3}' http://127.0.0.1:8765/checkins
+"""
+
+
+@click.command(epilog=EXAMPLES)
+@click.option(
+    "--port",
+    "-p",
+    type=click.IntRange(0, 65535),
+    default=8765,
+    help="Port on localhost. Default: 8765.",
+)
+@click.option(
+    "--window",
+    type=click.FloatRange(min=0),
+    default=5.0,
+    help="Milliseconds to wait for more check-ins to commit together. Default: 5.",
+)
+def api(port, window):
+    """Serve habits and check-ins as JSON over HTTP on localhost."""
+    from habito import api as habito_api
+
+    # Stop the server cleanly on SIGTERM and commit the pending check-ins
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    def ready(server):
+        host, port = server.server_address[:2]
+        click.echo(f"Serving habito API on http://{host}:{port}. Press Ctrl+C to stop.")
+
+    try:
+        habito_api.serve(port, window / 1000, ready)
+    except OSError as e:
+        click.secho(f"Unable to serve on port {port}: {e.strerror}.", fg="red")
+        raise SystemExit(1)
+    except KeyboardInterrupt:
+        click.echo("Stopped.")
@@ -1,10 +1,10 @@
 # -*- coding: utf-8 -*-
 """Habito checkin command."""
-from datetime import datetime
 from sys import float_info
 
 import click
 
+from habito import dates, telemetry
 from habito import models
 
 
@@ -16,27 +16,55 @@ from habito import models
 @click.option(
     "--date",
     "-d",
-    help="Date of activity in mm/dd format (defaults to today).",
-    default=datetime.now().strftime("%m/%d"),
+    help="Date of activity, e.g. 10/24, yesterday or 2 days ago. Default: today.",
+    default="today",
 )
 @click.option("--quantum", "-q", type=float, help="Progress for the day.")
-def checkin(name, review, date, quantum):
+@click.option(
+    "--regex",
+    is_flag=True,
+    help="Match NAME as a regular expression instead of the start of the name.",
+)
+@click.option(
+    "--atomic/--no-atomic",
+    default=True,
+    help=(
+        "Save the progress in review mode at the end of the review. An aborted"
+        " review doesn't save any progress. Default: atomic."
+    ),
+)
+def checkin(name, review, date, quantum, regex, atomic):
     """Commit progress for a habit."""
     # Set a date for this checkin. Use past year if month/day is in future
     query = " ".join(name)
-    date = date.strip()
-    d = datetime.strptime(date, "%m/%d").replace(year=datetime.now().year)
-    update_date = d if d < datetime.now() else d.replace(year=d.year - 1)
+    update_date = dates.parse(date)
+    if update_date is None:
+        click.secho(f"Unable to parse date: {date}.", fg="red")
+        raise SystemExit(1)
     update_date_str = update_date.strftime("%a %b %d %Y")
 
     # Review mode: iterate through all habits
     if review:
         _print_header(update_date_str)
         click.echo("(Press `enter` if you'd like to skip update for a habit.)")
-        for h in models.Habit.all_active():
+        with telemetry.phase("fetch"):
+            habits = list(models.Habit.all_active())
+        progress = []
+        for h in habits:
             q = _get_quantum(h, required=False)
-            if q is not None:
+            if q is None:
+                continue
+            if atomic:
+                progress.append((h, q))
+            else:
                 _update_activity(h, q, update_date)
+
+        # Save all the progress in one transaction. Skip the write lock if
+        # there is no progress.
+        if not progress:
+            return
+        with telemetry.phase("compute"):
+            models.write(_add_activities, progress, update_date)
         return
 
     # Non review mode: checkin a single habit
@@ -44,12 +72,13 @@ def checkin(name, review, date, quantum):
         click.echo("No habit specified, no progress updated.")
         click.echo("Try 'habito checkin <habit_name>'?")
         return
-    habits = models.Habit.all_active().where(models.Habit.name.regexp(query))
-    if habits.count() == 0:
+    with telemetry.phase("fetch"):
+        habits = models.Habit.find(query, regex)
+    if len(habits) == 0:
         error = "No habit matched the name '{0}'.".format(query)
         click.secho(error, fg="red")
         return
-    elif habits.count() > 1:
+    elif len(habits) > 1:
         error = (
             "More than one habits matched the name '{0}'. "
             "Don't know which to update."
@@ -65,12 +94,14 @@ def checkin(name, review, date, quantum):
     if quantum is None:
         _print_header(update_date_str)
         quantum = _get_quantum(habit, required=True)
-    activity = _update_activity(habit, quantum, update_date)
+    with telemetry.phase("compute"):
+        activity = _update_activity(habit, quantum, update_date)
 
-    act_msg = click.style("{0} {1}".format(activity.quantum, habit.units), fg="green")
-    act_date = click.style(update_date_str, fg="green")
-    habit_msg = click.style("{0}".format(habit.name), fg="green")
-    click.echo("Added {0} to habit {1} for {2}.".format(act_msg, habit_msg, act_date))
+    with telemetry.phase("render"):
+        act_msg = click.style(f"{activity.quantum} {habit.units}", fg="green")
+        act_date = click.style(update_date_str, fg="green")
+        habit_msg = click.style("{0}".format(habit.name), fg="green")
+        click.echo(f"Added {act_msg} to habit {habit_msg} for {act_date}.")
 
 
 def _print_header(date_str):
@@ -98,11 +129,20 @@ def _get_quantum(habit, required=True):
 
 
 def _update_activity(habit, quantum, update_date):
+    # Hold the write lock from the insert till the streak update. Concurrent
+    # check-ins from other processes wait instead of reading a stale streak.
+    return models.write(_add_activity, habit, quantum, update_date)
+
+
+def _add_activities(progress, update_date):
+    for habit, quantum in progress:
+        _add_activity(habit, quantum, update_date)
+
+
+def _add_activity(habit, quantum, update_date):
     # Create an activity for this checkin
-    activity = models.Activity.create(
-        for_habit=habit, quantum=quantum, update_date=update_date
-    )
+    activity = models.Activity.add(habit, quantum, update_date)
 
     # Update streak for the habit
-    models.Summary.update_streak(habit)
+    models.Summary.update_streak(habit, activity)
     return activity
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""Habito compact command."""
+from datetime import datetime, time
+
+import click
+
+from habito import dates, models
+
+EXAMPLES = """
+    Activities of a day with more than one check-in are moved to an archive and
+    replaced by their total. Daily activity and streaks of the habits don't
+    change.
+
+    Examples:
+
+    \b
+    habito compact
+    habito compact --before "30 days ago" --vacuum
+    habito compact --before 2024-01-01 --archive-db habito-archive.db
+"""
+
+
+@click.command(epilog=EXAMPLES)
+@click.option(
+    "--before",
+    "-b",
+    default="today",
+    help="Compact the activities before this date. Default: today.",
+)
+@click.option(
+    "--archive-db",
+    type=click.Path(dir_okay=False),
+    help="Archive the activities to this database file. Default: habito database.",
+)
+@click.option(
+    "--vacuum",
+    is_flag=True,
+    help="Rebuild the database file to reclaim the space of archived activities.",
+)
+def compact(before, archive_db, vacuum):
+    """Fold old activities to one activity per habit per day."""
+    before_date = dates.parse(before)
+    if before_date is None:
+        click.secho(f"Unable to parse date: {before}.", fg="red")
+        raise SystemExit(1)
+    before_time = datetime.combine(before_date.date(), time.min)
+
+    schema = "main"
+    if archive_db is not None:
+        models.db.execute_sql("ATTACH DATABASE ? AS archive", (archive_db,))
+        schema = "archive"
+    try:
+        archived, added = models.write(models.Activity.compact, before_time, schema)
+    finally:
+        if archive_db is not None:
+            models.db.execute_sql("DETACH DATABASE archive")
+
+    if vacuum:
+        models.db.execute_sql("VACUUM")
+
+    msg_archived = click.style(str(archived), fg="green")
+    msg_added = click.style(str(added), fg="green")
+    msg_date = click.style(before_time.strftime("%a %b %d %Y"), fg="green")
+    click.echo(
+        f"Archived {msg_archived} activities before {msg_date}"
+        f" as {msg_added} daily activities."
+    )
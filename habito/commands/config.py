@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""Habito config command."""
+import click
+
+from habito import models
+
+# Settings which can be changed by the users. Maps the name of a setting to its
+# name in the database config, the allowed values and the default value.
+SETTINGS = {
+    "db-profile": ("db_profile", sorted(models.PROFILES), "default"),
+}
+
+EXAMPLES = """
+    Settings:
+
+    \b
+    db-profile  SQLite settings for the database: default, fast or wal.
+                HABITO_DB_PROFILE environment variable overrides it.
+
+    Examples:
+
+    \b
+    habito config
+    habito config db-profile fast
+"""
+
+
+@click.command(epilog=EXAMPLES)
+@click.argument(
+    "name", type=click.Choice(sorted(SETTINGS)), required=False, metavar="[NAME]"
+)
+@click.argument("value", required=False)
+def config(name, value):
+    """Show the settings, or change setting NAME to VALUE."""
+    if value is None:
+        for n in [name] if name else sorted(SETTINGS):
+            key, _, default = SETTINGS[n]
+            click.echo(f"{n} = {models.Config.get_value(key, default)}")
+        return
+
+    key, choices, _ = SETTINGS[name]
+    if value not in choices:
+        error = f"Invalid value '{value}' for {name}. Try {', '.join(choices)}."
+        click.secho(error, fg="red")
+        raise SystemExit(1)
+
+    models.Config.set_value(key, value)
+    click.echo(f"Updated {name} to {click.style(value, fg='green')}.")
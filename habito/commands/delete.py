@@ -27,13 +27,15 @@ def delete(id, keeplogs):
     if confirm:
         click.echo("Habit {}: {} has been deleted!".format(habit.id, habit.name))
         if not keeplogs:
-            models.Activity.delete().where(
-                models.Activity.for_habit == habit.id
-            ).execute()
-            models.Summary.delete().where(
-                models.Summary.for_habit == habit.id
-            ).execute()
-            habit.delete_instance()
+            with models.db.atomic():
+                for model in [
+                    models.Activity,
+                    models.ActivityArchive,
+                    models.DailyTotal,
+                    models.Summary,
+                ]:
+                    model.delete().where(model.for_habit == habit.id).execute()
+                habit.delete_instance()
         else:
             habit.active = False
             habit.save()
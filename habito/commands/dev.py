@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""Habito developer commands."""
+
+import os
+import random
+from datetime import datetime, timedelta
+
+import click
+
+from habito import models
+
+EXAMPLES = """
+    Examples:
+
+    \b
+    habito dev seed --habits 100 --years 5 --database /tmp/habito.db
+"""
+
+
+@click.group()
+def dev():
+    """Tools for developing habito."""
+
+
+@dev.command(epilog=EXAMPLES)
+@click.option("--habits", "-n", type=click.INT, default=10, help="Number of habits.")
+@click.option(
+    "--years", "-y", type=click.INT, default=1, help="Years of activity history."
+)
+@click.option(
+    "--checkins",
+    "-c",
+    type=click.INT,
+    default=3,
+    help="Maximum number of check-ins for a habit in a day.",
+)
+@click.option("--seed", type=click.INT, default=0, help="Seed for random data.")
+@click.option(
+    "--database",
+    type=click.Path(dir_okay=False),
+    required=True,
+    help="Database to add the data to. The habito database is not allowed.",
+)
+def seed(habits, years, checkins, seed, database):
+    """Add habits with random activities to a database."""
+    import habito.commands
+
+    # Synthetic data must never be mixed with the tracked habits
+    default = os.path.abspath(habito.commands.database_name)
+    if database != ":memory:" and os.path.abspath(database) == default:
+        click.secho("Refusing to add random data to the habito database.", fg="red")
+        raise SystemExit(1)
+
+    models.setup(database)
+
+    count = generate(habits, years, checkins, seed)
+    msg_habits = click.style(str(habits), fg="green")
+    msg_count = click.style(str(count), fg="green")
+    click.echo(f"Added {msg_habits} habits with {msg_count} activities.")
+
+
+def generate(habits, years, checkins=3, seed=0):
+    """Add habits with random activities for benchmarks and testing.
+
+    Habits have a mix of check-in intervals and minimize goals. Each day has
+    up to `checkins` activities for a habit. Some days have no activity.
+
+    Args:
+    ----
+        habits (int): Number of habits.
+        years (int): Years of activity history.
+        checkins (int): Maximum number of check-ins for a habit in a day.
+        seed (int): Seed for random data.
+
+    Returns:
+    -------
+        Number of activities added.
+
+    """
+    rng = random.Random(seed)
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    days = years * 365
+    start_date = (today - timedelta(days=days - 1)).date()
+
+    def get_activities(habit):
+        for day in range(days):
+            update_date = today - timedelta(days=day)
+            for _ in range(rng.randint(0, checkins)):
+                yield {
+                    "for_habit": habit.id,
+                    "quantum": float(rng.randint(1, 10)),
+                    "update_date": update_date
+                    + timedelta(seconds=rng.randrange(24 * 3600)),
+                }
+
+    count = 0
+    with models.db.atomic():
+        for i in range(habits):
+            habit = models.Habit.add(
+                name=f"habit {i}",
+                created_date=start_date,
+                start_date=start_date,
+                quantum=float(rng.randint(1, 10)),
+                units="units",
+                frequency=rng.choice([1, 1, 1, 2, 7]),
+                minimize=rng.random() < 0.25,
+                magica="",
+            )
+            added, _ = models.Activity.add_many(get_activities(habit))
+            models.Summary.update_streak(habit)
+            count += added
+    return count
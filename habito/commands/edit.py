@@ -39,7 +39,12 @@ def edit(id, name, quantum):
         raise SystemExit(1)
     habit.name = name.strip() if name else habit.name
     habit.quantum = quantum or habit.quantum
-    habit.save()
+    with models.db.atomic():
+        habit.save()
+
+        # Goal decides the streak, recompute it for the new quantum
+        if quantum:
+            models.Summary.update_streak(habit)
 
     msg_id = click.style(str(habit.id), fg="green")
     msg_name = click.style(habit.name, fg="green")
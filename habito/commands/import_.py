@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""Habito import command."""
+import csv
+import json
+from datetime import datetime
+
+import click
+
+from habito import models
+
+EXAMPLES = """
+    Each record has the habit name or id, date and quantum of an activity.
+    CSV files must have a `habit,date,quantum` header. Dates are in ISO format.
+
+    Examples:
+
+    \b
+    habito import activities.csv
+    habito import activities.jsonl
+    cat activities.csv | habito import - --format csv
+"""
+
+
+@click.command("import", epilog=EXAMPLES)
+@click.argument("file", type=click.File("r"))
+@click.option(
+    "-f",
+    "--format",
+    type=click.Choice(["csv", "jsonl"], case_sensitive=False),
+    help="Format of the records. Default is inferred from the file extension.",
+)
+def import_(file, format):
+    """Import activities from a CSV or JSON Lines FILE."""
+    if format is None:
+        format = "jsonl" if file.name.endswith((".jsonl", ".ndjson")) else "csv"
+    reader = _read_csv if format == "csv" else _read_jsonl
+
+    # Insert all the records in one transaction. A bad record leaves the
+    # database unchanged.
+    with models.db.atomic():
+        count, habit_ids = models.Activity.add_many(_get_activities(reader(file)))
+        models.Summary.update_all_streaks(list(habit_ids))
+
+    msg_count = click.style(str(count), fg="green")
+    msg_habits = click.style(str(len(habit_ids)), fg="green")
+    click.echo(f"Imported {msg_count} activities for {msg_habits} habits.")
+
+
+def _read_csv(file):
+    for line, record in enumerate(csv.DictReader(file), start=2):
+        yield line, record
+
+
+def _read_jsonl(file):
+    for line, text in enumerate(file, start=1):
+        if text.strip() == "":
+            continue
+        try:
+            yield line, json.loads(text)
+        except json.JSONDecodeError:
+            _fail(line, "invalid JSON.")
+
+
+def _get_activities(records):
+    habits = {}
+    for line, record in records:
+        try:
+            key = str(record["habit"]).strip()
+            quantum = float(record["quantum"])
+            update_date = datetime.fromisoformat(str(record["date"]).strip())
+        except KeyError as e:
+            _fail(line, f"missing field {e}.")
+        except (TypeError, ValueError) as e:
+            _fail(line, f"{e}.")
+
+        if key not in habits:
+            habits[key] = _find_habit(line, key)
+        yield {
+            "for_habit": habits[key],
+            "quantum": quantum,
+            "update_date": update_date,
+        }
+
+
+def _find_habit(line, key):
+    # Same as checkin: match the name for active habits. Numbers are ids.
+    if key.isdigit():
+        habits = models.Habit.all_active().where(models.Habit.id == int(key))
+    else:
+        habits = models.Habit.find(key)
+    matches = [h.id for h in habits]
+    if len(matches) != 1:
+        reason = "No habit" if len(matches) == 0 else "More than one habits"
+        _fail(line, f"{reason} matched the name '{key}'.")
+    return matches[0]
+
+
+def _fail(line, error):
+    click.secho(f"Line {line}: {error} No activities were imported.", fg="red")
+    raise SystemExit(1)
@@ -1,13 +1,18 @@
 # -*- coding: utf-8 -*-
 """List all habits."""
+import contextlib
+import itertools
 import logging
-import shutil
 import os
+import shutil
+import sys
 from datetime import datetime, timedelta
-from typing import Literal, List, Tuple, Union
+from typing import Literal, TextIO, Union
 
 import click
 
+from habito import cache as output_cache
+from habito import dates, telemetry
 from habito import models as models
 
 TICK = "\u25A0"  # tick - 2713, black square - 25A0, 25AA, 25AF
@@ -39,107 +44,158 @@ logger = logging.getLogger("habito")
         "from the terminal width."
     ),
 )
+@click.option(
+    "-o",
+    "--output",
+    type=click.File("w"),
+    default="-",
+    help="Write the csv report to a file. Default is stdout.",
+)
+@click.option(
+    "--no-cache",
+    "no_cache",
+    is_flag=True,
+    help="Read the habits from the database even if the output is cached.",
+)
 def list(
     long_list: bool,
     format: Union[Literal["csv"], Literal["table"]] = "table",
     duration="1 week",
+    output: TextIO = sys.stdout,
+    no_cache: bool = False,
 ):
     """List all tracked habits."""
     nr_of_dates = _get_max_duration(format, duration)
+    cache = None
+    if not no_cache and nr_of_dates > 0:
+        cache = _get_cache(format, long_list, nr_of_dates)
     if format == "csv":
-        _show_csv(nr_of_dates)
+        _show_csv(nr_of_dates, output, cache)
         return
 
-    _show_table(nr_of_dates, long_list)
+    _show_table(nr_of_dates, long_list, cache)
+
+
+def _get_cache(format: str, long_list: bool, nr_of_dates: int):
+    """Get the cache for the output. Output is not cached for in memory databases."""
+    database = models.db.database
+    if database == ":memory:":
+        return None
+
+    # Table is wrapped to the terminal width
+    width = shutil.get_terminal_size().columns
+    key = (os.path.abspath(database), format, long_list, nr_of_dates, width)
+    return output_cache.OutputCache("list", models.get_change_marker(), key)
+
+
+def _get_cached(cache):
+    if cache is None:
+        return None
+    with telemetry.phase("cache"):
+        return cache.get()
+
+
+def _open_cache(cache):
+    return cache.open() if cache else contextlib.nullcontext()
 
 
-def _show_csv(nr_of_dates: int):
+def _show_csv(nr_of_dates: int, output: TextIO, cache=None):
     """List habits in csv format grouped by day."""
     if nr_of_dates < 1:
         click.echo("Invalid duration. Try `1 week`, `30 days` or `2 months`.")
         raise SystemExit(1)
 
-    data: List[Tuple[int, float, str]] = []
-    data.append((0, 0, f"id,name,goal,units,date,activity{os.linesep}"))
-    for habit_data in models.get_daily_activities(nr_of_dates):
-        habit = habit_data[0]
-        for activity in habit_data[1]:
-            for_date = datetime.today() - timedelta(days=activity[0])
-            data.append(
-                (
-                    habit.id,
-                    for_date.timestamp(),
-                    (
-                        f"{habit.id},{habit.name},{habit.quantum},{habit.units}"
-                        f",{for_date.date()},{activity[1] or 0.0}"
-                        f"{os.linesep}"
-                    ),
-                )
-            )
-    data.sort(key=lambda t: t[1])
-    click.echo_via_pager(map(lambda d: d[2], data))
-
-
-def _show_table(nr_of_dates: int, long_list: bool):
-    """List habits in tabular format grouped by day."""
-    from textwrap import wrap
-    from terminaltables import SingleTable
+    cached = _get_cached(cache)
+    if cached:
+        with telemetry.phase("render"), open(cached, encoding="utf-8") as f:
+            shutil.copyfileobj(f, output)
+        return
+
+    # Rows are ordered by date and habit in the query. Write them as they
+    # arrive instead of holding the report in memory.
+    # Rows are read while they are written, fetch is a part of render.
+    with telemetry.phase("render"), _open_cache(cache) as cache_file:
+        rows = models.get_daily_activity_rows(nr_of_dates)
+        lines = ("{},{},{},{},{},{}\n".format(*row) for row in rows)
+        for line in itertools.chain(["id,name,goal,units,date,activity\n"], lines):
+            output.write(line)
+            if cache_file:
+                cache_file.write(line)
 
+
+def _show_table(nr_of_dates: int, long_list: bool, cache=None):
+    """List habits in tabular format grouped by day."""
     if nr_of_dates < 1:
         click.echo(
             "Your terminal window is too small. Please make it wider and try again"
         )
         raise SystemExit(1)
 
-    table_title = ["Habit", "Goal", "Streak"]
-    minimal = not long_list
-    if minimal:
-        table_title.append("Activities")
-    else:
-        for d in range(0, nr_of_dates):
-            date_mod = datetime.today() - timedelta(days=d)
-            table_title.append("{0}/{1}".format(date_mod.month, date_mod.day))
-
-    table_rows = [table_title]
-    for habit_data in models.get_daily_activities(nr_of_dates):
-        habit = habit_data[0]
-        habit_row = [str(habit.id) + ": " + habit.name, str(habit.quantum)]
-        progress = ""
-        for daily_data in habit_data[1]:
-            column_text = CROSS
-            quanta = daily_data[1]
-
-            if quanta is not None:
-                column_text = click.style(PARTIAL)
-                if quanta >= habit.quantum:
-                    column_text = click.style(TICK, fg="green")
-            if minimal:
-                progress += column_text + " "
-            else:
-                habit_row.append(quanta)
+    cached = _get_cached(cache)
+    if cached:
+        with telemetry.phase("render"), open(cached, encoding="utf-8") as f:
+            click.echo(f.read())
+        return
+
+    with telemetry.phase("import"):
+        from textwrap import wrap
+        from terminaltables import SingleTable
+
+    with telemetry.phase("fetch"):
+        daily_activities = models.get_daily_activities(nr_of_dates)
+
+    with telemetry.phase("compute"):
+        table_title = ["Habit", "Goal", "Streak"]
+        minimal = not long_list
         if minimal:
-            habit_row.append(progress)
+            table_title.append("Activities")
+        else:
+            for d in range(0, nr_of_dates):
+                date_mod = datetime.today() - timedelta(days=d)
+                table_title.append("{0}/{1}".format(date_mod.month, date_mod.day))
+
+        table_rows = [table_title]
+        for habit_data in daily_activities:
+            habit = habit_data[0]
+            habit_row = [str(habit.id) + ": " + habit.name, str(habit.quantum)]
+            progress = ""
+            for daily_data in habit_data[1]:
+                column_text = CROSS
+                quanta = daily_data[1]
+
+                if quanta is not None:
+                    column_text = click.style(PARTIAL)
+                    if quanta >= habit.quantum:
+                        column_text = click.style(TICK, fg="green")
+                if minimal:
+                    progress += column_text + " "
+                else:
+                    habit_row.append(quanta)
+            if minimal:
+                habit_row.append(progress)
 
-        current_streak = habit.summary.get().get_streak()
-        habit_row.insert(2, current_streak)
-        table_rows.append(habit_row)
+            current_streak = models.Summary.format_streak(habit.streak)
+            habit_row.insert(2, current_streak)
+            table_rows.append(habit_row)
 
-    table = SingleTable(table_rows)
+        table = SingleTable(table_rows)
 
-    max_col_width = table.column_max_width(0)
-    max_col_width = max_col_width if max_col_width > 0 else 20
+        max_col_width = table.column_max_width(0)
+        max_col_width = max_col_width if max_col_width > 0 else 20
 
-    for r in table_rows:
-        r[0] = "\n".join(wrap(r[0], max_col_width))
+        for r in table_rows:
+            r[0] = "\n".join(wrap(r[0], max_col_width))
 
-    click.echo(table.table)
+    with telemetry.phase("render"), _open_cache(cache) as cache_file:
+        text = table.table
+        if cache_file:
+            cache_file.write(text)
+        click.echo(text)
 
 
 def _get_max_duration(format: str, duration: str) -> int:
     if format != "table":
-        import dateparser
-
-        from_date = dateparser.parse(duration)
+        from_date = dates.parse(duration)
         if from_date is None:
             logger.debug(f"list: Cannot parse from date. Input duration = {duration}.")
             return -1
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""Habito performance commands."""
+
+import click
+
+from habito import telemetry
+
+EXAMPLES = """
+    Set HABITO_TELEMETRY=1 to record the time and peak memory of the phases of
+    every command.
+
+    Examples:
+
+    \b
+    HABITO_TELEMETRY=1 habito list
+    habito perf report --last 50 --command list
+"""
+
+
+@click.group()
+def perf():
+    """Report the performance of habito commands."""
+
+
+@perf.command(epilog=EXAMPLES)
+@click.option(
+    "--last",
+    "-n",
+    type=click.IntRange(min=1),
+    default=100,
+    help="Number of recent commands to report. Default: 100.",
+)
+@click.option("--command", "-c", help="Report only the command. Default: all.")
+def report(last, command):
+    """Show percentiles of the phase times of recent commands."""
+    from terminaltables import SingleTable
+
+    records = telemetry.read_records(telemetry.get_path())
+    if command:
+        records = [r for r in records if r["command"] == command]
+    records = records[-last:]
+    if not records:
+        click.echo(f"No telemetry recorded. Set {telemetry.ENV}=1 to record it.")
+        return
+
+    rows = [["Command", "Phase", "Runs", "p50 ms", "p90 ms", "p99 ms", "Peak KiB"]]
+    for name, phases in telemetry.summarize(records).items():
+        for phase, (runs, times, peak) in phases.items():
+            rows.append(
+                [name, phase, runs] + [f"{t:.1f}" for t in times] + [f"{peak:.0f}"]
+            )
+    click.echo(SingleTable(rows, title=f"Last {len(records)} commands").table)
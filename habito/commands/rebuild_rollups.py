@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+"""Habito rebuild-rollups command."""
+import click
+
+from habito import models
+
+
+@click.command("rebuild-rollups")
+def rebuild_rollups():
+    """Regenerate daily totals of all habits from activities."""
+    count = models.DailyTotal.rebuild()
+    msg_count = click.style(str(count), fg="green")
+    click.echo(f"Rebuilt {msg_count} daily totals from activities.")
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+"""Habito recompute command."""
+import click
+
+from habito import models
+
+
+@click.command()
+def recompute():
+    """Recompute the streaks of all habits from daily totals."""
+    count = models.write(models.Summary.update_all_streaks)
+    msg_count = click.style(str(count), fg="green")
+    click.echo(f"Recomputed streaks of {msg_count} habits.")
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""Habito serve command."""
+import signal
+import sys
+
+import click
+
+from habito import daemon
+
+EXAMPLES = """
+    `habito list` and `habito checkin NAME -q QUANTUM` are run by the server
+    if it is running. Other commands run in their own process.
+
+    Examples:
+
+    \b
+    habito serve &
+    habito checkin running -q 3
+"""
+
+
+@click.command(epilog=EXAMPLES)
+@click.option(
+    "--socket",
+    "path",
+    type=click.Path(dir_okay=False),
+    envvar=daemon.SOCKET_ENV,
+    help=(
+        "Path of the Unix socket. HABITO_SOCKET environment variable sets it for"
+        " the clients too. Default: habito.sock in the app directory."
+    ),
+)
+def serve(path):
+    """Keep habito running to serve list and checkin."""
+    path = path or daemon.get_socket_path()
+
+    # Stop the server cleanly on SIGTERM and remove the socket
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    def ready(server):
+        click.echo(f"Serving habito on {path}. Press Ctrl+C to stop.")
+
+    try:
+        daemon.serve(path, ready)
+    except RuntimeError as e:
+        click.secho(str(e), fg="red")
+        raise SystemExit(1)
+    except KeyboardInterrupt:
+        click.echo("Stopped.")
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""Habito stats command."""
+import click
+
+from habito import models
+
+EXAMPLES = """
+    A slot is the check-in interval of a habit. Completion is the ratio of
+    slots with goal met. Streaks are the runs of slots with goal met. Averages
+    are per day.
+"""
+
+
+@click.command(epilog=EXAMPLES)
+def stats():
+    """Show statistics of all habits since their start date."""
+    from terminaltables import SingleTable
+
+    from habito import analytics
+
+    habit_stats = analytics.get_stats()
+    if not habit_stats:
+        click.echo("No habits to show statistics. Try `habito add`?")
+        return
+
+    summary_rows = [
+        [
+            "Habit",
+            "Goal",
+            "Completion",
+            "7-day avg",
+            "30-day avg",
+            "Streak",
+            "Best streak",
+        ]
+    ]
+    weekday_rows = [["Habit"] + analytics.WEEKDAYS]
+    for s in habit_stats:
+        habit = s.habit
+        name = f"{habit.id}: {habit.name}"
+        minimize = "<" if habit.minimize else ""
+        summary_rows.append(
+            [
+                name,
+                f"{minimize}{habit.quantum}",
+                f"{s.completion_rate:.0%}",
+                f"{s.average_7:.2f}",
+                f"{s.average_30:.2f}",
+                models.Summary.format_streak(s.current_streak),
+                models.Summary.format_streak(s.best_streak),
+            ]
+        )
+        weekday_rows.append([name] + [f"{total:g}" for total in s.weekdays])
+
+    click.echo(SingleTable(summary_rows).table)
+    click.echo(SingleTable(weekday_rows, title="Activity by weekday").table)
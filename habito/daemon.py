@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""Resident habito server and its client over a Unix socket.
+
+`habito serve` sets up the database once and keeps the connection, the page
+cache of SQLite and the imported command modules in memory. The command line
+forwards `list` and `checkin` to the server if its socket is available, and
+runs them in process otherwise.
+
+A request is a JSON object with the command line arguments, the working
+directory and the terminal width. The response is a JSON object with the exit
+code and the output. One request is served for each connection, one at a time.
+"""
+
+import json
+import os
+import shutil
+import socket
+import socketserver
+
+import click
+
+SOCKET_NAME = "habito.sock"
+SOCKET_ENV = "HABITO_SOCKET"
+
+# Seconds to wait for the server to accept a connection, and to run a command
+CONNECT_TIMEOUT = 1
+READ_TIMEOUT = 30
+
+
+def get_socket_path():
+    """Get the path of the server socket.
+
+    Default is `habito.sock` in the app directory. `HABITO_SOCKET` environment
+    variable overrides it.
+    """
+    default = os.path.join(click.get_app_dir("habito"), SOCKET_NAME)
+    return os.environ.get(SOCKET_ENV) or default
+
+
+def is_supported():
+    """Check if the platform has Unix sockets to serve habito."""
+    return hasattr(socket, "AF_UNIX")
+
+
+def forward(path, args):
+    """Run the command in the server.
+
+    Args:
+    ----
+        path (str): Path of the server socket.
+        args (list): Command line arguments, starting with the command name.
+
+    Returns:
+    -------
+        Response with `exit_code`, `stdout` and `stderr`, or None if the server
+        is not running, or doesn't respond in time with a valid response.
+
+    """
+    if not is_supported():
+        return None
+
+    request = {
+        "args": args,
+        "cwd": os.getcwd(),
+        "columns": shutil.get_terminal_size().columns,
+    }
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with client:
+        try:
+            client.settimeout(CONNECT_TIMEOUT)
+            client.connect(path)
+            client.settimeout(READ_TIMEOUT)
+            with client.makefile("rwb") as stream:
+                stream.write(json.dumps(request).encode("utf-8") + b"\n")
+                stream.flush()
+                line = stream.readline()
+            return json.loads(line) if line else None
+        except (OSError, ValueError):
+            return None
+
+
+def serve(path, ready=None):
+    """Serve the commands on a Unix socket till interrupted.
+
+    Database must be set up before serving.
+
+    Args:
+    ----
+        path (str): Path of the server socket.
+        ready (callable): Called with the server when it accepts requests.
+
+    Raises:
+    ------
+        RuntimeError if the platform has no Unix sockets, or another server is
+        running on the socket.
+
+    """
+    if not is_supported():
+        raise RuntimeError("habito serve is not supported on this platform.")
+    if is_serving(path):
+        raise RuntimeError(f"habito is already served on {path}.")
+    if os.path.exists(path):
+        # Stale socket of a server which didn't exit cleanly
+        os.unlink(path)
+
+    _warm_up()
+    server = socketserver.UnixStreamServer(path, _Handler)
+    try:
+        os.chmod(path, 0o600)
+        if ready:
+            ready(server)
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.unlink(path)
+
+
+def is_serving(path):
+    """Check if a server accepts connections on the socket."""
+    if not is_supported() or not os.path.exists(path):
+        return False
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with client:
+        try:
+            client.connect(path)
+        except OSError:
+            return False
+    return True
+
+
+def run_command(args, cwd, columns):
+    """Run a command in the server.
+
+    The command runs without the `cli` group, which sets up the database for
+    every command line invocation.
+
+    Returns
+    -------
+        Response with `exit_code`, `stdout` and `stderr`.
+
+    """
+    import io
+    from contextlib import redirect_stderr, redirect_stdout
+
+    from habito.commands import cli
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    command = cli.get_command(None, args[0])
+    previous = (os.getcwd(), os.environ.get("COLUMNS"))
+    os.chdir(cwd)
+    os.environ["COLUMNS"] = str(columns)
+    try:
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            exit_code = _main(command, args)
+    finally:
+        os.chdir(previous[0])
+        if previous[1] is None:
+            del os.environ["COLUMNS"]
+        else:
+            os.environ["COLUMNS"] = previous[1]
+    return {
+        "exit_code": exit_code,
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue(),
+    }
+
+
+def _main(command, args):
+    # Colors are kept in the output. The client strips them if it doesn't
+    # write to a terminal.
+    try:
+        result = command.main(
+            args[1:],
+            prog_name=f"habito {args[0]}",
+            standalone_mode=False,
+            color=True,
+        )
+        return result if isinstance(result, int) else 0
+    except click.ClickException as e:
+        e.show()
+        return e.exit_code
+    except click.Abort:
+        click.echo("Aborted!", err=True)
+        return 1
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else int(e.code is not None)
+
+
+def _warm_up():
+    # Import the commands, and read the habits, streaks and recent daily
+    # totals into the page cache of the connection
+    from habito import models
+    from habito.commands import FORWARDED, cli
+
+    for name in FORWARDED:
+        cli.get_command(None, name)
+    import terminaltables  # noqa: F401
+
+    models.get_daily_activities(30)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            # Connection to check if the server is running
+            return
+        try:
+            request = json.loads(line)
+            response = run_command(request["args"], request["cwd"], request["columns"])
+        except Exception as e:
+            response = {"exit_code": 1, "stdout": "", "stderr": f"Error: {e}\n"}
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
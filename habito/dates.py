@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""Date parsing for habito commands."""
+
+import calendar
+import re
+from datetime import datetime, timedelta
+
+# Relative durations, e.g. `3 days ago`, `1 week` or `a month ago`
+_RELATIVE = re.compile(r"^(\d+|an?)\s+(day|week|month|year)s?(\s+ago)?$")
+
+# Month and day with an optional year, e.g. `10/24` or `10/24/2023`
+_MONTH_DAY = re.compile(r"^(\d{1,2})/(\d{1,2})(?:/(\d{4}))?$")
+
+
+def parse(text, now=None):
+    """Parse a date.
+
+    Common forms are parsed without `dateparser`: `today`, `yesterday`, ISO
+    dates, `mm/dd`, `mm/dd/yyyy` and durations like `3 days ago` or `1 week`.
+    A duration without `ago` is also in the past. `mm/dd` is in the past year
+    if the date is in future for this year. Other forms are parsed with
+    `dateparser` in English.
+
+    Args:
+    ----
+        text (str): Text to parse.
+        now (datetime): Base for the relative dates. Default: now.
+
+    Returns:
+    -------
+        A datetime or None if the text cannot be parsed.
+
+    """
+    now = now or datetime.now()
+    value = " ".join(text.strip().lower().split())
+    if value == "":
+        return None
+
+    date = _parse_common(value, now)
+    if date is not None:
+        return date
+
+    import dateparser
+
+    return dateparser.parse(text, languages=["en"], settings={"RELATIVE_BASE": now})
+
+
+def _parse_common(value, now):
+    if value in ("now", "today"):
+        return now
+    if value == "yesterday":
+        return now - timedelta(days=1)
+
+    match = _RELATIVE.match(value)
+    if match:
+        count, unit, _ = match.groups()
+        count = 1 if count in ("a", "an") else int(count)
+        try:
+            if unit == "day":
+                return now - timedelta(days=count)
+            if unit == "week":
+                return now - timedelta(weeks=count)
+            return _subtract_months(now, count * 12 if unit == "year" else count)
+        except (OverflowError, ValueError):
+            # Duration is before the first year of `datetime`
+            return None
+
+    match = _MONTH_DAY.match(value)
+    if match:
+        month, day, year = match.groups()
+        try:
+            date = datetime(int(year or now.year), int(month), int(day))
+        except ValueError:
+            return None
+        if year is None and date > now:
+            date = date.replace(year=date.year - 1)
+        return date
+
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _subtract_months(date, months):
+    month = date.month - 1 - months
+    year = date.year + month // 12
+    month = month % 12 + 1
+    day = min(date.day, calendar.monthrange(year, month)[1])
+    return date.replace(year=year, month=month, day=day)
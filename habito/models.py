@@ -2,27 +2,210 @@
 """Models for habito."""
 
 import logging
-from datetime import datetime, timedelta
+import os
+import random
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from itertools import groupby
+from operator import itemgetter
 from peewee import *  # noqa
-from playhouse import reflection
 from playhouse.sqlite_ext import SqliteExtDatabase
-from playhouse.migrate import SqliteMigrator, migrate
 
-DB_VERSION = 3
+DB_VERSION = 10
 db = SqliteExtDatabase(None, pragmas=(("foreign_keys", "on"),), regexp_function=True)
 logger = logging.getLogger("habito.models")
 
+# SQLite settings for the database profiles. `default` syncs on every commit,
+# and keeps the journal mode saved in the database file. It doesn't switch a
+# database in use by `habito serve` or `habito api` with `wal` back to the
+# rollback journal. `wal` uses write-ahead log with sync only at checkpoints.
+# `fast` also caches more pages in memory.
+PROFILES = {
+    "default": (("synchronous", "full"),),
+    "wal": (
+        ("journal_mode", "wal"),
+        ("synchronous", "normal"),
+        ("busy_timeout", 5000),
+    ),
+    "fast": (
+        ("journal_mode", "wal"),
+        ("synchronous", "normal"),
+        ("busy_timeout", 5000),
+        ("mmap_size", 256 * 1024 * 1024),
+        ("cache_size", -64 * 1024),
+        ("temp_store", "memory"),
+    ),
+}
+PROFILE_ENV = "HABITO_DB_PROFILE"
+
+# Tables shown by `habito list`. Every write to them bumps the change marker
+# in the config with a trigger. Triggers are paused by the `change_pause`
+# setting in the bulk writes, which bump the marker once.
+CHANGE_TABLES = ("habit", "summary", "dailytotal")
+CHANGE_KEY = "change"
+CHANGE_PAUSE_KEY = "change_pause"
+BUMP_CHANGE_SQL = f"UPDATE config SET value = value + 1 WHERE name = '{CHANGE_KEY}'"
+
+# Summaries in an UPDATE statement of a bulk update. Each one adds a few SQL
+# variables to the statement.
+BULK_UPDATE_BATCH = 500
+
+# Activity dates are stored as local days since this date
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Indexes of the activities with text dates, before migration #10
+ACTIVITY_INDEXES_4 = {
+    "activity_for_habit_id_update_date": '"for_habit_id", "update_date"',
+    "activity_update_date": '"update_date"',
+}
+
+# Rows in a transaction of a data migration. A checkpoint is saved in the
+# config after each batch, and an interrupted migration resumes from it.
+MIGRATION_BATCH = 100000
+
+# Attempts and the initial backoff in seconds for a write to a locked database.
+# SQLite waits for the busy timeout of the connection before each attempt fails.
+WRITE_ATTEMPTS = 5
+WRITE_BACKOFF = 0.05
+
+
+def setup(name, profile=None, progress=None):
+    """Set up the database.
 
-def setup(name):
-    """Set up the database."""
+    Args:
+    ----
+        name (str): Path of the database.
+        profile (str): Name of the database profile. Default: value of the
+        `HABITO_DB_PROFILE` environment variable, the `db_profile` setting in
+        the database or `default`.
+        progress (callable): Called with the migration version, rows done and
+        total rows after each batch of a data migration.
+
+    """
     db.init(name)
     db.connect()
-    Migration(db).execute()
+    Migration(db, progress).execute()
+    set_profile(profile or get_profile())
+
+
+def get_profile():
+    """Get the name of the database profile for the connections.
+
+    Returns
+    -------
+        Value of the `HABITO_DB_PROFILE` environment variable, the `db_profile`
+        setting in the database or `default`.
+
+    """
+    return os.environ.get(PROFILE_ENV) or Config.get_value("db_profile", "default")
+
+
+def set_profile(profile):
+    """Apply the SQLite settings of a database profile.
+
+    Args:
+    ----
+        profile (str): Name of the profile. See `PROFILES`.
+
+    """
+    if profile not in PROFILES:
+        profiles = ", ".join(sorted(PROFILES))
+        raise ValueError(f"Unknown database profile '{profile}'. Try {profiles}.")
+    for key, value in PROFILES[profile]:
+        db.pragma(key, value)
+    logger.debug(f"Database profile: {profile}.")
+
+
+def get_local_day(value):
+    """Get the local day number of a date or a date time.
+
+    Args:
+    ----
+        value (datetime): Local date or date time.
+
+    Returns:
+    -------
+        Number of days since 1970-01-01 (int).
+
+    """
+    day = value.date() if isinstance(value, datetime) else value
+    return day.toordinal() - EPOCH_ORDINAL
+
+
+def get_change_marker():
+    """Get the change marker of the habits, streaks and daily totals.
+
+    The marker changes on every insert, update or delete of the habits,
+    summaries and daily totals in any process.
+
+    Returns
+    -------
+        Change marker (str).
+
+    """
+    return Config.get_value(CHANGE_KEY, "0")
+
+
+@contextmanager
+def bulk_change():
+    """Bump the change marker once for the writes in a block.
+
+    Triggers bump the marker for each row of a write. They are paused in the
+    transaction of the block, so other connections never see the pause. Inner
+    blocks leave the bump to the outermost block.
+    """
+    with db.atomic():
+        paused = Config.get_value(CHANGE_PAUSE_KEY) is not None
+        if not paused:
+            Config.set_value(CHANGE_PAUSE_KEY, "1")
+        yield
+        if not paused:
+            Config.delete().where(Config.name == CHANGE_PAUSE_KEY).execute()
+            db.execute_sql(BUMP_CHANGE_SQL)
+
+
+def write(func, *args, **kwargs):
+    """Run a function in a write transaction. Retry if the database is locked.
+
+    The transaction takes the write lock as it begins (`BEGIN IMMEDIATE`).
+    Concurrent writers wait for each other, and the reads in the transaction
+    see the latest data. A locked database is retried with exponential backoff
+    for `WRITE_ATTEMPTS` times. Inside another transaction, `func` runs in a
+    savepoint without retries.
+
+    Args:
+    ----
+        func (callable): Function which reads and writes the database.
+        args: Arguments for `func`.
+        kwargs: Keyword arguments for `func`.
+
+    Returns:
+    -------
+        Return value of `func`.
+
+    """
+    if db.in_transaction():
+        with db.atomic():
+            return func(*args, **kwargs)
+
+    for attempt in range(1, WRITE_ATTEMPTS + 1):
+        try:
+            with db.atomic(lock_type="IMMEDIATE"):
+                return func(*args, **kwargs)
+        except OperationalError as e:
+            if "locked" not in str(e) or attempt == WRITE_ATTEMPTS:
+                raise
+            delay = WRITE_BACKOFF * 2 ** (attempt - 1) * random.uniform(1, 2)
+            logger.debug(f"Database is locked. Retry #{attempt} in {delay:.3f}s.")
+            time.sleep(delay)
 
 
 def get_activities(days):
     """Get activities of habits for specified days.
 
+    Days are the local dates till today, same as `get_daily_activities`.
+
     Args:
     ----
         days (int): Number of days of activities to fetch.
@@ -35,12 +218,12 @@ def get_activities(days):
     if days < 0:
         raise ValueError("Days should be a positive integer.")
 
-    from_date = datetime.now() - timedelta(days=days)
+    from_day = get_local_day(datetime.now()) - days
     habits = Habit.all_active()
     activities = (
         Activity.select()
-        .where(Activity.update_date > from_date)
-        .order_by(Activity.update_date.desc())
+        .where(Activity.local_day > from_day)
+        .order_by(Activity.update_date.desc(), Activity.id)
     )
 
     habits_with_activities = prefetch(habits, activities)
@@ -57,47 +240,101 @@ def get_daily_activities(days):
     Returns:
     -------
         Tuple of habit and list of daily activities. Daily activities are the
-        sum of all activities for the habit for the day.
+        sum of all activities for the habit for the day. Current streak of the
+        habit is available as `habit.streak`.
 
         E.g. [(habit, [(day1, activity), (day2, activity)..]), ..]
 
     """
-    habits_with_activities = get_activities(days)
-    daily_habits = []
-    for habit in habits_with_activities:
-        habit_data = []
-
-        activity_index = 0
-        activities = habit.activities
-        for day in range(0, days):
-            quanta = 0.0
-            if activity_index < len(activities):
-                a = activities[activity_index]
-            else:
-                a = None
-
-            # Assumes the data is sorted by date
-            for_date = datetime.today() - timedelta(days=day)
-            if a is None or a.update_date.date() != for_date.date():
-                # We didn't find any data for the day
-                quanta = None
-            else:
-                # Sum all activities for a day
-                while a.update_date.date() == for_date.date():
-                    quanta += a.quantum
-                    activity_index += 1
-                    if activity_index >= len(activities):
-                        break
-                    a = activities[activity_index]
-
-            # Save the data for day
-            habit_data.append((day, quanta))
+    if days < 0:
+        raise ValueError("Days should be a positive integer.")
 
+    # Daily totals are maintained on every check-in. Read the totals for the
+    # requested days as plain tuples and merge them with a calendar of days.
+    # Days are compared as ISO strings to skip parsing the dates of each row.
+    today = datetime.now().date()
+    calendar = [(today - timedelta(days=d)).isoformat() for d in range(days)]
+    totals = (
+        DailyTotal.select(
+            DailyTotal.for_habit, DailyTotal.day.cast("TEXT"), DailyTotal.total_quantum
+        )
+        .join(Habit)
+        .where(Habit.active & (DailyTotal.day > (today - timedelta(days=days))))
+        .tuples()
+    )
+    quanta = {(habit_id, day): total for habit_id, day, total in totals}
+
+    # Read the streaks with the habits. A habit without summary has no streak.
+    habits = (
+        Habit.select(Habit, fn.COALESCE(Summary.streak, 0).alias("streak"))
+        .join(Summary, JOIN.LEFT_OUTER)
+        .where(Habit.active)
+        .order_by(Habit.id)
+        .objects()
+    )
+
+    daily_habits = []
+    for habit in habits:
+        habit_data = [
+            (d, quanta.get((habit.id, day))) for d, day in enumerate(calendar)
+        ]
         daily_habits.append((habit, habit_data))
 
     return daily_habits
 
 
+def get_daily_activity_rows(days):
+    """Get rows of daily activities for all habits ordered by date.
+
+    Rows are streamed from the database. A calendar of the days is joined with
+    the daily totals of the habits.
+
+    Args:
+    ----
+        days (int): Number of days of activities to fetch.
+
+    Returns:
+    -------
+        Iterator of tuples ordered by date and habit id. Date is an ISO format
+        string and activity is zero for the days without activity.
+
+        E.g. (habit id, name, goal, units, date, activity)
+
+    """
+    if days < 0:
+        raise ValueError("Days should be a positive integer.")
+
+    from_date = datetime.now().date() - timedelta(days=days - 1)
+    base = Select(
+        columns=(Value(from_date.isoformat()).alias("day"), Value(1).alias("n"))
+    ).cte("calendar", recursive=True, columns=("day", "n"))
+    term = (
+        Select(columns=(fn.date(base.c.day, "+1 day"), base.c.n + 1))
+        .from_(base)
+        .where(base.c.n < days)
+    )
+    calendar = base.union_all(term)
+
+    total_quantum = fn.COALESCE(DailyTotal.total_quantum, 0.0)
+    on_day = (DailyTotal.for_habit == Habit.id) & (DailyTotal.day == calendar.c.day)
+    query = (
+        Habit.select(
+            Habit.id,
+            Habit.name,
+            Habit.quantum,
+            Habit.units,
+            calendar.c.day,
+            total_quantum,
+        )
+        .from_(calendar, Habit)
+        .join(DailyTotal, JOIN.LEFT_OUTER, on=on_day)
+        .where(Habit.active)
+        .order_by(calendar.c.day, Habit.id)
+        .with_cte(calendar)
+    )
+    return query.tuples().iterator()
+
+
 class BaseModel(Model):
     """Base model class for Habito."""
 
@@ -120,6 +357,35 @@ class Config(BaseModel):
     name = CharField(unique=True)
     value = CharField()
 
+    @classmethod
+    def get_value(cls, name, default=None):
+        """Get the value of a setting.
+
+        Args:
+        ----
+            name (str): Name of the setting.
+            default (str): Value if the setting doesn't exist.
+
+        Returns:
+        -------
+            Value of the setting.
+
+        """
+        setting = cls.get_or_none(cls.name == name)
+        return default if setting is None else setting.value
+
+    @classmethod
+    def set_value(cls, name, value):
+        """Add or update a setting.
+
+        Args:
+        ----
+            name (str): Name of the setting.
+            value (str): Value of the setting.
+
+        """
+        cls.insert(name=name, value=value).on_conflict("replace").execute()
+
 
 class Habit(BaseModel):
     """Represents a single habit.
@@ -136,6 +402,7 @@ class Habit(BaseModel):
         minimize (bool): Treat quantum as upper bound if True. (Default: False)
         magica (str): Why is this habit interesting?
         active (bool): True if the habit is active
+        name_key (str): Lowercase name for the lookups by name.
 
     """
 
@@ -148,6 +415,12 @@ class Habit(BaseModel):
     minimize = BooleanField(default=False)
     magica = TextField()
     active = BooleanField(default=True)
+    name_key = CharField(default="", index=True)
+
+    def save(self, *args, **kwargs):
+        """Save the habit. Update the lowercase name for lookups."""
+        self.name_key = self.name.lower()
+        return super().save(*args, **kwargs)
 
     @classmethod
     def add(cls, **query):
@@ -177,6 +450,84 @@ class Habit(BaseModel):
         """
         return cls.select().where(Habit.active)
 
+    @classmethod
+    def find(cls, query, regex=False):
+        """Find active habits matching a name.
+
+        A name matches if it starts with the query ignoring case. The lookup
+        is a range scan of the lowercase name index. If a habit has exactly
+        the query as name, the other matches are skipped.
+
+        Args:
+        ----
+            query (str): Start of the habit name.
+            regex (bool): Treat the query as a regular expression to search in
+            the habit name. Every name is matched in Python. Default: False.
+
+        Returns:
+        -------
+            List of active habits with matching name.
+
+        """
+        habits = cls.all_active()
+        if regex:
+            return list(habits.where(cls.name.regexp(query)))
+
+        key = query.lower()
+        if key != "":
+            end = key[:-1] + chr(ord(key[-1]) + 1)
+            habits = habits.where((cls.name_key >= key) & (cls.name_key < end))
+        habits = list(habits.order_by(cls.id))
+        exact = [h for h in habits if h.name_key == key]
+        return exact or habits
+
+    def is_goal_met(self, quantum):
+        """Check if the goal of the habit is met.
+
+        Args:
+        ----
+            quantum (float): Total amount for a tracking interval.
+
+        Returns:
+        -------
+            True if the quantum meets the goal.
+
+        """
+        return quantum <= self.quantum if self.minimize else quantum >= self.quantum
+
+    def get_slot(self, day):
+        """Get the tracking interval (slot) for a day.
+
+        Days from the start date of the habit are divided into slots of
+        `frequency` days. Slot 0 starts at the start date.
+
+        Args:
+        ----
+            day (date): Date to find the slot for.
+
+        Returns:
+        -------
+            Index of the slot (int).
+
+        """
+        start_date = self.start_date or self.created_date
+        return (day - start_date).days // self.frequency
+
+    def get_slot_start(self, slot):
+        """Get the first day of a slot.
+
+        Args:
+        ----
+            slot (int): Index of the slot.
+
+        Returns:
+        -------
+            Start date of the slot.
+
+        """
+        start_date = self.start_date or self.created_date
+        return start_date + timedelta(days=slot * self.frequency)
+
 
 class Activity(BaseModel):
     """Updates for a Habit.
@@ -184,14 +535,268 @@ class Activity(BaseModel):
     Attributes
     ----------
         for_habit (int): Id of the Habit. Foreign key.
-        update_date (date): Date time of the update.
+        update_date (datetime): Date time of the update. Stored as an integer
+        timestamp in microseconds.
+        quantum (float): Amount for the habit.
+        local_day (int): Local date of the update as days since 1970-01-01.
+
+    """
+
+    for_habit = ForeignKeyField(Habit, backref="activities", index=False)
+    quantum = DoubleField()
+    update_date = TimestampField(resolution=6, index=True)
+    local_day = IntegerField(index=True)
+
+    class Meta:
+        """Meta class for the model.
+
+        Composite index on habit and local day serves the per habit day
+        queries. It also covers the lookups on `for_habit` alone. Index on
+        `local_day` serves the day range queries across the habits.
+        """
+
+        indexes = ((("for_habit", "local_day"), False),)
+
+    def save(self, *args, **kwargs):
+        """Save the activity. Update the local day of the date."""
+        self.local_day = get_local_day(self.update_date)
+        return super().save(*args, **kwargs)
+
+    @classmethod
+    def add(cls, for_habit, quantum, update_date=None):
+        """Add an activity and update the daily total for the habit.
+
+        Args:
+        ----
+            for_habit (Habit): Habit to update.
+            quantum (float): Amount for the habit.
+            update_date (datetime): Date time of the update. Default: now.
+
+        Returns:
+        -------
+            An Activity.
+
+        """
+        update_date = update_date or datetime.now()
+        with db.atomic():
+            activity = cls.create(
+                for_habit=for_habit, quantum=quantum, update_date=update_date
+            )
+            DailyTotal.record(for_habit, quantum, update_date)
+        return activity
+
+    @classmethod
+    def add_many(cls, activities, batch_size=100):
+        """Add activities in bulk and rebuild daily totals for their habits.
+
+        Activities are inserted with multi-row inserts of `batch_size` rows.
+        Caller must update the streaks of the habits.
+
+        Args:
+        ----
+            activities (iterable): Dicts with `for_habit`, `quantum` and
+            `update_date` of the activity.
+            batch_size (int): Number of activities in an insert.
+
+        Returns:
+        -------
+            Tuple of number of activities added and set of habit ids.
+
+        """
+        count = 0
+        habit_ids = set()
+        with bulk_change():
+            for batch in chunked(activities, batch_size):
+                batch = [
+                    {**a, "local_day": get_local_day(a["update_date"])} for a in batch
+                ]
+                cls.insert_many(batch).execute()
+                count += len(batch)
+                habit_ids.update(a["for_habit"] for a in batch)
+            if habit_ids:
+                DailyTotal.rebuild(list(habit_ids))
+        return count, habit_ids
+
+    @classmethod
+    def compact(cls, before, schema="main"):
+        """Fold the activities before a date to one activity per habit per day.
+
+        Activities of a day with more than one activity are moved to the
+        archive table in `schema` database. An activity with their total
+        quantum at the time of the last activity replaces them. Daily totals
+        and streaks don't change.
+
+        Args:
+        ----
+            before (datetime): Compact the activities before this time.
+            schema (str): Name of the database with the archive table. The
+            table is created if `schema` is an attached database.
+
+        Returns:
+        -------
+            Tuple of number of activities archived and activities added.
+
+        """
+        last_id = cls.select(fn.MAX(cls.id)).scalar()
+        if last_id is None:
+            return 0, 0
+
+        # Folded activities are added after `last_id`. Keep them out of the
+        # activities to archive and delete.
+        day = cls.local_day
+        old = (cls.id <= last_id) & (cls.update_date < before)
+        days = (
+            cls.select(cls.for_habit, day)
+            .where(old)
+            .group_by(cls.for_habit, day)
+            .having(fn.COUNT(cls.id) > 1)
+        )
+        compacted = old & Tuple(cls.for_habit, day).in_(days)
+
+        # Archive keeps the dates as text, e.g. `2024-02-01 10:00:00.000000`
+        resolution = Value(1000000, converter=False)
+        seconds = cls.update_date / resolution
+        microseconds = cls.update_date - seconds * resolution
+        update_date = fn.datetime(seconds, "unixepoch", "localtime").concat(
+            fn.printf(".%06d", microseconds)
+        )
+
+        table = ActivityArchive._meta.table_name
+        columns = ["activity_id", "for_habit_id", "quantum", "update_date"]
+        archive = Table(table, columns + ["archive_date"], schema=schema)
+        with bulk_change():
+            if schema != "main":
+                # Copy the columns of the archive table. Constraints on habits
+                # don't apply across databases.
+                db.execute_sql(
+                    f'CREATE TABLE IF NOT EXISTS "{schema}"."{table}" AS '
+                    f'SELECT * FROM "main"."{table}" WHERE 0'
+                )
+            archived = (
+                archive.insert(
+                    cls.select(
+                        cls.id,
+                        cls.for_habit,
+                        cls.quantum,
+                        update_date,
+                        Value(str(datetime.now())),
+                    ).where(compacted),
+                    columns=[getattr(archive, c) for c in archive._columns],
+                )
+                .as_rowcount()
+                .execute(db)
+            )
+            folded = (
+                cls.insert_from(
+                    cls.select(
+                        cls.for_habit, fn.SUM(cls.quantum), fn.MAX(cls.update_date), day
+                    )
+                    .where(compacted)
+                    .group_by(cls.for_habit, day),
+                    [cls.for_habit, cls.quantum, cls.update_date, cls.local_day],
+                )
+                .as_rowcount()
+                .execute()
+            )
+            cls.delete().where(compacted).execute()
+        return archived, folded
+
+
+class DailyTotal(BaseModel):
+    """Daily rollup of activities for a Habit.
+
+    Attributes
+    ----------
+        for_habit (int): Id of the Habit. Foreign key.
+        day (date): Date of the activities.
+        total_quantum (float): Sum of the quantum of activities for the day.
+        count (int): Number of activities for the day.
+
+    """
+
+    for_habit = ForeignKeyField(Habit, backref="daily_totals", index=False)
+    day = DateField()
+    total_quantum = DoubleField(default=0.0)
+    count = IntegerField(default=0)
+
+    class Meta:
+        """Meta class for the model."""
+
+        indexes = ((("for_habit", "day"), True),)
+
+    @classmethod
+    def record(cls, for_habit, quantum, update_date):
+        """Add an activity to the total of its day.
+
+        Args:
+        ----
+            for_habit (Habit): Habit to update.
+            quantum (float): Amount for the habit.
+            update_date (datetime): Date time of the activity.
+
+        """
+        day = update_date.date() if isinstance(update_date, datetime) else update_date
+        (
+            cls.insert(for_habit=for_habit, day=day, total_quantum=quantum, count=1)
+            .on_conflict(
+                conflict_target=[cls.for_habit, cls.day],
+                update={
+                    cls.total_quantum: cls.total_quantum + EXCLUDED.total_quantum,
+                    cls.count: cls.count + 1,
+                },
+            )
+            .execute()
+        )
+
+    @classmethod
+    def rebuild(cls, habits=None):
+        """Regenerate the daily totals from activities.
+
+        Args:
+        ----
+            habits (list): Habits to rebuild. Default: all habits.
+
+        Returns:
+        -------
+            Number of daily totals created.
+
+        """
+        day = fn.date(Activity.local_day * 86400, "unixepoch")
+        delete = cls.delete()
+        totals = Activity.select(
+            Activity.for_habit,
+            day,
+            fn.SUM(Activity.quantum),
+            fn.COUNT(Activity.id),
+        ).group_by(Activity.for_habit, Activity.local_day)
+        if habits is not None:
+            delete = delete.where(cls.for_habit.in_(habits))
+            totals = totals.where(Activity.for_habit.in_(habits))
+
+        with bulk_change():
+            delete.execute()
+            fields = [cls.for_habit, cls.day, cls.total_quantum, cls.count]
+            return cls.insert_from(totals, fields).as_rowcount().execute()
+
+
+class ActivityArchive(BaseModel):
+    """Activities moved out of the activity table by compaction.
+
+    Attributes
+    ----------
+        activity_id (int): Id of the activity.
+        for_habit (int): Id of the Habit. Foreign key.
         quantum (float): Amount for the habit.
+        update_date (datetime): Date time of the activity.
+        archive_date (datetime): Date time of the compaction.
 
     """
 
-    for_habit = ForeignKeyField(Habit, backref="activities", index=True)
+    activity_id = IntegerField(primary_key=True)
+    for_habit = ForeignKeyField(Habit, backref="archived_activities")
     quantum = DoubleField()
-    update_date = DateTimeField(default=datetime.now())
+    update_date = DateTimeField()
+    archive_date = DateTimeField()
 
 
 class Summary(BaseModel):
@@ -204,6 +809,9 @@ class Summary(BaseModel):
         target_date (date): Date for the target.
         streak (int): Current streak for a habit. Continuous activity
         constitutes a streak.
+        slot_start (date): Start date of the latest slot with activity.
+        slot_quantum (float): Total activity in the latest slot.
+        previous_streak (int): Streak till the slot before the latest slot.
 
     """
 
@@ -211,77 +819,199 @@ class Summary(BaseModel):
     target = DoubleField()
     target_date = DateField()
     streak = IntegerField(default=0)
+    slot_start = DateField(null=True)
+    slot_quantum = DoubleField(default=0.0)
+    previous_streak = IntegerField(default=0)
 
     @classmethod
-    def update_streak(cls, habit):
+    def update_streak(cls, habit, activity=None):
         """Update streak for a habit.
 
+        Streak is updated from the latest slot state if `activity` falls in
+        the latest or a later slot. Otherwise it is computed from all the
+        daily totals of the habit.
+
         Args:
         ----
             habit (Habit): Habit to update.
+            activity (Activity): New activity for the habit. Optional.
 
         """
-        # Check-in now supports past updates for upto 365 days
-        # TODO need an index on date, this query will scan entire table
         summary = cls.get(for_habit=habit)
-        activities = list(
-            (
-                Activity.select(
-                    Activity.update_date,
-                    fn.SUM(Activity.quantum).alias("total_quantum"),
-                )
-                .where(Activity.for_habit == habit)
-                .group_by(fn.date(Activity.update_date))
-                .order_by(Activity.update_date.desc())
-            )
-        )
+        if activity is None or summary.slot_start is None:
+            return summary._compute_streak(habit)
+
+        slot = habit.get_slot(cls._get_day(activity.update_date))
+        latest_slot = habit.get_slot(summary.slot_start)
+        if slot < latest_slot:
+            # Back dated activity changes an older slot, recompute
+            return summary._compute_streak(habit)
+
+        if slot == latest_slot:
+            summary.slot_quantum += activity.quantum
+        else:
+            # Activity starts a new slot. Streak continues only if there is
+            # no gap between the slots.
+            summary.previous_streak = summary.streak if slot == latest_slot + 1 else 0
+            summary.slot_start = habit.get_slot_start(slot)
+            summary.slot_quantum = activity.quantum
+
+        summary._set_streak(habit)
+        summary.save()
+        return summary
 
-        if len(activities) == 0:
-            return summary
+    @classmethod
+    def update_streak_batch(cls, habit, activities):
+        """Update streak for a habit once for many new activities.
 
-        # Based on habit tracking interval, divide the days from start_date
-        # till now into slots.
-        start_date = habit.start_date or habit.created_date
-        last_update = activities[0].update_date.date()
-        slot_start_date = last_update - timedelta(
-            days=(last_update - start_date).days % habit.frequency
+        Activities in the same slot are applied to the latest slot state as
+        one activity. Activities across slots recompute the streak.
+
+        Args:
+        ----
+            habit (Habit): Habit to update.
+            activities (list): New activities for the habit.
+
+        Returns:
+        -------
+            The Summary of the habit.
+
+        """
+        days = [cls._get_day(a.update_date) for a in activities]
+        if len({habit.get_slot(day) for day in days}) > 1:
+            return cls.update_streak(habit)
+
+        activity = Activity(
+            for_habit=habit,
+            quantum=sum(a.quantum for a in activities),
+            update_date=max(days),
         )
-        streak = 0
-        quantum = 0.0
-        for i in range(0, len(activities)):
-            # Break if the activity is outside current slot
-            if activities[i].update_date.date() < slot_start_date:
-                break
+        return cls.update_streak(habit, activity)
 
-            # Process current slot
-            # 1. Find the total activity in current slot
-            while (
-                i < len(activities)
-                and activities[i].update_date.date() >= slot_start_date
-            ):
-                quantum += activities[i].total_quantum
-                i += 1
-
-            # 2. Add to streak if goal is met
-            goal_not_met = (
-                quantum > habit.quantum if habit.minimize else quantum < habit.quantum
-            )
-            if goal_not_met:
-                break
-            streak += 1
+    @classmethod
+    def update_all_streaks(cls, habits=None):
+        """Recompute streaks of many habits in one pass over the daily totals.
 
-            # Reset the slot and quantum
-            slot_start_date = slot_start_date - timedelta(days=habit.frequency)
-            quantum = 0.0
+        Daily totals are read in one query ordered by habit and day, and merged
+        with the summaries ordered by habit. Streaks are computed as in
+        `update_streak` and the summaries are written with a bulk update.
+        Summaries of habits without any activity are not changed.
 
-        summary.streak = streak
-        summary.save()
-        return summary
+        Args:
+        ----
+            habits (list): Habits to recompute. Default: all habits.
+
+        Returns:
+        -------
+            Number of summaries updated.
+
+        """
+        summaries = cls.select(cls, Habit).join(Habit).order_by(cls.for_habit)
+
+        # Days since the start date of the habit are computed by SQLite. Dates
+        # of the daily totals are not parsed.
+        start_date = fn.COALESCE(Habit.start_date, Habit.created_date)
+        days = (fn.julianday(DailyTotal.day) - fn.julianday(start_date)).cast("INTEGER")
+        totals = (
+            DailyTotal.select(DailyTotal.for_habit, days, DailyTotal.total_quantum)
+            .join(Habit)
+            .order_by(DailyTotal.for_habit, DailyTotal.day)
+        )
+        if habits is not None:
+            summaries = summaries.where(cls.for_habit.in_(habits))
+            totals = totals.where(DailyTotal.for_habit.in_(habits))
+
+        with bulk_change():
+            updated = []
+            # Rows are read from the cursor without converting the values
+            by_habit = groupby(db.execute(totals), key=itemgetter(0))
+            current = next(by_habit, None)
+            for summary in summaries.iterator():
+                while current is not None and current[0] < summary.for_habit_id:
+                    current = next(by_habit, None)
+                if current is None or current[0] != summary.for_habit_id:
+                    continue
+                summary._scan_streak(summary.for_habit, current[1])
+                updated.append(summary)
+
+            fields = [cls.streak, cls.slot_start, cls.slot_quantum, cls.previous_streak]
+            cls.bulk_update(updated, fields, batch_size=BULK_UPDATE_BATCH)
+        return len(updated)
+
+    @staticmethod
+    def _get_day(update_date):
+        return update_date.date() if isinstance(update_date, datetime) else update_date
+
+    def _compute_streak(self, habit):
+        totals = (
+            DailyTotal.select(DailyTotal.day, DailyTotal.total_quantum)
+            .where(DailyTotal.for_habit == habit)
+            .order_by(DailyTotal.day.desc())
+        )
+
+        # Based on habit tracking interval, divide the days from start_date
+        # till now into slots. Walk back the slots before the latest activity
+        # till a slot misses the goal or has no activity.
+        slots = groupby(totals.iterator(), key=lambda t: habit.get_slot(t.day))
+        latest = next(slots, None)
+        if latest is None:
+            return self
+
+        latest_slot, latest_totals = latest
+        self.slot_start = habit.get_slot_start(latest_slot)
+        self.slot_quantum = sum(t.total_quantum for t in latest_totals)
+        self.previous_streak = 0
+        for slot, slot_totals in slots:
+            if slot != latest_slot - self.previous_streak - 1:
+                break
+            if not habit.is_goal_met(sum(t.total_quantum for t in slot_totals)):
+                break
+            self.previous_streak += 1
+
+        self._set_streak(habit)
+        self.save()
+        return self
+
+    def _scan_streak(self, habit, totals):
+        # Walk the slots forward. Streak before a slot continues from the
+        # previous slot if it is the slot just before and it met the goal.
+        # Totals have the days since the start date, see `Habit.get_slot`.
+        frequency = habit.frequency
+        latest_slot, quantum, previous_streak = None, 0.0, 0
+        for slot, slot_totals in groupby(totals, key=lambda t: t[1] // frequency):
+            if latest_slot is not None:
+                continued = slot == latest_slot + 1 and habit.is_goal_met(quantum)
+                previous_streak = previous_streak + 1 if continued else 0
+            latest_slot, quantum = slot, sum(t[2] for t in slot_totals)
+
+        self.slot_start = habit.get_slot_start(latest_slot)
+        self.slot_quantum = quantum
+        self.previous_streak = previous_streak
+        self._set_streak(habit)
+
+    def _set_streak(self, habit):
+        met = habit.is_goal_met(self.slot_quantum)
+        self.streak = self.previous_streak + 1 if met else 0
 
     def get_streak(self):
         """Humanize a streak to include days."""
-        days = "day" if self.streak == 1 else "days"
-        return f"{self.streak} {days}"
+        return self.format_streak(self.streak)
+
+    @staticmethod
+    def format_streak(streak):
+        """Humanize a streak to include days.
+
+        Args:
+        ----
+            streak (int): Streak of a habit.
+
+        Returns:
+        -------
+            Streak with days, e.g. `1 day`.
+
+        """
+        days = "day" if streak == 1 else "days"
+        return f"{streak} {days}"
 
 
 class Migration:
@@ -290,15 +1020,18 @@ class Migration:
     # Error codes for the migrations
     error_codes = {-1: "not run", 0: "success", 1: "generic failure"}
 
-    def __init__(self, database):
+    def __init__(self, database, progress=None):
         """Create an instance of the migration.
 
         Args:
         ----
             database: database instance
+            progress (callable): Called with the version, rows done and total
+            rows after each batch of a data migration.
 
         """
         self._db = database
+        self._progress = progress
 
     def get_version(self):
         """Get the database version.
@@ -307,6 +1040,9 @@ class Migration:
         DB version is 1 if tables exist, but Config table is not available
         DB version is the actual version otherwise.
 
+        SQLite `user_version` is set to the version on every migration. We
+        skip the schema introspection if it is the latest version.
+
         Args:
         ----
             database (Database): peewee database instance
@@ -316,6 +1052,12 @@ class Migration:
             Database version (int).
 
         """
+        version = self._db.pragma("user_version")
+        if version == DB_VERSION:
+            return version
+
+        from playhouse import reflection
+
         # Return version 1 if other tables (excluding Config) exist
         try:
             tables = reflection.introspect(self._db).model_names
@@ -339,6 +1081,9 @@ class Migration:
 
         if cur_ver != 0 and act_ver == cur_ver:
             logger.debug("DB versions are same. Skip migration.")
+            if not list_only:
+                # Database may be upgraded before `user_version` was set
+                self._db.pragma("user_version", act_ver)
             return {}
 
         def get_migration(version):
@@ -352,14 +1097,26 @@ class Migration:
         # Run the migrations and report their status
         return {f[0]: f[1][0]() for f in m.items()}
 
+    def _set_version(self, version):
+        """Set the database version in config and SQLite `user_version`."""
+        Config.set_value("version", str(version))
+        self._db.pragma("user_version", version)
+
     def _migration_0(self):
         """Set latest state of the database schema."""
-        self._db.create_tables([Config, Habit, Activity, Summary], safe=True)
-        Config.create(name="version", value=str(DB_VERSION))
+        self._db.create_tables(
+            [Config, Habit, Activity, ActivityArchive, DailyTotal, Summary],
+            safe=True,
+        )
+        self._create_change_triggers()
+        self._set_version(DB_VERSION)
         return 0
 
     def _migration_1(self):
         """Apply migration #1."""
+        from playhouse import reflection
+        from playhouse.migrate import SqliteMigrator, migrate
+
         tables = reflection.introspect(self._db).model_names
         migrator = SqliteMigrator(self._db)
         if "habitmodel" in tables and "activitymodel" in tables:
@@ -374,32 +1131,50 @@ class Migration:
         self._db.create_tables([Config, Summary], safe=True)
         logger.debug("Migration #1: Created tables.")
 
-        # Set DB version
-        Config.insert(name="version", value="1").on_conflict("replace").execute()
-        logger.debug("Migration #1: DB version updated to 1.")
-
-        # Update summaries
-        for h in Habit.select(Habit.id, Habit.created_date):
-            activities = (
-                Activity.select()
-                .where(Activity.for_habit == h)
-                .order_by(Activity.update_date.asc())
-            )
-            streak = 0
-            if len(activities) != 0:
-                last_date = activities[0].update_date
-                for a in activities:
-                    delta = last_date - a.update_date
-                    if abs(delta.days) > 1:
-                        break
-                    streak += 1
-                    last_date = a.update_date
-
-            # Update summary for the habit
-            s = Summary.get_or_create(for_habit=h, target=0, target_date=h.created_date)
-            s[0].streak = streak
-            s[0].save()
+        # Streak is the run of activities from the oldest one with a day or
+        # less between them. Dates of the activities are text till migration
+        # #10, and timestamps if it is run again on a newer database.
+        streaks = self._db.execute_sql(
+            'WITH "times" AS ('
+            ' SELECT "for_habit_id", CASE typeof("update_date")'
+            " WHEN 'integer' THEN \"update_date\" / 1000"
+            ' ELSE CAST(ROUND((julianday("update_date") - 2440587.5) * 86400000)'
+            ' AS INTEGER) END AS "ms" FROM "activity"'
+            '), "gaps" AS ('
+            ' SELECT "for_habit_id", ROW_NUMBER() OVER "w" AS "n",'
+            ' "ms" - LAG("ms") OVER "w" AS "gap" FROM "times"'
+            ' WINDOW "w" AS (PARTITION BY "for_habit_id" ORDER BY "ms")'
+            ') SELECT "for_habit_id",'
+            ' COALESCE(MIN(CASE WHEN "gap" > 86400000 THEN "n" END) - 1, MAX("n"))'
+            ' FROM "gaps" GROUP BY "for_habit_id"'
+        ).fetchall()
+
+        # Summary of a habit has no target and the creation date as target date
+        created = Habit.select(Habit.created_date).where(Habit.id == Summary.for_habit)
+        summary = (Summary.target == 0) & (Summary.target_date == created)
+        fields = [
+            Summary.for_habit,
+            Summary.target,
+            Summary.target_date,
+            Summary.streak,
+            Summary.slot_quantum,
+            Summary.previous_streak,
+        ]
+        exists = Summary.select().where((Summary.for_habit == Habit.id) & summary)
+        missing = Habit.select(
+            Habit.id, Value(0), Habit.created_date, Value(0), Value(0.0), Value(0)
+        ).where(~fn.EXISTS(exists))
+        with self._db.transaction(), bulk_change():
+            Summary.insert_from(missing, fields).execute()
+            for batch in chunked(streaks, 400):
+                streak = Case(Summary.for_habit, batch, 0)
+                habits = [habit_id for habit_id, _ in batch]
+                Summary.update(streak=streak).where(
+                    summary & Summary.for_habit.in_(habits)
+                ).execute()
+            self._set_version(1)
         logger.debug("Migration #1: Summary updated for habits.")
+        logger.debug("Migration #1: DB version updated to 1.")
         return 0
 
     def _migration_2(self):
@@ -408,7 +1183,7 @@ class Migration:
         This is a dummy migration step.
         """
         # Set DB version
-        Config.insert(name="version", value="2").on_conflict("replace").execute()
+        self._set_version(2)
         logger.debug("Migration #2: DB version updated to 2.")
         return 0
 
@@ -417,6 +1192,8 @@ class Migration:
 
         Add support for minimize habits.
         """
+        from playhouse import reflection
+
         cols = reflection.introspect(self._db).columns
         sql = []
         if "minimize" not in cols["habit"]:
@@ -440,6 +1217,259 @@ class Migration:
                 self._db.execute_sql(stmt)
                 logger.debug(f"Migration #3: Executed '{stmt}'")
 
-        Config.insert(name="version", value="3").on_conflict("replace").execute()
+        self._set_version(3)
         logger.debug("Migration #3: DB version updated to 3.")
         return 0
+
+    def _migration_4(self):
+        """Apply migration #4.
+
+        Add indexes for the date range queries on activities.
+        """
+        with self._db.transaction():
+            # Create the composite (for_habit, update_date) and update_date
+            # indexes. Single column index on `for_habit` is redundant now.
+            # Migration #10 replaces them.
+            for index, columns in ACTIVITY_INDEXES_4.items():
+                self._db.execute_sql(
+                    f'CREATE INDEX IF NOT EXISTS "{index}" ON "activity" ({columns})'
+                )
+            for index in ["activity_for_habit_id", "activitymodel_for_habit_id"]:
+                self._db.execute_sql(f'DROP INDEX IF EXISTS "{index}"')
+                logger.debug(f"Migration #4: Dropped index '{index}'")
+
+        self._set_version(4)
+        logger.debug("Migration #4: DB version updated to 4.")
+        return 0
+
+    def _migration_5(self):
+        """Apply migration #5.
+
+        Add daily totals of activities.
+        """
+        with self._db.transaction():
+            self._db.create_tables([DailyTotal], safe=True)
+            if not self._has_checkpoint(5):
+                with bulk_change():
+                    DailyTotal.delete().execute()
+
+        # Dates of the activities are text till migration #10
+        day = fn.date(Activity.update_date)
+        if self._has_timestamps():
+            day = fn.date(Activity.local_day * 86400, "unixepoch")
+        fields = [
+            DailyTotal.for_habit,
+            DailyTotal.day,
+            DailyTotal.total_quantum,
+            DailyTotal.count,
+        ]
+
+        def add_totals(start, end):
+            # Activities of a day may be in many batches. Add to their total.
+            totals = (
+                Activity.select(
+                    Activity.for_habit,
+                    day,
+                    fn.SUM(Activity.quantum),
+                    fn.COUNT(Activity.id),
+                )
+                .where((Activity.id > start) & (Activity.id <= end))
+                .group_by(Activity.for_habit, day)
+            )
+            with bulk_change():
+                DailyTotal.insert_from(totals, fields).on_conflict(
+                    conflict_target=[DailyTotal.for_habit, DailyTotal.day],
+                    update={
+                        DailyTotal.total_quantum: DailyTotal.total_quantum
+                        + EXCLUDED.total_quantum,
+                        DailyTotal.count: DailyTotal.count + EXCLUDED.count,
+                    },
+                ).execute()
+
+        self._run_batches(5, "activity", add_totals)
+        count = DailyTotal.select().count()
+        logger.debug(f"Migration #5: Created {count} daily totals.")
+
+        self._finish(5)
+        logger.debug("Migration #5: DB version updated to 5.")
+        return 0
+
+    def _migration_6(self):
+        """Apply migration #6.
+
+        Add latest slot state to summaries for incremental streak updates.
+        """
+        cols = [c.name for c in self._db.get_columns("summary")]
+        sql = []
+        if "slot_start" not in cols:
+            sql.append("ALTER TABLE summary ADD COLUMN slot_start DATE")
+        if "slot_quantum" not in cols:
+            sql.append("ALTER TABLE summary ADD COLUMN slot_quantum REAL DEFAULT 0")
+        if "previous_streak" not in cols:
+            sql.append(
+                "ALTER TABLE summary ADD COLUMN previous_streak INTEGER DEFAULT 0"
+            )
+
+        with self._db.transaction():
+            # Slot state is empty for existing summaries. It is computed on
+            # next check-in for the habit.
+            for stmt in sql:
+                self._db.execute_sql(stmt)
+                logger.debug(f"Migration #6: Executed '{stmt}'")
+
+        self._set_version(6)
+        logger.debug("Migration #6: DB version updated to 6.")
+        return 0
+
+    def _migration_7(self):
+        """Apply migration #7.
+
+        Add lowercase names of habits for indexed lookups.
+        """
+        cols = [c.name for c in self._db.get_columns("habit")]
+        with self._db.transaction():
+            if "name_key" not in cols:
+                stmt = (
+                    "ALTER TABLE habit ADD COLUMN "
+                    "name_key VARCHAR(255) NOT NULL DEFAULT ''"
+                )
+                self._db.execute_sql(stmt)
+                logger.debug(f"Migration #7: Executed '{stmt}'")
+
+            # Lowercase the names in Python, same as `Habit.save`. SQLite's
+            # LOWER only folds ASCII characters.
+            for habit_id, name in Habit.select(Habit.id, Habit.name).tuples():
+                Habit.update(name_key=name.lower()).where(
+                    Habit.id == habit_id
+                ).execute()
+            Habit._schema.create_indexes(safe=True)
+            logger.debug("Migration #7: Updated lowercase names of habits.")
+
+        self._set_version(7)
+        logger.debug("Migration #7: DB version updated to 7.")
+        return 0
+
+    def _migration_8(self):
+        """Apply migration #8.
+
+        Add archive of compacted activities.
+        """
+        self._db.create_tables([ActivityArchive], safe=True)
+        logger.debug("Migration #8: Created activity archive table.")
+
+        self._set_version(8)
+        logger.debug("Migration #8: DB version updated to 8.")
+        return 0
+
+    def _migration_9(self):
+        """Apply migration #9.
+
+        Add the change marker for the writes to the habits, summaries and daily
+        totals.
+        """
+        with self._db.transaction():
+            self._create_change_triggers()
+        logger.debug("Migration #9: Created change marker triggers.")
+
+        self._set_version(9)
+        logger.debug("Migration #9: DB version updated to 9.")
+        return 0
+
+    def _migration_10(self):
+        """Apply migration #10.
+
+        Store the dates of the activities as integer timestamps and add their
+        local day numbers. Activities are copied to a new table in batches.
+        """
+        if "activity_text" not in self._db.get_tables():
+            if self._has_timestamps():
+                self._finish(10)
+                return 0
+
+            with self._db.transaction():
+                # Indexes move with a renamed table. Drop them to reuse the
+                # names. Indexes of the new table are created after the copy.
+                for index in ACTIVITY_INDEXES_4:
+                    self._db.execute_sql(f'DROP INDEX IF EXISTS "{index}"')
+                self._db.execute_sql('ALTER TABLE "activity" RENAME TO "activity_text"')
+                Activity._schema.create_table()
+
+        def copy(start, end):
+            # Text dates are local time. Keep the microseconds of the date.
+            self._db.execute_sql(
+                'INSERT INTO "activity" '
+                '("id", "for_habit_id", "quantum", "update_date", "local_day") '
+                'SELECT "id", "for_habit_id", "quantum", '
+                "strftime('%s', update_date, 'utc') * 1000000"
+                " + CAST(substr(update_date || '.000000', 21, 6) AS INTEGER), "
+                "CAST(julianday(date(update_date)) - 2440587.5 AS INTEGER) "
+                'FROM "activity_text" WHERE "id" > ? AND "id" <= ?',
+                (start, end),
+            )
+
+        self._run_batches(10, "activity_text", copy)
+        with self._db.transaction():
+            Activity._schema.create_indexes(safe=True)
+            self._db.execute_sql('DROP TABLE "activity_text"')
+            self._finish(10)
+        logger.debug("Migration #10: Stored activity dates as timestamps.")
+        logger.debug("Migration #10: DB version updated to 10.")
+        return 0
+
+    def _run_batches(self, version, table, run):
+        """Run a data migration in batches of the rows of a table.
+
+        `run(start, end)` migrates the rows with `start < id <= end`. Each
+        batch runs in a transaction which saves the last id as a checkpoint.
+        Rows till the checkpoint are skipped if the migration is run again.
+
+        Args:
+        ----
+            version (int): Version of the migration.
+            table (str): Name of the table with integer ids.
+            run (callable): Migrate the rows in a range of ids.
+
+        """
+        key = f"migration_{version}"
+        cursor = self._db.execute_sql(f'SELECT MIN("id"), MAX("id") FROM "{table}"')
+        first_id, last_id = cursor.fetchone()
+        if last_id is None:
+            return
+
+        start = int(Config.get_value(key, first_id - 1))
+        while start < last_id:
+            end = min(start + MIGRATION_BATCH, last_id)
+            with self._db.transaction():
+                run(start, end)
+                Config.set_value(key, str(end))
+            logger.debug(f"Migration #{version}: Migrated {table} till id {end}.")
+            if self._progress:
+                self._progress(version, end - first_id + 1, last_id - first_id + 1)
+            start = end
+
+    def _has_checkpoint(self, version):
+        """Check if a batched migration was interrupted."""
+        return Config.get_value(f"migration_{version}") is not None
+
+    def _finish(self, version):
+        """Remove the checkpoint of a migration and set the version."""
+        Config.delete().where(Config.name == f"migration_{version}").execute()
+        self._set_version(version)
+
+    def _has_timestamps(self):
+        """Check if the dates of the activities are timestamps (migration #10)."""
+        return "local_day" in [c.name for c in self._db.get_columns("activity")]
+
+    def _create_change_triggers(self):
+        Config.insert(name=CHANGE_KEY, value="0").on_conflict_ignore().execute()
+        for table in CHANGE_TABLES:
+            for event in ("INSERT", "UPDATE", "DELETE"):
+                # Replace the triggers created without the pause
+                name = f"{table}_{event.lower()}_change"
+                self._db.execute_sql(f"DROP TRIGGER IF EXISTS {name}")
+                self._db.execute_sql(
+                    f"CREATE TRIGGER {name} AFTER {event} ON {table} "
+                    "WHEN NOT EXISTS "
+                    f"(SELECT 1 FROM config WHERE name = '{CHANGE_PAUSE_KEY}') "
+                    f"BEGIN {BUMP_CHANGE_SQL}; END"
+                )
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""Profiler for the SQL statements run by habito."""
+
+import json
+import time
+from dataclasses import asdict, dataclass
+
+
+@dataclass
+class QueryStats:
+    """Time and rows of a SQL statement.
+
+    Attributes
+    ----------
+        sql (str): SQL statement with the parameter placeholders.
+        calls (int): Number of runs of the statement.
+        rows (int): Rows read or changed by the statement.
+        total_ms (float): Time to run the statement and read the rows.
+
+    """
+
+    sql: str
+    calls: int = 0
+    rows: int = 0
+    total_ms: float = 0.0
+
+
+class QueryProfiler:
+    """Record the SQL statements run by a peewee database.
+
+    Statements are grouped by their SQL. Time includes reading the rows of a
+    query.
+
+    Args:
+    ----
+        database (Database): Database to profile.
+
+    """
+
+    def __init__(self, database):
+        """Create a profiler for the database."""
+        self.database = database
+        self.queries = {}
+        self._execute_sql = None
+
+    def start(self):
+        """Start recording the statements."""
+        self._execute_sql = self.database.execute_sql
+        self.database.execute_sql = self._execute
+        return self
+
+    def stop(self):
+        """Stop recording the statements."""
+        del self.database.execute_sql
+
+    def get_stats(self):
+        """Get the statements sorted by total time, slowest first."""
+        return sorted(self.queries.values(), key=lambda q: q.total_ms, reverse=True)
+
+    def to_json(self):
+        """Get the statements as a JSON document."""
+        queries = self.get_stats()
+        return json.dumps(
+            {
+                "statements": len(queries),
+                "calls": sum(q.calls for q in queries),
+                "total_ms": round(sum(q.total_ms for q in queries), 3),
+                "queries": [
+                    {**asdict(q), "total_ms": round(q.total_ms, 3)} for q in queries
+                ],
+            },
+            indent=2,
+        )
+
+    def format(self, width=80):
+        """Format the statements as a table.
+
+        Args:
+        ----
+            width (int): Maximum width of a line. Statements are truncated.
+
+        """
+        queries = self.get_stats()
+        calls = sum(q.calls for q in queries)
+        total_ms = sum(q.total_ms for q in queries)
+        lines = [
+            f"SQL profile: {len(queries)} statements, {calls} calls, {total_ms:.3f} ms",
+            f"{'Total ms':>10} {'Calls':>6} {'Rows':>8}  Statement",
+        ]
+        for q in queries:
+            line = f"{q.total_ms:>10.3f} {q.calls:>6} {q.rows:>8}  {q.sql}"
+            lines.append(line if len(line) <= width else line[: width - 3] + "...")
+        return "\n".join(lines)
+
+    def _execute(self, sql, params=None, *args, **kwargs):
+        stats = self.queries.setdefault(sql, QueryStats(sql))
+        stats.calls += 1
+        start = time.perf_counter()
+        try:
+            cursor = self._execute_sql(sql, params, *args, **kwargs)
+        finally:
+            stats.total_ms += (time.perf_counter() - start) * 1000
+
+        # Rows of a query are counted as they are read
+        if cursor.description is None:
+            stats.rows += max(cursor.rowcount, 0)
+            return cursor
+        return _ProfiledCursor(cursor, stats)
+
+
+class _ProfiledCursor:
+    """Cursor which adds the time and count of the rows read to the stats."""
+
+    def __init__(self, cursor, stats):
+        self._cursor = cursor
+        self._stats = stats
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def fetchone(self):
+        row = self._fetch(self._cursor.fetchone)
+        self._stats.rows += row is not None
+        return row
+
+    def fetchmany(self, *args):
+        rows = self._fetch(self._cursor.fetchmany, *args)
+        self._stats.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._fetch(self._cursor.fetchall)
+        self._stats.rows += len(rows)
+        return rows
+
+    def _fetch(self, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self._stats.total_ms += (time.perf_counter() - start) * 1000
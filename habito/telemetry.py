@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""Phase timing and memory telemetry of habito commands.
+
+Telemetry is recorded only if `HABITO_TELEMETRY` is set. Wall time and peak
+memory traced by `tracemalloc` are recorded for each phase of a command, e.g.
+import, setup, fetch, compute and render. A record is appended to a JSON Lines
+file in the app directory for every command. The file is rotated at
+`MAX_BYTES`.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+ENV = "HABITO_TELEMETRY"
+FILE_NAME = "telemetry.jsonl"
+MAX_BYTES = 1024 * 1024
+BACKUP_COUNT = 3
+
+# Imports of habito are the first phase of a command. Start the clock and the
+# memory tracing when this module is imported by `habito.commands`.
+_started = time.perf_counter()
+_recorder = None
+
+
+def is_enabled():
+    """Check if telemetry is enabled with `HABITO_TELEMETRY`."""
+    return os.environ.get(ENV, "") not in ("", "0")
+
+
+# Memory tracing imports a few modules. Import it only if telemetry is enabled.
+if is_enabled():
+    import tracemalloc
+
+    tracemalloc.start()
+
+
+def get_path():
+    """Get the path of the telemetry file in the app directory."""
+    import click
+
+    return os.path.join(click.get_app_dir("habito"), FILE_NAME)
+
+
+class Recorder:
+    """Wall time and peak memory of the phases of a command.
+
+    Time from the import of this module till the recorder is created is the
+    `import` phase. Phases must not be nested.
+
+    Args:
+    ----
+        command (str): Name of the command.
+
+    """
+
+    def __init__(self, command):
+        """Create a recorder and record the import phase."""
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.command = command
+        self.phases = {}
+        self._add("import", _started, tracemalloc.get_traced_memory()[1])
+
+    @contextmanager
+    def phase(self, name):
+        """Record the time and peak memory of a phase.
+
+        A phase run more than once adds up the time and keeps the highest peak.
+        """
+        import tracemalloc
+
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(name, start, tracemalloc.get_traced_memory()[1])
+
+    def to_record(self):
+        """Get the phases as a telemetry record."""
+        from datetime import datetime
+
+        return {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "command": self.command,
+            "total_ms": round((time.perf_counter() - _started) * 1000, 3),
+            "phases": {
+                name: {"ms": round(ms, 3), "peak_kb": round(peak / 1024, 1)}
+                for name, (ms, peak) in self.phases.items()
+            },
+        }
+
+    def _add(self, name, start, peak):
+        ms, last_peak = self.phases.get(name, (0.0, 0))
+        ms += (time.perf_counter() - start) * 1000
+        self.phases[name] = (ms, max(peak, last_peak))
+
+
+def start(command):
+    """Start recording the phases of a command."""
+    global _recorder
+    _recorder = Recorder(command)
+    return _recorder
+
+
+@contextmanager
+def phase(name):
+    """Record a phase of the command if telemetry is started."""
+    if _recorder is None:
+        yield
+        return
+    with _recorder.phase(name):
+        yield
+
+
+def finish(path):
+    """Stop recording and append the record to the telemetry file.
+
+    Args:
+    ----
+        path (str): Path of the telemetry file.
+
+    """
+    import tracemalloc
+
+    global _recorder
+    if _recorder is None:
+        return
+    record, _recorder = _recorder.to_record(), None
+    tracemalloc.stop()
+    write_record(path, record)
+
+
+def write_record(path, record):
+    """Append a record to the telemetry file. Rotate the file if it is full.
+
+    Backups are `path.1` (newest) to `path.N` (oldest).
+    """
+    import json
+
+    line = json.dumps(record) + "\n"
+    if os.path.exists(path) and os.path.getsize(path) + len(line) > MAX_BYTES:
+        for i in range(BACKUP_COUNT - 1, 0, -1):
+            if os.path.exists(f"{path}.{i}"):
+                os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+        os.replace(path, f"{path}.1")
+    with open(path, "a") as f:
+        f.write(line)
+
+
+def read_records(path):
+    """Read the records from the telemetry file and its backups.
+
+    Args:
+    ----
+        path (str): Path of the telemetry file.
+
+    Returns:
+    -------
+        List of records, oldest first. Lines which are not valid JSON, e.g.
+        from an interrupted write, are skipped.
+
+    """
+    import json
+
+    records = []
+    paths = [f"{path}.{i}" for i in range(BACKUP_COUNT, 0, -1)] + [path]
+    for p in paths:
+        if not os.path.exists(p):
+            continue
+        with open(p) as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    return records
+
+
+def summarize(records, percentiles=(50, 90, 99)):
+    """Get the percentiles of phase times for each command.
+
+    Args:
+    ----
+        records (list): Telemetry records.
+        percentiles (tuple): Percentiles of the time.
+
+    Returns:
+    -------
+        Dict of command to a dict of phase to a tuple of runs, percentiles of
+        time in milliseconds and the highest peak memory in KiB. Phases are in
+        the order of the first record; `total` is the last phase.
+
+    """
+    phases = {}
+    for r in records:
+        command = phases.setdefault(r["command"], {})
+        for name, p in r["phases"].items():
+            command.setdefault(name, []).append((p["ms"], p["peak_kb"]))
+        peak = max((p["peak_kb"] for p in r["phases"].values()), default=0.0)
+        command.setdefault("total", []).append((r["total_ms"], peak))
+
+    summary = {}
+    for command, by_phase in phases.items():
+        by_phase["total"] = by_phase.pop("total")
+        summary[command] = {}
+        for name, values in by_phase.items():
+            times = sorted(ms for ms, _ in values)
+            summary[command][name] = (
+                len(times),
+                [percentile(times, p) for p in percentiles],
+                max(peak for _, peak in values),
+            )
+    return summary
+
+
+def percentile(values, p):
+    """Get the p-th percentile of sorted values using the nearest rank."""
+    rank = max(1, -(-len(values) * p // 100))
+    return values[int(rank) - 1]
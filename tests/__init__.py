@@ -3,6 +3,7 @@
 
 from datetime import datetime, timedelta
 from unittest import TestCase
+from unittest.mock import patch
 
 import habito.models as models
 
@@ -40,9 +41,7 @@ class HabitoTestCase(TestCase):
         return habit
 
     def add_activity(self, habit, quantum=0.0, update_date=datetime.now()):
-        activity = models.Activity.create(
-            for_habit=habit, quantum=quantum, update_date=update_date
-        )
+        activity = models.Activity.add(habit, quantum, update_date)
         return activity
 
     def add_summary(self, habit, target=0, target_date=datetime.now(), streak=0):
@@ -50,3 +49,16 @@ class HabitoTestCase(TestCase):
             for_habit=habit, target=target, target_date=target_date, streak=streak
         )
         return summary
+
+    def get_query_plans(self, func, *args, table="activity"):
+        """Get the query plans for queries on `table` executed by `func`."""
+        with patch.object(models.db, "execute_sql", wraps=models.db.execute_sql) as m:
+            func(*args)
+        plans = []
+        for call in m.call_args_list:
+            sql, params = call.args[0], call.args[1]
+            if f'FROM "{table}"' not in sql:
+                continue
+            cursor = models.db.execute_sql(f"EXPLAIN QUERY PLAN {sql}", params)
+            plans.append(" ".join(r[-1] for r in cursor.fetchall()))
+        return plans
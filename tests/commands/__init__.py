@@ -19,7 +19,14 @@ class HabitoCommandTestCase(HabitoTestCase):
 
     def tearDown(self):
         models.db.drop_tables(
-            [models.Habit, models.Activity, models.Summary], safe=True
+            [
+                models.Habit,
+                models.Activity,
+                models.ActivityArchive,
+                models.DailyTotal,
+                models.Summary,
+            ],
+            safe=True,
         )
 
     def _verify_checkin_date(self, date_str, year, output):
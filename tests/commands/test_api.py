@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""Tests for api command."""
+from unittest.mock import Mock, patch
+
+import habito
+import habito.commands
+from tests.commands import HabitoCommandTestCase
+
+
+@patch("signal.signal")
+class HabitoApiTestCase(HabitoCommandTestCase):
+    @patch("habito.api.serve")
+    def test_api_serves_till_interrupted(self, serve, signal):
+        def run(port, window, ready):
+            ready(Mock(server_address=("127.0.0.1", port)))
+            raise KeyboardInterrupt()
+
+        serve.side_effect = run
+
+        args = ["--port", "8000", "--window", "20"]
+        result = self._run_command(habito.commands.api, args)
+
+        assert result.exit_code == 0
+        assert serve.call_args[0][:2] == (8000, 0.02)
+        assert "Serving habito API on http://127.0.0.1:8000." in result.output
+        assert "Stopped." in result.output
+        assert signal.called
+
+    @patch("habito.api.serve")
+    def test_api_shows_error_if_port_is_in_use(self, serve, signal):
+        serve.side_effect = OSError(98, "Address already in use")
+
+        result = self._run_command(habito.commands.api)
+
+        assert result.exit_code == 1
+        assert serve.call_args[0][:2] == (8765, 0.005)
+        assert "Unable to serve on port 8765: Address already in use." in result.output
@@ -1,10 +1,18 @@
 # -*- coding: utf-8 -*-
 """Tests for checkin command."""
+import os
+import subprocess
+import sys
+import tempfile
 from datetime import datetime, date, timedelta
+from unittest.mock import patch
+
+import click
 
 import habito
 from habito import models
 from habito.commands import checkin
+from tests import HabitoTestCase
 from tests.commands import HabitoCommandTestCase
 
 
@@ -33,6 +41,16 @@ class HabitoCheckinCommandTestCase(HabitoCommandTestCase):
         assert result.exit_code == 0
         assert result.output.startswith("More than one habits matched the")
 
+    def test_habito_checkin_should_match_name_as_regex_if_requested(self):
+        habit = self.create_habit(name="Morning run")
+        self.add_summary(habit)
+
+        prefix_result = self._run_command(checkin, ["run", "-q 9.1"])
+        regex_result = self._run_command(checkin, ["run$", "--regex", "-q 9.1"])
+
+        assert prefix_result.output.startswith("No habit matched the")
+        assert "Added 9.1 dummy_units to habit Morning run" in regex_result.output
+
     def test_habito_checkin_should_add_data_for_a_habit(self):
         habit = self.create_habit()
         self.add_summary(habit)
@@ -93,6 +111,27 @@ class HabitoCheckinCommandTestCase(HabitoCommandTestCase):
         self._verify_checkin_date(date_str, d.year - 1, checkin_result.output)
         assert "35.0 dummy_units" in checkin_result.output
 
+    def test_habito_checkin_should_update_relative_date(self):
+        habit = self.create_habit()
+        self.add_summary(habit)
+        d = datetime.now() - timedelta(days=2)
+
+        result = self._run_command(checkin, ["Habit", "-d", "2 days ago", "-q 35.0"])
+
+        a = models.Activity.get()
+        assert a.update_date.date() == d.date()
+        assert d.strftime("%a %b %d %Y") in result.output
+
+    def test_habito_checkin_should_show_error_for_invalid_date(self):
+        habit = self.create_habit()
+        self.add_summary(habit)
+
+        result = self._run_command(checkin, ["Habit", "-d", "someday", "-q 35.0"])
+
+        assert result.exit_code == 1
+        assert result.output.startswith("Unable to parse date: someday.")
+        assert models.Activity.select().count() == 0
+
     def test_habito_checkin_can_add_multiple_data_points_on_same_day(self):
         habit = self.create_habit()
         self.add_summary(habit)
@@ -112,6 +151,7 @@ class HabitoCheckinCommandTestCase(HabitoCommandTestCase):
         assert activity_entry.count() == 2
         assert activity_entry[0].quantum == 9.1
         assert activity_entry[1].quantum == 10.0001
+        assert models.DailyTotal.get().total_quantum == 9.1 + 10.0001
 
     def test_habito_checkin_asks_user_input_if_quantum_is_not_provided(self):
         habit = self.create_habit()
@@ -168,7 +208,108 @@ class HabitoCheckinCommandTestCase(HabitoCommandTestCase):
         habit = self.create_habit()
         self.add_summary(habit)
 
-        result = self._run_command_with_stdin(checkin, ["-r"], "\n")
+        with patch.object(models, "write", wraps=models.write) as write:
+            result = self._run_command_with_stdin(checkin, ["-r"], "\n")
+
+        assert result.exit_code == 0
+        assert not write.called
+        assert models.Activity.select().count() == 0
+
+    def test_habito_checkin_review_mode_saves_progress_in_one_transaction(self):
+        for name in ["HabitOne", "HabitTwo", "HabitThree"]:
+            self.add_summary(self.create_habit(name=name, quantum=1.0))
+
+        with patch.object(models.db, "commit", wraps=models.db.commit) as commit:
+            result = self._run_command_with_stdin(
+                checkin, ["--review"], "1.0\n\n2.0\n"
+            )
 
         assert result.exit_code == 0
+        assert commit.call_count == 1
+        assert [a.quantum for a in models.Activity.select()] == [1.0, 2.0]
+        assert [s.streak for s in models.Summary.select()] == [1, 0, 1]
+
+    def test_habito_checkin_aborted_review_doesnt_save_progress(self):
+        self.add_summary(self.create_habit())
+        self.add_summary(self.create_habit(name="HabitTwo"))
+
+        with patch("click.prompt", side_effect=[1.0, click.Abort()]):
+            result = self._run_command(checkin, ["--review"])
+
+        assert result.exit_code == 1
         assert models.Activity.select().count() == 0
+        assert models.DailyTotal.select().count() == 0
+
+    def test_habito_checkin_aborted_review_saves_progress_if_not_atomic(self):
+        self.add_summary(self.create_habit())
+        self.add_summary(self.create_habit(name="HabitTwo"))
+
+        with patch("click.prompt", side_effect=[1.0, click.Abort()]):
+            result = self._run_command(checkin, ["--review", "--no-atomic"])
+
+        assert result.exit_code == 1
+        assert [a.quantum for a in models.Activity.select()] == [1.0]
+
+
+class HabitoCheckinConcurrencyTestCase(HabitoTestCase):
+    """Check-ins from many processes at once."""
+
+    PROCESSES = 4
+    CHECKINS = 15
+
+    # Check in a habit for today and two days before in each process
+    WORKER = """
+import sys
+from datetime import datetime, timedelta
+from habito import models
+from habito.commands.checkin import _update_activity
+
+models.setup(sys.argv[1], profile=sys.argv[2])
+habit = models.Habit.get()
+for i in range(int(sys.argv[3])):
+    _update_activity(habit, 1.0, datetime.now() - timedelta(days=i % 3))
+"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "habito.db")
+
+    def tearDown(self):
+        models.db.close()
+        self.tmp.cleanup()
+
+    def test_concurrent_checkins_with_default_profile(self):
+        self._verify_concurrent_checkins("default")
+
+    def test_concurrent_checkins_with_wal_profile(self):
+        self._verify_concurrent_checkins("wal")
+
+    def _verify_concurrent_checkins(self, profile):
+        models.setup(self.path, profile=profile)
+        habit = models.Habit.add(
+            name="HabitOne", quantum=5.0, units="dummy_units", magica=""
+        )
+        models.db.close()
+
+        workers = [
+            subprocess.Popen(
+                [sys.executable, "-c", self.WORKER, self.path, profile, str(n)],
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+            for n in [self.CHECKINS] * self.PROCESSES
+        ]
+        errors = [w.communicate()[1] for w in workers]
+
+        assert [w.returncode for w in workers] == [0] * self.PROCESSES, errors
+        models.setup(self.path, profile=profile)
+        total = self.PROCESSES * self.CHECKINS
+        totals = models.DailyTotal.select().order_by(models.DailyTotal.day)
+        assert models.Activity.select().count() == total
+        assert [t.total_quantum for t in totals] == [total / 3] * 3
+        assert [t.count for t in totals] == [total / 3] * 3
+
+        # Incremental streak updates match a streak computed from all activities
+        summary = models.Summary.get(for_habit=habit)
+        assert (summary.streak, summary.slot_quantum) == (3, total / 3)
+        assert models.Summary.update_streak(habit).streak == 3
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Tests for compact command."""
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import habito
+import habito.commands
+from habito import models
+from tests.commands import HabitoCommandTestCase
+
+
+class HabitoCompactTestCase(HabitoCommandTestCase):
+    def test_compact_keeps_list_and_streaks(self):
+        habit = self.create_habit(quantum=2.0)
+        self.add_summary(habit)
+        for days in [3, 2, 2, 1, 1, 1]:
+            date = (datetime.now() - timedelta(days=days)).strftime("%m/%d")
+            self._run_command(habito.commands.checkin, ["HabitOne", "-q 1", "-d", date])
+        list_args = ["-f", "csv", "-d", "5 days"]
+        before = self._run_command(habito.commands.list, list_args).output
+
+        result = self._run_command(habito.commands.compact)
+
+        assert result.exit_code == 0
+        assert "Archived 5 activities before" in result.output
+        assert "as 2 daily activities." in result.output
+        assert models.Activity.select().count() == 3
+        assert models.ActivityArchive.select().count() == 5
+        assert self._run_command(habito.commands.list, list_args).output == before
+        assert models.Summary.get().streak == 2
+
+    def test_compact_archives_to_database_file(self):
+        habit = self.create_habit()
+        self.add_activity(habit, 1.0, self.one_day_ago)
+        self.add_activity(habit, 2.0, self.one_day_ago)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "archive.db")
+            result = self._run_command(
+                habito.commands.compact, ["--archive-db", path]
+            )
+            with sqlite3.connect(path) as conn:
+                rows = conn.execute(
+                    "SELECT quantum FROM activityarchive ORDER BY quantum"
+                ).fetchall()
+            conn.close()
+
+        assert result.exit_code == 0
+        assert rows == [(1.0,), (2.0,)]
+        assert models.ActivityArchive.select().count() == 0
+        assert [a.quantum for a in models.Activity.select()] == [3.0]
+
+    def test_compact_vacuums_database(self):
+        with patch.object(
+            models.db, "execute_sql", wraps=models.db.execute_sql
+        ) as execute_sql:
+            result = self._run_command(habito.commands.compact, ["--vacuum"])
+
+        assert result.exit_code == 0
+        assert execute_sql.call_args.args == ("VACUUM",)
+
+    def test_compact_shows_error_for_invalid_date(self):
+        result = self._run_command(habito.commands.compact, ["--before", "someday"])
+
+        assert result.exit_code == 1
+        assert "Unable to parse date: someday." in result.output
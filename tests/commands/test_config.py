@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""Tests for config command."""
+
+import habito
+import habito.commands
+from habito import models
+from tests.commands import HabitoCommandTestCase
+
+
+class HabitoConfigTestCase(HabitoCommandTestCase):
+    def tearDown(self):
+        models.Config.delete().where(models.Config.name == "db_profile").execute()
+        super().tearDown()
+
+    def test_config_shows_default_settings(self):
+        result = self._run_command(habito.commands.config)
+
+        assert result.exit_code == 0
+        assert result.output == "db-profile = default\n"
+
+    def test_config_updates_setting(self):
+        result = self._run_command(habito.commands.config, ["db-profile", "fast"])
+        show_result = self._run_command(habito.commands.config, ["db-profile"])
+
+        assert result.exit_code == 0
+        assert "Updated db-profile to fast." in result.output
+        assert models.Config.get_value("db_profile") == "fast"
+        assert show_result.output == "db-profile = fast\n"
+
+    def test_config_shows_error_for_invalid_value(self):
+        result = self._run_command(habito.commands.config, ["db-profile", "dummy"])
+
+        assert result.exit_code == 1
+        assert "Invalid value 'dummy' for db-profile." in result.output
+        assert models.Config.get_value("db_profile") is None
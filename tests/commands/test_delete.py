@@ -10,6 +10,8 @@ class HabitoDeleteTestCase(HabitoCommandTestCase):
         habit = self.create_habit()
         self.add_summary(habit)
         self._run_command(habito.commands.checkin, [habit.name, "-q 3"])
+        self._run_command(habito.commands.checkin, [habit.name, "-q 2"])
+        self._run_command(habito.commands.compact, ["--before", "tomorrow"])
 
         delete_result = self._run_command_with_stdin(habito.commands.delete, ["1"], "y")
 
@@ -23,6 +25,8 @@ class HabitoDeleteTestCase(HabitoCommandTestCase):
             in delete_result.output
         )
         assert habito.models.Habit.select().count() == 0
+        assert habito.models.DailyTotal.select().count() == 0
+        assert habito.models.ActivityArchive.select().count() == 0
 
     def test_delete_should_not_delete_for_no_confirm(self):
         habit = self.create_habit()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""Tests for dev command."""
+
+import os
+from unittest.mock import patch
+
+import habito
+import habito.commands
+from habito import models
+from tests.commands import HabitoCommandTestCase
+
+
+class HabitoDevTestCase(HabitoCommandTestCase):
+    def test_dev_seed_adds_habits_with_activities(self):
+        result = self._run_command(
+            habito.commands.dev,
+            ["seed", "-n", "4", "-y", "1", "-c", "2", "--database", ":memory:"],
+        )
+
+        count = models.Activity.select().count()
+        assert result.exit_code == 0
+        assert f"Added 4 habits with {count} activities." in result.output
+        assert models.Habit.select().count() == 4
+        assert models.Summary.select().count() == 4
+        assert models.DailyTotal.select().count() <= 4 * 365
+        assert 0 < count <= 4 * 365 * 2
+
+    def test_dev_seed_is_repeatable_for_a_seed(self):
+        seed = habito.commands.dev.commands["seed"].callback
+        activities = []
+        for _ in range(2):
+            seed(habits=2, years=1, checkins=3, seed=7, database=":memory:")
+            activities.append(
+                [(a.quantum, a.update_date.date()) for a in models.Activity.select()]
+            )
+
+        assert activities[0] == activities[1]
+
+    def test_dev_seed_adds_data_to_database(self):
+        with self.runner.isolated_filesystem():
+            result = self._run_command(
+                habito.commands.dev, ["seed", "-n", "1", "--database", "seed.db"]
+            )
+
+            assert result.exit_code == 0
+            assert os.path.exists("seed.db")
+            assert models.db.database == "seed.db"
+            models.db.close()
+            # Leave the database in memory for `tearDown`
+            models.setup(":memory:")
+
+    def test_dev_seed_requires_database(self):
+        result = self._run_command(habito.commands.dev, ["seed", "-n", "1"])
+
+        assert result.exit_code == 2
+        assert "Missing option '--database'" in result.output
+
+    def test_dev_seed_refuses_habito_database(self):
+        with self.runner.isolated_filesystem():
+            with patch("habito.commands.database_name", "habito.db"):
+                result = self._run_command(
+                    habito.commands.dev, ["seed", "--database", "./habito.db"]
+                )
+
+            assert result.exit_code == 1
+            assert "Refusing to add random data" in result.output
+            assert not os.path.exists("habito.db")
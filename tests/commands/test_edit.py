@@ -34,6 +34,15 @@ class HabitoEditTestCase(HabitoCommandTestCase):
         assert "3.0" in list_result.output
         assert "0.0" not in list_result.output
 
+    def test_edit_quantum_recomputes_streak(self):
+        habit = self.create_habit(quantum=1)
+        self.add_summary(habit)
+        self._run_command(habito.commands.checkin, [habit.name, "-q 2"])
+
+        self._run_command(habito.commands.edit, [str(habit.id), "-q 3.0"])
+
+        assert habito.models.Summary.get().streak == 0
+
     def test_non_existing_edit(self):
         edit_result = self._run_command(habito.commands.edit, [str(10), "-n test"])
 
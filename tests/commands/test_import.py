@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""Tests for import command."""
+import json
+from datetime import datetime
+
+import habito
+import habito.commands
+from habito import models
+from tests.commands import HabitoCommandTestCase
+
+
+class HabitoImportTestCase(HabitoCommandTestCase):
+    def setUp(self):
+        super().setUp()
+        self.habit = self.create_habit(quantum=2)
+        self.add_summary(self.habit)
+        self.today = datetime.now().date()
+        self.yesterday = self.one_day_ago.date()
+
+    def test_import_adds_activities_from_csv(self):
+        records = (
+            "habit,date,quantum\n"
+            f"HabitOne,{self.yesterday},1.0\n"
+            f"HabitOne,{self.yesterday}T10:00:00,2.0\n"
+            f"1,{self.today},3.0\n"
+        )
+
+        result = self._run_command_with_stdin(habito.commands.import_, ["-"], records)
+
+        assert result.exit_code == 0
+        assert "Imported 3 activities for 1 habits." in result.output
+        assert models.Activity.select().count() == 3
+        totals = models.DailyTotal.select().order_by(models.DailyTotal.day)
+        assert [(t.total_quantum, t.count) for t in totals] == [(3.0, 2), (3.0, 1)]
+        assert models.Summary.get().streak == 2
+
+    def test_import_adds_activities_from_jsonl(self):
+        habit_two = self.create_habit(name="Running", quantum=2)
+        self.add_summary(habit_two)
+        records = [
+            {"habit": "Running", "date": str(self.today), "quantum": 2},
+            {"habit": habit_two.id, "date": str(self.yesterday), "quantum": 2},
+            {"habit": "HabitOne", "date": str(self.today), "quantum": 1},
+        ]
+        stdin = "\n".join(json.dumps(r) for r in records) + "\n\n"
+
+        result = self._run_command_with_stdin(
+            habito.commands.import_, ["-", "--format", "jsonl"], stdin
+        )
+
+        assert result.exit_code == 0
+        assert "Imported 3 activities for 2 habits." in result.output
+        assert models.Summary.get(for_habit=habit_two).streak == 2
+        assert models.Summary.get(for_habit=self.habit).streak == 0
+
+    def test_import_infers_format_from_file_extension(self):
+        with self.runner.isolated_filesystem():
+            with open("activities.jsonl", "w") as f:
+                f.write(json.dumps({"habit": "Habit", "date": "2020-01-01", "q": 1}))
+
+            result = self._run_command(habito.commands.import_, ["activities.jsonl"])
+
+        assert result.exit_code == 1
+        assert "Line 1: missing field 'quantum'." in result.output
+
+    def test_import_fails_for_invalid_records(self):
+        self.create_habit(name="HabitTwo")
+        cases = [
+            ("habit,date\nHabitOne,2020-01-01\n", "Line 2: missing field"),
+            ("habit,date,quantum\nHabitOne,2020-01-01,x\n", "Line 2: could not"),
+            ("habit,date,quantum\nHabitOne,01/01,1\n", "Line 2: Invalid isoformat"),
+            ("habit,date,quantum\nHabitOne,2020-01-01,1\nAbc,2020-01-01,1", "Line 3"),
+            ("habit,date,quantum\nHabit,2020-01-01,1\n", "More than one habits"),
+            ("habit,date,quantum\n20,2020-01-01,1\n", "No habit matched"),
+        ]
+        for records, error in cases:
+            result = self._run_command_with_stdin(
+                habito.commands.import_, ["-"], records
+            )
+
+            assert result.exit_code == 1
+            assert error in result.output
+            assert "No activities were imported." in result.output
+            assert models.Activity.select().count() == 0
+
+    def test_import_fails_for_invalid_json(self):
+        result = self._run_command_with_stdin(
+            habito.commands.import_, ["-", "-f", "jsonl"], '{"habit": 1,\n'
+        )
+
+        assert result.exit_code == 1
+        assert "Line 1: invalid JSON." in result.output
+
+    def test_import_inserts_activities_in_batches(self):
+        activities = [
+            {"for_habit": self.habit.id, "quantum": 1.0, "update_date": datetime.now()}
+            for _ in range(5)
+        ]
+
+        count, habit_ids = models.Activity.add_many(iter(activities), batch_size=2)
+
+        assert count == 5
+        assert habit_ids == {self.habit.id}
+        assert models.DailyTotal.get().count == 5
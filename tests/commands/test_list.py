@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
 """Tests for list command."""
+import os
+import tempfile
 from datetime import datetime, timedelta
 from unittest.mock import patch
 
 import habito
 import habito.commands
+from habito import models
 from tests.commands import HabitoCommandTestCase
 
 
@@ -25,8 +28,8 @@ class HabitoListCommandTestCase(HabitoCommandTestCase):
             habito.commands.list, ["-l", "-f", "csv", "-d", "13 days"]
         )
 
-        # 1 habit for 13 days = 15 data points incl header and footer
-        assert 15 == len(result.output.splitlines())
+        # 1 habit for 13 days = 14 data points incl header
+        assert 14 == len(result.output.splitlines())
 
     def test_habito_list_csv_invalid_from_date(self):
         habit_one = self.create_habit()
@@ -44,19 +47,53 @@ class HabitoListCommandTestCase(HabitoCommandTestCase):
         self.add_summary(habit_one)
         self.add_summary(habit_two)
         three_days_back = (datetime.now() - timedelta(days=3)).date()
-        self._run_command(habito.commands.checkin, ["One", "-q 3.0"])
-        self._run_command(habito.commands.checkin, ["One", "-q 2.0"])
+        self._run_command(habito.commands.checkin, ["HabitOne", "-q 3.0"])
+        self._run_command(habito.commands.checkin, ["HabitOne", "-q 2.0"])
 
         result = self._run_command(habito.commands.list, ["-l", "-f", "csv"])
 
-        # 2 habits for 7 days = 16 data points incl header and footer
+        # 2 habits for 7 days = 15 data points incl header
         assert "id,name,goal,units,date,activity" in result.output
         assert (
             f"1,HabitOne,0.0,dummy_units,{datetime.now().date()},5.0" in result.output
         )
         assert f"1,HabitOne,0.0,dummy_units,{three_days_back},0.0" in result.output
         assert f"2,HabitTwo,0.0,dummy_units,{three_days_back},0.0" in result.output
-        assert 16 == len(result.output.splitlines())
+        assert 15 == len(result.output.splitlines())
+
+    def test_habito_list_csv_is_ordered_by_date_and_habit(self):
+        habit_one = self.create_habit()
+        habit_two = self.create_habit(name="HabitTwo")
+        self.add_summary(habit_one)
+        self.add_summary(habit_two)
+        self.add_activity(habit_two, 2.0, self.one_day_ago)
+
+        result = self._run_command(habito.commands.list, ["-f", "csv", "-d", "2 days"])
+
+        today = datetime.now().date()
+        yesterday = self.one_day_ago.date()
+        assert result.output.splitlines() == [
+            "id,name,goal,units,date,activity",
+            f"1,HabitOne,0.0,dummy_units,{yesterday},0.0",
+            f"2,HabitTwo,0.0,dummy_units,{yesterday},2.0",
+            f"1,HabitOne,0.0,dummy_units,{today},0.0",
+            f"2,HabitTwo,0.0,dummy_units,{today},0.0",
+        ]
+
+    def test_habito_list_csv_writes_to_output_file(self):
+        habit = self.create_habit()
+        self.add_summary(habit)
+
+        with self.runner.isolated_filesystem():
+            result = self._run_command(
+                habito.commands.list, ["-f", "csv", "-o", "report.csv"]
+            )
+            with open("report.csv") as f:
+                report = f.read()
+
+        assert result.output == ""
+        assert report.startswith("id,name,goal,units,date,activity\n1,HabitOne")
+        assert 8 == len(report.splitlines())
 
     def test_habito_list_lists_off_track_habits(self):
         habit = self.create_habit()
@@ -101,6 +138,26 @@ class HabitoListCommandTestCase(HabitoCommandTestCase):
 
         assert "10 days" in result.output
 
+    def test_habito_list_table_runs_same_queries_for_any_number_of_habits(self):
+        def count_queries():
+            with patch.object(
+                models.db, "execute_sql", wraps=models.db.execute_sql
+            ) as execute_mock:
+                result = self._run_command(habito.commands.list)
+            assert result.exit_code == 0
+            return execute_mock.call_count
+
+        habit = self.create_habit()
+        self.add_summary(habit, streak=1)
+        self.add_activity(habit)
+        queries = count_queries()
+        for i in range(5):
+            habit = self.create_habit(name=f"Habit {i}")
+            self.add_summary(habit, streak=i)
+            self.add_activity(habit)
+
+        assert count_queries() == queries
+
     @patch("shutil.get_terminal_size")
     def test_habito_list_table_adapts_to_terminal_width(self, term_mock):
         for terminal_width in range(0, 101, 5):
@@ -117,3 +174,59 @@ class HabitoListCommandTestCase(HabitoCommandTestCase):
                         dt=(datetime.now() - timedelta(days=i))
                     )
                     assert date_string in result.output
+
+
+class HabitoListCacheTestCase(HabitoCommandTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        models.setup(os.path.join(self.tmp.name, "habito.db"))
+        app_dir = patch("click.get_app_dir", return_value=self.tmp.name)
+        app_dir.start()
+        self.addCleanup(app_dir.stop)
+        self.habit = self.create_habit()
+        self.add_summary(self.habit)
+
+    def tearDown(self):
+        super().tearDown()
+        models.db.close()
+        self.tmp.cleanup()
+
+    def test_habito_list_table_reads_cached_output(self):
+        first = self._run_command(habito.commands.list, ["-l"])
+        with patch("habito.models.get_daily_activities") as get_daily_activities:
+            second = self._run_command(habito.commands.list, ["-l"])
+
+        assert not get_daily_activities.called
+        assert second.exit_code == 0
+        assert second.output == first.output
+        assert "HabitOne" in second.output
+
+    def test_habito_list_csv_reads_cached_output(self):
+        args = ["-f", "csv", "-d", "2 days"]
+        first = self._run_command(habito.commands.list, args)
+        with patch("habito.models.get_daily_activity_rows") as get_rows:
+            second = self._run_command(habito.commands.list, args)
+
+        assert not get_rows.called
+        assert second.output == first.output
+        assert len(second.output.splitlines()) == 3
+
+    def test_habito_list_shows_changes_after_writes(self):
+        self._run_command(habito.commands.list, ["-l"])
+        self._run_command(habito.commands.checkin, ["HabitOne", "-q 9.1"])
+
+        result = self._run_command(habito.commands.list, ["-l"])
+
+        assert "9.1" in result.output
+        assert len(os.listdir(os.path.join(self.tmp.name, "cache"))) == 1
+
+    def test_habito_list_skips_cache_with_no_cache(self):
+        self._run_command(habito.commands.list, ["-l"])
+        with patch(
+            "habito.models.get_daily_activities", return_value=[]
+        ) as get_daily_activities:
+            result = self._run_command(habito.commands.list, ["-l", "--no-cache"])
+
+        assert get_daily_activities.called
+        assert "HabitOne" not in result.output
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""Tests for perf command."""
+import os
+import tempfile
+from unittest.mock import patch
+
+import habito
+import habito.commands
+from habito import telemetry
+from tests.commands import HabitoCommandTestCase
+
+
+class HabitoPerfTestCase(HabitoCommandTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, telemetry.FILE_NAME)
+        patcher = patch("habito.telemetry.get_path", return_value=self.path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_perf_report_shows_message_without_telemetry(self):
+        result = self._run_command(habito.commands.perf, ["report"])
+
+        assert result.exit_code == 0
+        assert "No telemetry recorded. Set HABITO_TELEMETRY=1" in result.output
+
+    def test_perf_report_shows_percentiles_of_recent_commands(self):
+        self._write_records("list", [300.0, 100.0, 200.0])
+        self._write_records("checkin", [50.0])
+
+        result = self._run_command(habito.commands.perf, ["report", "--last", "3"])
+
+        assert result.exit_code == 0
+        assert "Last 3 commands" in result.output
+        rows = [r.split() for r in result.output.splitlines() if "fetch" in r]
+        assert rows[0][1:10:2] == ["list", "fetch", "2", "100.0", "200.0"]
+        assert rows[1][1:10:2] == ["checkin", "fetch", "1", "50.0", "50.0"]
+
+    def test_perf_report_filters_by_command(self):
+        self._write_records("list", [300.0])
+        self._write_records("checkin", [50.0])
+
+        args = ["report", "--command", "list", "--last", "1"]
+        result = self._run_command(habito.commands.perf, args)
+
+        assert result.exit_code == 0
+        assert "Last 1 commands" in result.output
+        assert "checkin" not in result.output
+
+    def _write_records(self, command, times):
+        for ms in times:
+            record = {
+                "command": command,
+                "total_ms": ms + 1,
+                "phases": {"fetch": {"ms": ms, "peak_kb": 10.0}},
+            }
+            telemetry.write_record(self.path, record)
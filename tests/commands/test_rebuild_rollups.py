@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""Tests for rebuild-rollups command."""
+
+import habito
+import habito.commands
+from habito import models
+from tests.commands import HabitoCommandTestCase
+
+
+class HabitoRebuildRollupsTestCase(HabitoCommandTestCase):
+    def test_rebuild_rollups_regenerates_daily_totals(self):
+        habit = self.create_habit()
+        models.Activity.create(
+            for_habit=habit, quantum=3.0, update_date=self.one_day_ago
+        )
+        models.Activity.create(
+            for_habit=habit, quantum=2.0, update_date=self.one_day_ago
+        )
+        models.Activity.create(
+            for_habit=habit, quantum=1.0, update_date=self.two_days_ago
+        )
+
+        result = self._run_command(habito.commands.rebuild_rollups)
+
+        totals = models.DailyTotal.select().order_by(models.DailyTotal.day)
+        assert result.exit_code == 0
+        assert "Rebuilt 2 daily totals" in result.output
+        assert [t.total_quantum for t in totals] == [1.0, 5.0]
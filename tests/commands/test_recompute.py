@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""Tests for recompute command."""
+
+import habito
+import habito.commands
+from habito import models
+from tests.commands import HabitoCommandTestCase
+
+
+class HabitoRecomputeTestCase(HabitoCommandTestCase):
+    def test_recompute_updates_streaks_of_all_habits(self):
+        for name in ["HabitOne", "HabitTwo"]:
+            habit = self.create_habit(name, quantum=1.0)
+            self.add_summary(habit, streak=7)
+            self.add_activity(habit, 1.0, self.one_day_ago)
+            self.add_activity(habit, 2.0, self.two_days_ago)
+
+        result = self._run_command(habito.commands.recompute)
+
+        assert result.exit_code == 0
+        assert "Recomputed streaks of 2 habits." in result.output
+        assert [s.streak for s in models.Summary.select()] == [2, 2]
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""Tests for serve command."""
+from unittest.mock import patch
+
+import habito
+import habito.commands
+from tests.commands import HabitoCommandTestCase
+
+
+@patch("signal.signal")
+class HabitoServeTestCase(HabitoCommandTestCase):
+    @patch("habito.daemon.serve")
+    def test_serve_runs_server_till_interrupted(self, serve, signal):
+        def run(path, ready):
+            ready(None)
+            raise KeyboardInterrupt()
+
+        serve.side_effect = run
+
+        args = ["--socket", "/tmp/habito.sock"]
+        result = self._run_command(habito.commands.serve, args)
+
+        assert result.exit_code == 0
+        assert serve.call_args[0][0] == "/tmp/habito.sock"
+        assert "Serving habito on /tmp/habito.sock." in result.output
+        assert "Stopped." in result.output
+        assert signal.called
+
+    @patch("habito.daemon.serve")
+    def test_serve_shows_error_if_server_is_running(self, serve, signal):
+        serve.side_effect = RuntimeError("habito is already served on x.")
+
+        with patch("habito.daemon.get_socket_path", return_value="x"):
+            result = self._run_command(habito.commands.serve)
+
+        assert result.exit_code == 1
+        assert serve.call_args[0][0] == "x"
+        assert "habito is already served on x." in result.output
+
+    def test_serve_shows_error_without_unix_sockets(self, signal):
+        with patch("habito.daemon.socket", spec=[]):
+            result = self._run_command(habito.commands.serve, ["--socket", "x"])
+
+        assert result.exit_code == 1
+        assert "habito serve is not supported on this platform." in result.output
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""Tests for stats command."""
+from datetime import datetime, timedelta
+
+import habito
+import habito.commands
+from tests.commands import HabitoCommandTestCase
+
+
+class HabitoStatsTestCase(HabitoCommandTestCase):
+    def test_stats_shows_message_without_habits(self):
+        result = self._run_command(habito.commands.stats)
+
+        assert result.exit_code == 0
+        assert "No habits to show statistics." in result.output
+
+    def test_stats_shows_statistics_of_habits(self):
+        start_date = (datetime.now() - timedelta(days=3)).date()
+        habit = self.create_habit(quantum=2.0, start_date=start_date)
+        self.create_habit(name="HabitTwo", quantum=1.0, minimize=True)
+        for days_ago in [3, 2, 1]:
+            self.add_activity(habit, 2.0, datetime.now() - timedelta(days=days_ago))
+
+        result = self._run_command(habito.commands.stats)
+
+        assert result.exit_code == 0
+        rows = [r for r in result.output.splitlines() if "HabitOne" in r]
+        assert len(rows) == 2
+        for value in ["2.0", "100%", "1.50", "3 days"]:
+            assert value in rows[0]
+        assert "<1.0" in result.output
+        assert "Activity by weekday" in result.output
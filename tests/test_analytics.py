@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""Tests for habito analytics."""
+
+from datetime import date, datetime
+from unittest.mock import patch
+
+import pytest
+
+import habito.models as models
+from habito import analytics
+from tests import HabitoTestCase
+
+# Sunday. Habits start on Friday, 10 days before.
+TODAY = date(2024, 1, 14)
+START = date(2024, 1, 5)
+
+
+class AnalyticsTests(HabitoTestCase):
+    backends = ["numpy", "array"]
+
+    def setUp(self):
+        models.setup(":memory:")
+
+    def tearDown(self):
+        models.db.drop_tables(
+            [models.Habit, models.Activity, models.DailyTotal, models.Summary],
+            safe=True,
+        )
+
+    def test_get_stats_for_daily_habit(self):
+        habit = self.create_habit(quantum=2, start_date=START)
+        for day, quantum in [(4, 9), (5, 2), (6, 3), (7, 1), (8, 2), (9, 2)]:
+            self._add_activity(habit, day, quantum)
+        for day, quantum in [(10, 1), (10, 1), (12, 4), (13, 2), (15, 9)]:
+            self._add_activity(habit, day, quantum)
+
+        for backend in self.backends:
+            stats = analytics.get_stats(TODAY, backend)
+
+            assert len(stats) == 1
+            s = stats[0]
+            assert s.habit.id == habit.id
+            assert s.days == 10
+            assert s.completion_rate == pytest.approx(7 / 9)
+            assert s.average_7 == pytest.approx(12 / 7)
+            assert s.average_30 == pytest.approx(18 / 10)
+            assert (s.current_streak, s.best_streak) == (2, 3)
+            assert s.weekdays == [2.0, 2.0, 2.0, 0.0, 6.0, 5.0, 1.0]
+
+    def test_get_stats_for_habit_with_frequency(self):
+        habit = self.create_habit(quantum=3, frequency=3, start_date=START)
+        for day, quantum in [(5, 1), (7, 2), (9, 2), (11, 3), (14, 5)]:
+            self._add_activity(habit, day, quantum)
+
+        for backend in self.backends:
+            s = analytics.get_stats(TODAY, backend)[0]
+
+            assert s.completion_rate == pytest.approx(3 / 4)
+            assert (s.current_streak, s.best_streak) == (2, 2)
+
+    def test_get_stats_for_minimize_habit(self):
+        start_date = date(2024, 1, 12)
+        habit = self.create_habit(quantum=2, minimize=True, start_date=start_date)
+        self._add_activity(habit, 12, 1)
+        self._add_activity(habit, 14, 3)
+
+        for backend in self.backends:
+            s = analytics.get_stats(TODAY, backend)[0]
+
+            # No activity on 13th, goal is not met. Today is not counted.
+            assert s.days == 3
+            assert s.completion_rate == pytest.approx(1 / 2)
+            assert s.average_7 == pytest.approx(4 / 3)
+            assert (s.current_streak, s.best_streak) == (0, 1)
+
+    def test_get_stats_skips_inactive_habits(self):
+        self.create_habit(start_date=START, active=False)
+
+        for backend in self.backends:
+            assert analytics.get_stats(TODAY, backend) == []
+
+    def test_get_stats_is_empty_for_habit_starting_after_today(self):
+        habit = self.create_habit(start_date=date(2024, 1, 20))
+
+        for backend in self.backends:
+            stats = analytics.get_stats(TODAY, backend)
+
+            assert stats == [analytics.HabitStats(habit, 0)]
+
+    def test_get_stats_uses_created_date_and_today_by_default(self):
+        habit = self.create_habit(start_date=None)
+        models.Habit.update(created_date=datetime.now()).execute()
+        self.add_activity(habit, 1.0)
+
+        stats = analytics.get_stats()
+
+        assert stats[0].days == 1
+        assert stats[0].completion_rate == 1.0
+
+    def test_get_stats_raises_for_unknown_backend(self):
+        with pytest.raises(ValueError, match="Unknown backend 'dummy'"):
+            analytics.get_stats(TODAY, "dummy")
+
+    def test_get_stats_uses_array_backend_without_numpy(self):
+        habit = self.create_habit(quantum=1, start_date=START)
+        self._add_activity(habit, 14, 1)
+
+        with patch.object(analytics, "np", None):
+            stats = analytics.get_stats(TODAY)
+            with pytest.raises(ValueError, match="NumPy is not installed"):
+                analytics.get_stats(TODAY, "numpy")
+
+        assert stats[0].current_streak == 1
+
+    def _add_activity(self, habit, day, quantum):
+        self.add_activity(habit, quantum, datetime(2024, 1, day, 9, 30))
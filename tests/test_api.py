@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""Tests for the HTTP API."""
+
+import json
+import os
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+import habito.models as models
+from habito import api
+from tests import HabitoTestCase
+
+
+class ApiTestCase(HabitoTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        models.setup(os.path.join(self.tmp.name, "habito.db"))
+        self.running = self.create_habit("Running", quantum=3.0)
+        self.reading = self.create_habit("Reading", quantum=1.0)
+        self.add_summary(self.running)
+        self.add_summary(self.reading)
+
+    def tearDown(self):
+        models.db.close()
+        self.tmp.cleanup()
+
+
+class CheckinWriterTests(ApiTestCase):
+    def test_writer_commits_concurrent_checkins_together(self):
+        writer = api.CheckinWriter(window=0.5).start()
+        now = datetime.now()
+        habits = [self.running, self.reading, self.running, self.running]
+
+        results = [None] * len(habits)
+
+        def checkin(i):
+            results[i] = writer.checkin(habits[i], 1.0, now)
+
+        update = models.Summary.update_streak_batch
+        with patch.object(
+            models.Summary, "update_streak_batch", wraps=update
+        ) as update_streak:
+            threads = [threading.Thread(target=checkin, args=(i,)) for i in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            writer.stop()
+
+        assert writer.commits == 1
+        assert update_streak.call_count == 2
+        assert [r[1] for r in results] == [1, 1, 1, 1]
+        assert models.Summary.get(for_habit=self.running).slot_quantum == 3.0
+        assert models.Summary.get(for_habit=self.reading).streak == 1
+        assert models.Activity.select().count() == 4
+
+    def test_writer_limits_checkins_in_a_commit(self):
+        writer = api.CheckinWriter(window=0.5, max_batch=2)
+        for _ in range(4):
+            writer._queue.put(((self.running, 1.0, datetime.now()), Future()))
+        writer.start().stop()
+
+        assert writer.commits == 2
+        assert models.Activity.select().count() == 4
+
+    def test_writer_fails_only_invalid_checkins(self):
+        no_summary = self.create_habit("NoSummary")
+        writer = api.CheckinWriter(window=0.5)
+        futures = [Future(), Future()]
+        writer._queue.put(((no_summary, 1.0, datetime.now()), futures[0]))
+        writer._queue.put(((self.running, 1.0, datetime.now()), futures[1]))
+        writer.start().stop()
+
+        with pytest.raises(models.Summary.DoesNotExist):
+            futures[0].result()
+        activity, streak = futures[1].result()
+        assert activity.for_habit.id == self.running.id
+        assert streak == 0
+        assert writer.commits == 3
+        assert models.Activity.select().count() == 1
+
+    def test_writer_fails_pending_checkins_if_it_fails(self):
+        writer = api.CheckinWriter(window=0.01, max_batch=1)
+        futures = [Future(), Future()]
+        for future in futures:
+            writer._queue.put(((self.running, 1.0, datetime.now()), future))
+
+        with patch.object(writer, "_commit", side_effect=RuntimeError("Failed.")):
+            writer.start()
+            writer._thread.join(5)
+
+        assert not writer._thread.is_alive()
+        for future in futures:
+            with pytest.raises(RuntimeError, match="Failed."):
+                future.result(timeout=0)
+
+    def test_writer_times_out_checkins_which_are_not_committed(self):
+        writer = api.CheckinWriter(timeout=0.01)
+
+        with pytest.raises(api.ApiError) as e:
+            writer.checkin(self.running, 1.0, datetime.now())
+
+        assert e.value.status == 503
+        assert models.Activity.select().count() == 0
+
+
+class ApiServerTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        started = threading.Event()
+
+        def ready(server):
+            self.server = server
+            started.set()
+
+        self.thread = threading.Thread(target=api.serve, args=(0, 0.01, ready))
+        self.thread.start()
+        assert started.wait(5)
+        self.url = "http://{}:{}".format(*self.server.server_address[:2])
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        assert not self.server.writer._thread.is_alive()
+        super().tearDown()
+
+    def test_api_gets_habits_with_streaks(self):
+        models.Summary.update(streak=2).where(
+            models.Summary.for_habit == self.running
+        ).execute()
+
+        status, habits = self._request("/habits")
+
+        assert status == 200
+        assert [h["name"] for h in habits] == ["Running", "Reading"]
+        assert habits[0]["streak"] == 2
+        assert habits[0]["quantum"] == 3.0
+
+    def test_api_gets_daily_activities(self):
+        yesterday = datetime.now() - timedelta(days=1)
+        self.add_activity(self.running, 2.0, yesterday)
+
+        status, activities = self._request("/activities?days=2")
+
+        assert status == 200
+        assert activities[0]["habit"] == self.running.id
+        assert activities[0]["days"][1] == {
+            "date": yesterday.date().isoformat(),
+            "quantum": 2.0,
+        }
+        assert activities[1]["days"][0]["quantum"] is None
+        for days in ["0", "x"]:
+            status, error = self._request(f"/activities?days={days}")
+            assert status == 400
+            assert error["error"] == "days must be a positive integer."
+
+    def test_api_gets_summaries(self):
+        self.add_activity(self.running, 3.0)
+        models.Summary.update_streak(self.running)
+
+        status, summaries = self._request("/summaries")
+
+        assert status == 200
+        assert summaries[0]["habit"] == self.running.id
+        assert summaries[0]["streak"] == 1
+        assert summaries[0]["slot_start"] == datetime.now().date().isoformat()
+        assert summaries[1]["slot_start"] is None
+
+    def test_api_adds_checkins(self):
+        body = {"habit": "run", "quantum": 3}
+        status, checkin = self._request("/checkins", body)
+
+        assert status == 201
+        assert checkin["habit"] == self.running.id
+        assert checkin["quantum"] == 3.0
+        assert checkin["streak"] == 1
+
+        body = {"habit": self.reading.id, "quantum": 1, "date": "yesterday"}
+        status, checkin = self._request("/checkins", body)
+
+        assert status == 201
+        yesterday = (datetime.now() - timedelta(days=1)).date().isoformat()
+        assert checkin["date"].startswith(yesterday)
+
+    def test_api_shows_errors_for_invalid_checkins(self):
+        self.create_habit("Runner")
+        cases = [
+            ({"habit": "Running"}, 400, "Body must be a JSON object"),
+            ({"habit": 1, "quantum": 1, "date": "someday"}, 400, "Unable to parse"),
+            ({"habit": 100, "quantum": 1}, 404, "No habit matched '100'."),
+            ({"habit": "Run", "quantum": 1}, 404, "More than one habits"),
+            ({"habit": 1, "quantum": "NaN"}, 400, "quantum must be a finite"),
+            ({"habit": 1, "quantum": float("inf")}, 400, "quantum must be a finite"),
+            ({"habit": True, "quantum": 1}, 400, "habit must be an id or a name"),
+            ({"habit": False, "quantum": 1}, 400, "habit must be an id or a name"),
+        ]
+        for body, expected_status, expected_error in cases:
+            status, error = self._request("/checkins", body)
+
+            assert status == expected_status
+            assert error["error"].startswith(expected_error)
+
+    def test_api_shows_errors_for_unknown_paths_and_failures(self):
+        status, error = self._request("/dummy")
+        assert status == 404
+        assert error["error"] == "Unknown path /dummy."
+
+        with patch("habito.api.get_habits", side_effect=RuntimeError("Failed.")):
+            status, error = self._request("/habits")
+        assert status == 500
+        assert error["error"] == "Failed."
+
+    def test_api_rejects_foreign_hosts(self):
+        port = self.server.server_address[1]
+        for host in ["localhost", f"localhost:{port}", f"[::1]:{port}"]:
+            status, _ = self._request("/habits", headers={"Host": host})
+            assert status == (200 if ":" in host else 403)
+
+        for host in ["example.com", f"example.com:{port}", f"127.0.0.2:{port}"]:
+            body = {"habit": "run", "quantum": 3}
+            status, error = self._request("/checkins", body, headers={"Host": host})
+
+            assert status == 403
+            assert error["error"] == "Host must be localhost."
+        assert models.Activity.select().count() == 0
+
+    def test_api_requires_json_content_type_for_checkins(self):
+        body = {"habit": "run", "quantum": 3}
+        for content_type in ["text/plain", "application/x-www-form-urlencoded"]:
+            headers = {"Content-Type": content_type}
+            status, error = self._request("/checkins", body, headers=headers)
+
+            assert status == 415
+            assert error["error"] == "Content-Type must be application/json."
+        assert models.Activity.select().count() == 0
+
+        headers = {"Content-Type": "application/json; charset=utf-8"}
+        status, _ = self._request("/checkins", body, headers=headers)
+        assert status == 201
+
+    def _request(self, path, body=None, headers=None):
+        data = None if body is None else json.dumps(body).encode("utf-8")
+        headers = headers or {}
+        if data is not None:
+            headers.setdefault("Content-Type", "application/json")
+        request = urllib.request.Request(self.url + path, data=data, headers=headers)
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""Tests for the output cache."""
+
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+import pytest
+
+from habito import cache
+
+
+class OutputCacheTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, cache.DIR_NAME)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    @patch("click.get_app_dir")
+    def test_get_dir_is_in_app_directory(self, app_dir):
+        app_dir.return_value = self.tmp.name
+
+        assert cache.get_dir() == self.path
+
+    def test_cache_stores_output_for_marker_and_key(self):
+        entry = cache.OutputCache("list", "1", ("table", 80), self.path)
+        assert entry.get() is None
+
+        with entry.open() as f:
+            f.write("output")
+
+        path = cache.OutputCache("list", "1", ("table", 80), self.path).get()
+        with open(path) as f:
+            assert f.read() == "output"
+        assert cache.OutputCache("list", "2", ("table", 80), self.path).get() is None
+        assert cache.OutputCache("list", "1", ("table", 81), self.path).get() is None
+
+    def test_cache_removes_outputs_for_older_markers(self):
+        for marker, key in [("1", "a"), ("2", "a"), ("2", "b")]:
+            with cache.OutputCache("list", marker, key, self.path).open() as f:
+                f.write(marker + key)
+        open(os.path.join(self.path, "other-1"), "w").close()
+
+        with patch("os.remove", side_effect=OSError()):
+            with cache.OutputCache("list", "3", "a", self.path).open() as f:
+                f.write("3a")
+        with cache.OutputCache("list", "3", "a", self.path).open() as f:
+            f.write("3a")
+
+        files = sorted(os.listdir(self.path))
+        assert len(files) == 2
+        assert files[0].startswith("list-3-")
+        assert files[1] == "other-1"
+
+    def test_cache_discards_output_for_errors(self):
+        entry = cache.OutputCache("list", "1", "a", self.path)
+
+        with pytest.raises(ValueError):
+            with entry.open() as f:
+                f.write("partial")
+                raise ValueError()
+
+        assert entry.get() is None
+        assert os.listdir(self.path) == []
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""Tests for the habito server."""
+
+import os
+import socket
+import tempfile
+import threading
+from unittest.mock import patch
+
+import click
+import pytest
+
+import habito.commands
+import habito.models as models
+from habito import cache, daemon
+from tests import HabitoTestCase
+
+unix_sockets = pytest.mark.skipif(
+    not hasattr(socket, "AF_UNIX"), reason="Unix sockets are not supported."
+)
+
+
+class CanForwardTests(HabitoTestCase):
+    def test_can_forward_list_and_noninteractive_checkin(self):
+        cases = [
+            ([], False),
+            (["add", "Run", "1"], False),
+            (["list"], True),
+            (["list", "-f", "csv"], True),
+            (["checkin", "Run"], False),
+            (["checkin", "Run", "-q", "1"], True),
+            (["checkin", "Run", "--quantum=1"], True),
+            (["checkin", "-r", "-q", "1"], False),
+            (["checkin", "--review"], False),
+        ]
+        for args, expected in cases:
+            assert habito.commands.can_forward(args) is expected, args
+
+    @unix_sockets
+    def test_forward_returns_none_without_server(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, daemon.SOCKET_NAME)
+
+            assert daemon.forward(path, ["list"]) is None
+            assert daemon.is_serving(path) is False
+
+    @unix_sockets
+    def test_forward_returns_none_for_invalid_responses(self):
+        for response in [b"", b"{invalid\n"]:
+            with self._listen() as (path, server):
+
+                def respond():
+                    conn, _ = server.accept()
+                    with conn:
+                        conn.recv(1024)
+                        conn.sendall(response)
+
+                thread = threading.Thread(target=respond)
+                thread.start()
+                assert daemon.forward(path, ["list"]) is None, response
+                thread.join()
+
+    @unix_sockets
+    @patch("habito.daemon.READ_TIMEOUT", 0.1)
+    def test_forward_returns_none_if_server_does_not_respond(self):
+        with self._listen() as (path, server):
+            # Connection waits in the backlog of the server, which never reads it
+            assert daemon.forward(path, ["list"]) is None
+
+    def test_forward_and_serve_without_unix_sockets(self):
+        with patch("habito.daemon.socket", spec=[]):
+            assert daemon.forward("habito.sock", ["list"]) is None
+            assert daemon.is_serving("habito.sock") is False
+            with pytest.raises(RuntimeError, match="not supported on this platform"):
+                daemon.serve("habito.sock")
+
+    def test_get_socket_path_is_in_app_directory(self):
+        with patch("click.get_app_dir", return_value="/tmp/habito"):
+            assert daemon.get_socket_path() == "/tmp/habito/habito.sock"
+            with patch.dict(os.environ, {daemon.SOCKET_ENV: "/tmp/h.sock"}):
+                assert daemon.get_socket_path() == "/tmp/h.sock"
+
+    def _listen(self):
+        class Listener:
+            def __enter__(self):
+                self.tmp = tempfile.TemporaryDirectory()
+                path = os.path.join(self.tmp.name, daemon.SOCKET_NAME)
+                self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self.server.bind(path)
+                self.server.listen(1)
+                return path, self.server
+
+            def __exit__(self, *args):
+                self.server.close()
+                self.tmp.cleanup()
+
+        return Listener()
+
+
+@unix_sockets
+class ServerTests(HabitoTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.user_cache = cache.get_dir()
+        models.setup(os.path.join(self.tmp.name, "habito.db"))
+        # Keep the output cache of `list` out of the app directory of the user
+        app_dir = patch("click.get_app_dir", return_value=self.tmp.name)
+        app_dir.start()
+        self.addCleanup(app_dir.stop)
+        self.path = os.path.join(self.tmp.name, daemon.SOCKET_NAME)
+        self.habit = self.create_habit("Running", quantum=3.0)
+        self.add_summary(self.habit)
+
+    def tearDown(self):
+        models.db.close()
+        self.tmp.cleanup()
+
+    def test_server_runs_list(self):
+        user_cache = self._list_dir(self.user_cache)
+        with self._serve():
+            response = daemon.forward(self.path, ["list"])
+
+        assert response["exit_code"] == 0
+        assert "1: Running" in response["stdout"]
+        assert response["stderr"] == ""
+        assert not os.path.exists(self.path)
+        assert self._list_dir(cache.get_dir()) != []
+        assert cache.get_dir().startswith(self.tmp.name)
+        assert self._list_dir(self.user_cache) == user_cache
+
+    def test_server_runs_checkin(self):
+        with self._serve():
+            response = daemon.forward(self.path, ["checkin", "Run", "-q", "3"])
+
+        assert response["exit_code"] == 0
+        assert "3.0 dummy_units" in click.unstyle(response["stdout"])
+        activities = models.Activity.select().where(
+            models.Activity.for_habit == self.habit
+        )
+        assert [a.quantum for a in activities] == [3.0]
+        assert models.Summary.get(for_habit=self.habit).streak == 1
+
+    def test_server_runs_in_terminal_width_of_client(self):
+        with self._serve():
+            size = os.terminal_size((20, 5))
+            with patch("shutil.get_terminal_size", return_value=size):
+                response = daemon.forward(self.path, ["list"])
+
+        assert response["exit_code"] == 1
+        assert "terminal window is too small" in response["stdout"]
+        assert "COLUMNS" not in os.environ
+
+    def test_run_command_runs_in_working_directory_of_client(self):
+        cwd = os.getcwd()
+        args = ["list", "-f", "csv", "-o", "report.csv"]
+
+        response = daemon.run_command(args, self.tmp.name, 80)
+
+        assert response["exit_code"] == 0
+        assert os.getcwd() == cwd
+        with open(os.path.join(self.tmp.name, "report.csv")) as f:
+            assert f.readline() == "id,name,goal,units,date,activity\n"
+
+    def test_server_returns_exit_code_and_errors(self):
+        with self._serve():
+            args = ["checkin", "Run", "-q", "1", "-d", "x"]
+            date = daemon.forward(self.path, args)
+            usage = daemon.forward(self.path, ["list", "--dummy"])
+            help = daemon.forward(self.path, ["list", "--help"])
+
+        assert date["exit_code"] == 1
+        assert "Unable to parse date: x." in date["stdout"]
+        assert usage["exit_code"] == 2
+        assert "No such option" in usage["stderr"]
+        assert "--dummy" in usage["stderr"]
+        assert help["exit_code"] == 0
+        assert "Usage: habito list" in help["stdout"]
+
+    def test_server_responds_to_invalid_requests(self):
+        with self._serve():
+            client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            with client, client.makefile("rwb") as stream:
+                client.connect(self.path)
+                stream.write(b"{invalid\n")
+                stream.flush()
+                response = stream.readline()
+
+        assert b'"exit_code": 1' in response
+        assert b"Error: " in response
+
+    def test_server_closes_empty_requests(self):
+        with self._serve():
+            client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            with client:
+                client.connect(self.path)
+                client.shutdown(socket.SHUT_WR)
+                response = client.recv(1024)
+
+        assert response == b""
+
+    def test_serve_raises_if_server_is_running(self):
+        with self._serve():
+            with pytest.raises(RuntimeError):
+                daemon.serve(self.path)
+
+    def test_serve_replaces_stale_socket(self):
+        with open(self.path, "w"):
+            pass
+
+        with self._serve():
+            assert daemon.is_serving(self.path)
+
+    def test_run_command_restores_terminal_width(self):
+        with patch.dict(os.environ, {"COLUMNS": "120"}):
+            response = daemon.run_command(["list"], os.getcwd(), 20)
+
+            assert os.environ["COLUMNS"] == "120"
+        assert response["exit_code"] == 1
+
+    def test_run_command_returns_error_for_aborted_prompt(self):
+        with patch("click.prompt", side_effect=click.Abort()):
+            response = daemon.run_command(["checkin", "Run"], os.getcwd(), 80)
+
+        assert response["exit_code"] == 1
+        assert response["stderr"] == "Aborted!\n"
+
+    def _list_dir(self, path):
+        return sorted(os.listdir(path)) if os.path.exists(path) else []
+
+    def _serve(self):
+        test = self
+
+        class Server:
+            def __enter__(self):
+                started = threading.Event()
+
+                def ready(server):
+                    self.server = server
+                    started.set()
+
+                self.thread = threading.Thread(
+                    target=daemon.serve, args=(test.path, ready)
+                )
+                self.thread.start()
+                assert started.wait(5)
+                return self
+
+            def __exit__(self, *args):
+                self.server.shutdown()
+                self.thread.join()
+
+        return Server()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""Tests for habito date parsing."""
+
+import sys
+from datetime import datetime
+from unittest import TestCase
+
+import pytest
+
+from habito import dates
+
+NOW = datetime(2024, 3, 31, 10, 30)
+
+
+class DatesTests(TestCase):
+    def test_parse_returns_none_for_empty_text(self):
+        assert dates.parse("  ") is None
+
+    def test_parse_defaults_to_current_time(self):
+        before = datetime.now()
+
+        date = dates.parse("today")
+
+        assert before <= date <= datetime.now()
+
+    def test_parse_common_forms_without_dateparser(self):
+        expected = {
+            "today": NOW,
+            "Now": NOW,
+            "yesterday": datetime(2024, 3, 30, 10, 30),
+            "2024-02-29": datetime(2024, 2, 29),
+            "2024-02-29T08:15": datetime(2024, 2, 29, 8, 15),
+            "3/1": datetime(2024, 3, 1),
+            "4/1": datetime(2023, 4, 1),
+            "12/25/2020": datetime(2020, 12, 25),
+            "1 day ago": datetime(2024, 3, 30, 10, 30),
+            "30 days": datetime(2024, 3, 1, 10, 30),
+            "1 week": datetime(2024, 3, 24, 10, 30),
+            "2  Weeks ago": datetime(2024, 3, 17, 10, 30),
+            "a month ago": datetime(2024, 2, 29, 10, 30),
+            "13 months": datetime(2023, 2, 28, 10, 30),
+            "an year ago": datetime(2023, 3, 31, 10, 30),
+            "2 years": datetime(2022, 3, 31, 10, 30),
+        }
+        sys.modules.pop("dateparser", None)
+
+        for text, date in expected.items():
+            assert dates.parse(text, NOW) == date, text
+        assert "dateparser" not in sys.modules
+
+    def test_parse_falls_back_to_dateparser(self):
+        pytest.importorskip("dateparser")
+
+        assert dates.parse("March 3, 2021", NOW) == datetime(2021, 3, 3)
+        assert dates.parse("2 hours ago", NOW) == datetime(2024, 3, 31, 8, 30)
+
+    def test_parse_returns_none_for_invalid_dates(self):
+        assert dates.parse("2/30", NOW) is None
+        assert dates.parse("13 nights", NOW) is None
+
+    def test_parse_returns_none_for_durations_out_of_range(self):
+        for text in ["99999999 days", "9999999999 weeks", "3000 years ago"]:
+            assert dates.parse(text, NOW) is None, text
@@ -1,17 +1,33 @@
 # -*- coding: utf-8 -*-
 """Tests for Habito module."""
 
+import json
+import subprocess
+import sys
 from datetime import datetime, date, timedelta
 from unittest.mock import patch
+
+import click
+import pytest
 from click.testing import CliRunner
 
 import habito
 import habito.commands
-import habito.commands.list
 import habito.models as models
+from unittest import TestCase
+
 from tests import HabitoTestCase
 
 
+def get_runner_with_stderr():
+    """Get a runner which captures stderr apart from stdout."""
+    # click 8.2 always captures stderr apart and removed `mix_stderr`
+    try:
+        return CliRunner(mix_stderr=False)
+    except TypeError:
+        return CliRunner()
+
+
 class HabitoTests(HabitoTestCase):
     """Test scenarios for Habito commands."""
 
@@ -28,21 +44,39 @@ class HabitoTests(HabitoTestCase):
 
     def tearDown(self):
         models.db.drop_tables(
-            [models.Habit, models.Activity, models.Summary], safe=True
+            [models.Habit, models.Activity, models.DailyTotal, models.Summary],
+            safe=True,
         )
 
     def test_habito_cli_sets_up_default_commandset(self):
-        result = habito.commands.cli
+        cli = habito.commands.cli
+        ctx = click.Context(cli)
 
         commands = {
             "list": habito.commands.list,
+            "perf": habito.commands.perf,
             "add": habito.commands.add,
+            "api": habito.commands.api,
             "checkin": habito.commands.checkin,
+            "compact": habito.commands.compact,
+            "config": habito.commands.config,
             "edit": habito.commands.edit,
             "delete": habito.commands.delete,
+            "dev": habito.commands.dev,
+            "import": habito.commands.import_,
+            "rebuild-rollups": habito.commands.rebuild_rollups,
+            "recompute": habito.commands.recompute,
+            "serve": habito.commands.serve,
+            "stats": habito.commands.stats,
         }
 
-        assert result.commands == commands
+        result = {name: cli.get_command(ctx, name) for name in cli.list_commands(ctx)}
+        assert result == commands
+        assert cli.get_command(ctx, "dummy") is None
+
+    def test_habito_commands_raises_for_unknown_attribute(self):
+        with pytest.raises(AttributeError):
+            habito.commands.dummy
 
     @patch("click.get_app_dir")
     @patch("os.mkdir")
@@ -52,6 +86,17 @@ class HabitoTests(HabitoTestCase):
 
         assert models_setup.called
 
+    @patch("click.get_app_dir")
+    @patch("os.mkdir")
+    @patch("habito.models.setup")
+    def test_habito_cli_shows_error_for_invalid_setup(self, models_setup, mkdir, click):
+        models_setup.side_effect = ValueError("Unknown database profile 'dummy'.")
+
+        result = self._run_command(habito.commands.cli, ["add"])
+
+        assert result.exit_code == 1
+        assert result.output == "Unknown database profile 'dummy'.\n"
+
     @patch("click.get_app_dir")
     @patch("os.mkdir")
     def test_habito_cli_sets_up_app_directory(self, mkdir_mock, click_mock):
@@ -62,6 +107,128 @@ class HabitoTests(HabitoTestCase):
             assert click_mock.called
             assert mkdir_mock.called
 
+    @patch("click.get_app_dir")
+    @patch("os.mkdir")
+    @patch("habito.models.setup")
+    def test_habito_cli_shows_progress_of_migrations(self, models_setup, mkdir, click):
+        def setup(name, progress):
+            progress(5, 1, 4)
+            progress(5, 4, 4)
+
+        models_setup.side_effect = setup
+        runner = get_runner_with_stderr()
+
+        result = runner.invoke(habito.commands.cli, ["add"])
+
+        assert result.stderr.startswith(
+            "\rUpgrading the database: #5 25%\rUpgrading the database: #5 100%\n"
+        )
+
+    @patch("click.get_app_dir")
+    def test_habito_cli_shows_sql_profile(self, app_dir):
+        app_dir.return_value = "."
+        runner = get_runner_with_stderr()
+
+        result = runner.invoke(habito.commands.cli, ["--profile", "list"])
+
+        assert result.exit_code == 0
+        assert "Habit" in result.stdout
+        assert result.stderr.startswith("SQL profile: ")
+        assert "PRAGMA user_version" in result.stderr
+        assert "SELECT" in result.stderr
+        assert "execute_sql" not in vars(models.db)
+
+    @patch("click.get_app_dir")
+    def test_habito_cli_writes_sql_profile_as_json(self, app_dir):
+        app_dir.return_value = "."
+        runner = get_runner_with_stderr()
+
+        with runner.isolated_filesystem():
+            args = ["--profile-json", "profile.json", "list"]
+            result = runner.invoke(habito.commands.cli, args)
+            with open("profile.json") as f:
+                report = json.load(f)
+
+        assert result.exit_code == 0
+        assert result.stderr == ""
+        assert report["calls"] > 0
+        assert any('FROM "habit"' in q["sql"] for q in report["queries"])
+
+    @patch("click.get_app_dir")
+    def test_habito_cli_records_telemetry_if_enabled(self, app_dir):
+        app_dir.return_value = "."
+
+        with self.runner.isolated_filesystem():
+            with patch.dict("os.environ", {"HABITO_TELEMETRY": "1"}):
+                result = self.runner.invoke(habito.commands.cli, ["list"])
+            with open("telemetry.jsonl") as f:
+                record = json.loads(f.read())
+
+        assert result.exit_code == 0
+        assert record["command"] == "list"
+        phases = ["import", "app_dir", "setup", "fetch", "compute", "render"]
+        assert list(record["phases"]) == phases
+
+    @patch("habito.daemon.forward")
+    def test_habito_cli_forwards_commands_to_server(self, forward):
+        forward.return_value = {"exit_code": 3, "stdout": "out\n", "stderr": "err\n"}
+
+        result = self.runner.invoke(habito.commands.cli, ["list", "-l"])
+
+        assert forward.call_args[0][1] == ["list", "-l"]
+        assert result.exit_code == 3
+        assert result.output == "out\nerr\n"
+
+    @patch("habito.daemon.forward")
+    def test_habito_cli_forwards_only_arguments_of_command(self, forward):
+        forward.return_value = {"exit_code": 0, "stdout": "", "stderr": ""}
+
+        for args in [["--", "list", "-l"], ["list", "--", "-l"]]:
+            self.runner.invoke(habito.commands.cli, args)
+
+            assert forward.call_args[0][1] == args[args.index("list") :]
+
+    @patch("click.get_app_dir")
+    @patch("habito.daemon.forward")
+    def test_habito_cli_runs_commands_without_server(self, forward, app_dir):
+        app_dir.return_value = "."
+        forward.return_value = None
+
+        result = self.runner.invoke(habito.commands.cli, ["list"])
+
+        assert forward.called
+        assert result.exit_code == 0
+        assert "Habit" in result.output
+
+    @patch("click.get_app_dir")
+    def test_habito_cli_imports_server_client_only_for_forwarded_commands(
+        self, app_dir
+    ):
+        app_dir.return_value = "."
+
+        daemon = sys.modules.pop("habito.daemon", None)
+        try:
+            result = self.runner.invoke(habito.commands.cli, ["config", "db-profile"])
+
+            assert result.exit_code == 0
+            assert "habito.daemon" not in sys.modules
+        finally:
+            if daemon is not None:
+                sys.modules["habito.daemon"] = daemon
+
+    @patch("click.get_app_dir")
+    @patch("habito.daemon.forward")
+    def test_habito_cli_runs_profiled_commands_in_process(self, forward, app_dir):
+        app_dir.return_value = "."
+
+        self.runner.invoke(habito.commands.cli, ["--profile", "list"])
+        self.runner.invoke(habito.commands.cli, ["add", "Run", "1"])
+        with patch.dict("os.environ", {"HABITO_TELEMETRY": "1"}):
+            with patch("habito.telemetry.finish"):
+                self.runner.invoke(habito.commands.cli, ["list"])
+
+        assert not forward.called
+
     def _run_command(self, command, args=[]):
         return self._run_command_with_stdin(command, args, stdin=None)
 
@@ -72,3 +239,59 @@ class HabitoTests(HabitoTestCase):
         print(result.exc_info)
 
         return result
+
+
+class StartupTests(TestCase):
+    """Import time budget for the command line startup."""
+
+    # Budget for importing habito modules to invoke a command (milliseconds)
+    STARTUP_BUDGET_MS = 500
+
+    # Slow imports which are only required by a few commands
+    SLOW_IMPORTS = ["dateparser", "playhouse.reflection", "playhouse.migrate"]
+
+    def test_checkin_startup_imports_only_required_modules(self):
+        modules = self._get_import_times("checkin")
+
+        names = [m[0] for m in modules]
+        for name in self.SLOW_IMPORTS + ["terminaltables"]:
+            assert name not in names
+        assert self._get_startup_time(modules) < self.STARTUP_BUDGET_MS
+
+    def test_list_startup_imports_only_required_modules(self):
+        modules = self._get_import_times("list")
+
+        names = [m[0] for m in modules]
+        for name in self.SLOW_IMPORTS:
+            assert name not in names
+        assert self._get_startup_time(modules) < self.STARTUP_BUDGET_MS
+
+    def _get_import_times(self, command):
+        """Get cumulative import times in microseconds for the modules.
+
+        Returns a list of module name, cumulative time and the nesting level.
+        """
+        code = f"from habito.commands import cli; cli.get_command(None, '{command}')"
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        modules = []
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _, cumulative, name = line.split("|")
+            level = (len(name) - len(name.lstrip()) - 1) // 2
+            modules.append((name.strip(), int(cumulative), level))
+        return modules
+
+    def _get_startup_time(self, modules):
+        """Get total time to import habito and its modules in milliseconds.
+
+        Interpreter startup modules are imported before habito. Commands are
+        imported with `importlib`, and their imports are shown at top level.
+        """
+        start = [m[0] for m in modules].index("habito.commands")
+        return sum(m[1] for m in modules[start:] if m[2] == 0) / 1000
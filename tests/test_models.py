@@ -1,8 +1,12 @@
 # -*- coding: utf-8 -*-
 """Tests for habito models."""
 
+import os
 import pytest
-from datetime import datetime, timedelta
+import re
+import tempfile
+from datetime import date, datetime, timedelta
+from unittest.mock import Mock, patch
 
 import habito.models as models
 from tests import HabitoTestCase
@@ -13,7 +17,7 @@ class ModelTests(HabitoTestCase):
         models.setup(":memory:")
 
     def test_setup_creates_tables(self):
-        assert len(models.db.get_tables()) == 4
+        assert len(models.db.get_tables()) == 6
 
     def test_get_activities_raises_for_invalid_days(self):
         with pytest.raises(ValueError):
@@ -73,6 +77,385 @@ class ModelTests(HabitoTestCase):
         assert h[0][1] == [(0, None), (1, 20.0), (2, 1.0)]
         assert h[1][1] == [(0, None), (1, 10.0), (2, None)]
 
+    def test_get_activities_should_range_scan_date_index(self):
+        habit = self.create_habit()
+        self.add_activity(habit, 20.0, ModelTests.one_day_ago)
+
+        plans = self.get_query_plans(models.get_activities, 3)
+
+        assert len(plans) == 1
+        index_range_scan = r"SEARCH \w+ USING INDEX activity_\w+ \(.*local_day>\?"
+        assert re.search(index_range_scan, plans[0])
+
+    def test_activities_across_habits_should_range_scan_date_index(self):
+        from_day = models.get_local_day(datetime.now()) - 3
+        query = models.Activity.select().where(models.Activity.local_day > from_day)
+
+        plans = self.get_query_plans(lambda: list(query))
+
+        assert "USING INDEX activity_local_day (local_day>?)" in plans[0]
+
+    def test_get_daily_activities_raises_for_invalid_days(self):
+        with pytest.raises(ValueError):
+            models.get_daily_activities(-1)
+
+    def test_get_daily_activities_should_read_daily_totals(self):
+        habit = self.create_habit()
+        self.add_activity(habit, 20.0, ModelTests.one_day_ago)
+
+        plans = self.get_query_plans(models.get_daily_activities, 2)
+        h = models.get_daily_activities(2)
+
+        assert plans == []
+        assert h[0][1] == [(0, None), (1, 20.0)]
+
+    def test_get_daily_activities_should_read_streaks_with_habits(self):
+        habit_one = self.create_habit()
+        self.add_summary(habit_one, streak=3)
+        self.create_habit(name="HabitTwo")
+
+        h = models.get_daily_activities(1)
+
+        assert [(habit.name, habit.streak) for habit, _ in h] == [
+            ("HabitOne", 3),
+            ("HabitTwo", 0),
+        ]
+
+    def test_get_daily_activity_rows_raises_for_invalid_days(self):
+        with pytest.raises(ValueError):
+            models.get_daily_activity_rows(-1)
+
+    def test_get_daily_activity_rows_should_stream_rows_by_date(self):
+        habit1 = self.create_habit()
+        habit2 = self.create_habit("Habit 2", quantum=2)
+        self.add_activity(habit1, 20.0, ModelTests.one_day_ago)
+        self.add_activity(habit1, 1.0, ModelTests.one_day_ago)
+        self.add_activity(habit2, 10.0)
+
+        rows = models.get_daily_activity_rows(2)
+
+        today = str(datetime.now().date())
+        yesterday = str(ModelTests.one_day_ago.date())
+        assert not isinstance(rows, list)
+        assert [(r[0], r[4], r[5]) for r in rows] == [
+            (1, yesterday, 21.0),
+            (2, yesterday, 0.0),
+            (1, today, 0.0),
+            (2, today, 10.0),
+        ]
+
+    def test_get_change_marker_changes_for_writes_to_listed_tables(self):
+        markers = [models.get_change_marker()]
+        habit = self.create_habit()
+        self.add_summary(habit)
+        markers.append(models.get_change_marker())
+        self.add_activity(habit, 2.0)
+        markers.append(models.get_change_marker())
+        models.Summary.update_streak(habit)
+        markers.append(models.get_change_marker())
+        habit.delete_instance(recursive=True)
+        markers.append(models.get_change_marker())
+
+        assert markers == sorted(set(markers), key=int)
+
+    def test_bulk_change_bumps_change_marker_once(self):
+        habit = self.create_habit()
+        for day in range(3):
+            self.add_activity(habit, 1.0, datetime.now() - timedelta(days=day))
+        marker = int(models.get_change_marker())
+
+        with models.bulk_change():
+            models.DailyTotal.rebuild()
+            models.Summary.update_all_streaks()
+
+        assert int(models.get_change_marker()) == marker + 1
+        assert models.Config.get_value(models.CHANGE_PAUSE_KEY) is None
+        self.add_summary(habit)
+        assert int(models.get_change_marker()) == marker + 2
+
+    def test_bulk_change_keeps_change_marker_for_errors(self):
+        habit = self.create_habit()
+        marker = models.get_change_marker()
+
+        with pytest.raises(RuntimeError):
+            with models.bulk_change():
+                self.add_summary(habit)
+                raise RuntimeError("Failed.")
+
+        assert models.get_change_marker() == marker
+        assert models.Config.get_value(models.CHANGE_PAUSE_KEY) is None
+
+    def test_find_habit_should_range_scan_name_index(self):
+        self.create_habit()
+
+        plans = self.get_query_plans(models.Habit.find, "habit", table="habit")
+
+        assert len(plans) == 1
+        assert "USING INDEX habit_name_key (name_key>? AND name_key<?)" in plans[0]
+
+
+class CompactTests(HabitoTestCase):
+    def setUp(self):
+        models.setup(":memory:")
+
+    def tearDown(self):
+        models.db.drop_tables(
+            [
+                models.Habit,
+                models.Activity,
+                models.ActivityArchive,
+                models.DailyTotal,
+                models.Summary,
+            ],
+            safe=True,
+        )
+
+    def test_compact_is_noop_without_activities(self):
+        assert models.Activity.compact(datetime.now()) == (0, 0)
+
+    def test_compact_folds_days_with_many_activities(self):
+        habit_one = models.Habit.add(name="HabitOne", quantum=3.0, units="u", magica="")
+        habit_two = models.Habit.add(name="HabitTwo", quantum=1.0, units="u", magica="")
+        checkins = [
+            (habit_one, 1.0, self.three_days_ago),
+            (habit_one, 2.0, self.two_days_ago.replace(hour=8)),
+            (habit_one, 2.0, self.two_days_ago.replace(hour=9)),
+            (habit_two, 1.0, self.two_days_ago.replace(hour=10)),
+            (habit_two, 1.0, self.one_day_ago.replace(hour=8)),
+            (habit_two, 4.0, self.one_day_ago.replace(hour=9)),
+            (habit_one, 2.0, datetime.now()),
+            (habit_one, 2.0, datetime.now()),
+        ]
+        for habit, quantum, update_date in checkins:
+            activity = models.Activity.add(habit, quantum, update_date)
+            models.Summary.update_streak(habit, activity)
+        totals = list(models.DailyTotal.select().tuples())
+        streaks = [s.streak for s in models.Summary.select()]
+        today = datetime.combine(datetime.now().date(), datetime.min.time())
+
+        result = models.Activity.compact(today)
+
+        activities = models.Activity.select().order_by(models.Activity.update_date)
+        assert result == (4, 2)
+        assert [(a.for_habit_id, a.quantum, a.update_date) for a in activities] == [
+            (habit_one.id, 1.0, self.three_days_ago),
+            (habit_one.id, 4.0, self.two_days_ago.replace(hour=9)),
+            (habit_two.id, 1.0, self.two_days_ago.replace(hour=10)),
+            (habit_two.id, 5.0, self.one_day_ago.replace(hour=9)),
+            (habit_one.id, 2.0, checkins[-2][2]),
+            (habit_one.id, 2.0, checkins[-1][2]),
+        ]
+        archive = models.ActivityArchive.select().order_by(
+            models.ActivityArchive.activity_id
+        )
+        assert [a.activity_id for a in archive] == [2, 3, 5, 6]
+        assert [a.quantum for a in archive] == [2.0, 2.0, 1.0, 4.0]
+        assert [a.update_date for a in archive] == [
+            checkins[i][2] for i in [1, 2, 4, 5]
+        ]
+        assert list(models.DailyTotal.select().tuples()) == totals
+
+        # Totals and streaks computed from the compacted activities are same
+        models.DailyTotal.rebuild()
+        for habit in [habit_one, habit_two]:
+            models.Summary.update_streak(habit)
+        assert [s.streak for s in models.Summary.select()] == streaks
+        rebuilt = models.DailyTotal.select().tuples()
+        assert sorted(t[1:4] for t in rebuilt) == sorted(t[1:4] for t in totals)
+
+    def test_compact_archives_to_attached_database(self):
+        habit = self.create_habit()
+        self.add_activity(habit, 1.0, self.one_day_ago)
+        self.add_activity(habit, 1.0, self.one_day_ago)
+        models.db.execute_sql("ATTACH DATABASE ':memory:' AS archive")
+
+        result = models.Activity.compact(datetime.now(), schema="archive")
+        archived = models.db.execute_sql(
+            "SELECT activity_id, quantum FROM archive.activityarchive"
+        ).fetchall()
+        models.db.execute_sql("DETACH DATABASE archive")
+
+        assert result == (2, 1)
+        assert archived == [(1, 1.0), (2, 1.0)]
+        assert models.ActivityArchive.select().count() == 0
+
+
+class ProfileTests(HabitoTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "habito.db")
+
+    def tearDown(self):
+        models.db.close()
+        self.tmp.cleanup()
+
+    def test_setup_uses_sqlite_defaults_for_default_profile(self):
+        models.setup(self.path)
+
+        assert models.db.pragma("journal_mode") == "delete"
+        assert models.db.pragma("synchronous") == 2
+
+    def test_setup_keeps_journal_mode_of_database_for_default_profile(self):
+        models.setup(self.path, profile="wal")
+        models.db.close()
+
+        models.setup(self.path, profile="default")
+
+        assert models.db.pragma("journal_mode") == "wal"
+        assert models.db.pragma("synchronous") == 2
+
+    def test_setup_applies_profile(self):
+        models.setup(self.path, profile="fast")
+
+        assert models.db.pragma("journal_mode") == "wal"
+        assert models.db.pragma("synchronous") == 1
+        assert models.db.pragma("busy_timeout") == 5000
+        assert models.db.pragma("mmap_size") == 256 * 1024 * 1024
+        assert models.db.pragma("cache_size") == -64 * 1024
+        assert models.db.pragma("temp_store") == 2
+
+    def test_setup_applies_profile_from_environment(self):
+        with patch.dict(os.environ, {models.PROFILE_ENV: "wal"}):
+            models.setup(self.path)
+
+        assert models.db.pragma("journal_mode") == "wal"
+        assert models.db.pragma("cache_size") == -2000
+
+    def test_setup_applies_profile_from_config(self):
+        models.setup(self.path)
+        models.Config.set_value("db_profile", "fast")
+
+        with patch.dict(os.environ, {models.PROFILE_ENV: ""}):
+            models.setup(self.path)
+
+        assert models.db.pragma("journal_mode") == "wal"
+        assert models.db.pragma("temp_store") == 2
+
+    def test_setup_raises_for_unknown_profile(self):
+        with pytest.raises(ValueError, match="Unknown database profile 'dummy'"):
+            models.setup(self.path, profile="dummy")
+
+
+class WriteTests(HabitoTestCase):
+    def setUp(self):
+        models.setup(":memory:")
+
+    def tearDown(self):
+        models.db.drop_tables(
+            [models.Habit, models.Activity, models.DailyTotal, models.Summary],
+            safe=True,
+        )
+
+    def test_write_runs_function_in_immediate_transaction(self):
+        habit = self.create_habit()
+
+        with patch.object(models.db, "atomic", wraps=models.db.atomic) as atomic:
+            activity = models.write(models.Activity.add, habit, 2.0)
+
+        assert atomic.call_args_list[0].kwargs == {"lock_type": "IMMEDIATE"}
+        assert models.Activity.get().id == activity.id
+
+    def test_write_runs_function_in_savepoint_inside_transaction(self):
+        habit = self.create_habit()
+
+        with models.db.atomic():
+            with patch.object(models.db, "atomic", wraps=models.db.atomic) as atomic:
+                models.write(models.Activity.add, habit, 2.0)
+
+        assert atomic.call_args_list[0].kwargs == {}
+        assert models.Activity.select().count() == 1
+
+    @patch("time.sleep")
+    def test_write_retries_if_database_is_locked(self, sleep):
+        locked = models.OperationalError("database is locked")
+        func = Mock(side_effect=[locked, locked, "done"])
+
+        result = models.write(func, 1, key=2)
+
+        assert result == "done"
+        assert func.call_count == 3
+        func.assert_called_with(1, key=2)
+        delays = [c.args[0] for c in sleep.call_args_list]
+        assert models.WRITE_BACKOFF <= delays[0] <= 2 * models.WRITE_BACKOFF
+        assert 2 * models.WRITE_BACKOFF <= delays[1] <= 4 * models.WRITE_BACKOFF
+
+    @patch("time.sleep")
+    def test_write_raises_if_database_is_locked_for_all_attempts(self, sleep):
+        func = Mock(side_effect=models.OperationalError("database is locked"))
+
+        with pytest.raises(models.OperationalError):
+            models.write(func)
+
+        assert func.call_count == models.WRITE_ATTEMPTS
+        assert sleep.call_count == models.WRITE_ATTEMPTS - 1
+
+    def test_write_raises_other_errors_without_retry(self):
+        func = Mock(side_effect=models.OperationalError("no such table: dummy"))
+
+        with pytest.raises(models.OperationalError):
+            models.write(func)
+
+        assert func.call_count == 1
+
+
+class DailyTotalTests(HabitoTestCase):
+    def setUp(self):
+        models.setup(":memory:")
+
+    def tearDown(self):
+        models.db.drop_tables(
+            [models.Habit, models.Activity, models.DailyTotal, models.Summary],
+            safe=True,
+        )
+
+    def test_activity_add_records_daily_total(self):
+        habit = self.create_habit()
+
+        self.add_activity(habit, 2.0, DailyTotalTests.one_day_ago)
+        self.add_activity(habit, 3.0, DailyTotalTests.one_day_ago)
+        self.add_activity(habit, 5.0)
+
+        totals = models.DailyTotal.select().order_by(models.DailyTotal.day)
+        assert [(t.day, t.total_quantum, t.count) for t in totals] == [
+            (DailyTotalTests.one_day_ago.date(), 5.0, 2),
+            (datetime.now().date(), 5.0, 1),
+        ]
+
+    def test_record_accepts_date(self):
+        habit = self.create_habit()
+
+        models.DailyTotal.record(habit, 2.0, DailyTotalTests.one_day_ago.date())
+
+        assert models.DailyTotal.get().day == DailyTotalTests.one_day_ago.date()
+
+    def test_rebuild_regenerates_daily_totals(self):
+        habit = self.create_habit()
+        self.add_activity(habit, 2.0, DailyTotalTests.one_day_ago)
+        models.Activity.create(
+            for_habit=habit, quantum=3.0, update_date=DailyTotalTests.one_day_ago
+        )
+        models.Activity.create(
+            for_habit=habit, quantum=1.0, update_date=DailyTotalTests.two_days_ago
+        )
+
+        models.DailyTotal.rebuild()
+        count = models.DailyTotal.rebuild()
+
+        totals = models.DailyTotal.select().order_by(models.DailyTotal.day)
+        assert count == 2
+        assert [(t.total_quantum, t.count) for t in totals] == [(1.0, 1), (5.0, 2)]
+
+    def test_rebuild_only_updates_specified_habits(self):
+        habit_one = self.create_habit()
+        habit_two = self.create_habit("HabitTwo")
+        models.Activity.create(for_habit=habit_one, quantum=3.0)
+        models.Activity.create(for_habit=habit_two, quantum=1.0)
+
+        count = models.DailyTotal.rebuild([habit_two])
+
+        assert count == 1
+        assert models.DailyTotal.get().for_habit_id == habit_two.id
+
 
 class MigrationTests(HabitoTestCase):
     def setUp(self):
@@ -106,7 +489,7 @@ class MigrationTests(HabitoTestCase):
 
         version = self.migration.get_version()
 
-        assert version == 3
+        assert version == models.DB_VERSION
 
     # Migration scenario: DB doesn't exist
     def test_execute_list_result_db_doesnot_exist(self):
@@ -124,6 +507,7 @@ class MigrationTests(HabitoTestCase):
         assert models.Habit.select().count() == 0
         assert models.Activity.select().count() == 0
         assert models.Summary.select().count() == 0
+        self._verify_version_9()
 
     # Migration scenario: DB is at version 1
     def test_execute_list_result_db_exist_without_config(self):
@@ -131,14 +515,14 @@ class MigrationTests(HabitoTestCase):
 
         result = self.migration.execute(list_only=True)
 
-        assert result == {1: -1, 2: -1, 3: -1}
+        assert result == self._migrations(1, status=-1)
 
     def test_execute_run_result_db_exist_without_config(self):
         self._setup_db_exist_no_config()
 
         result = self.migration.execute()
 
-        assert result == {1: 0, 2: 0, 3: 0}
+        assert result == self._migrations(1)
         self._verify_row_counts_for_version_2()
         self._verify_summary_for_version_2()
 
@@ -146,10 +530,11 @@ class MigrationTests(HabitoTestCase):
         self._setup_db_exist_no_config()
         result = self.migration.execute()
         models.Config.update(value="1").where(models.Config.name == "version").execute()
+        models.db.pragma("user_version", 0)
 
         result = self.migration.execute()
 
-        assert result == {1: 0, 2: 0, 3: 0}
+        assert result == self._migrations(1)
         self._verify_row_counts_for_version_2()
         self._verify_summary_for_version_2()
         self._verify_version_3()
@@ -160,10 +545,125 @@ class MigrationTests(HabitoTestCase):
 
         result = self.migration.execute()
 
-        assert result == {2: 0, 3: 0}
+        assert result == self._migrations(2)
         self._verify_version_3()
+        self._verify_version_4()
+        self._verify_version_5()
+        self._verify_version_6()
+        self._verify_version_7()
+        self._verify_version_8()
+        self._verify_version_9()
+        self._verify_version_10()
+
+    # Migration scenario: DB is at version 3
+    def test_execute_migration_3_to_4_creates_activity_indexes(self):
+        self._setup_db_exist_config_version_two()
+        models.Config.update(value="3").where(models.Config.name == "version").execute()
+
+        result = self.migration.execute()
+
+        assert result == self._migrations(3)
+        self._verify_version_4()
+        self._verify_version_5()
+        self._verify_version_6()
+        self._verify_version_7()
+        self._verify_version_8()
+        self._verify_version_9()
+        self._verify_version_10()
+
+    # Migration scenario: DB is at version 9
+    def test_execute_migration_9_to_10_stores_timestamps(self):
+        self._setup_db_exist_config_version_two()
+        models.db.execute_sql(
+            'INSERT INTO "activity" ("for_habit_id", "quantum", "update_date") '
+            "VALUES (1, 2.0, '2024-02-01 10:20:30.123456'), "
+            "(1, 3.0, '2024-02-01 23:59:59')"
+        )
+
+        result = self.migration.execute()
+
+        assert result == self._migrations(2)
+        activities = models.Activity.select().where(models.Activity.id > 4)
+        assert [(a.update_date, a.local_day) for a in activities] == [
+            (datetime(2024, 2, 1, 10, 20, 30, 123456), 19754),
+            (datetime(2024, 2, 1, 23, 59, 59), 19754),
+        ]
+        total = models.DailyTotal.get(day=date(2024, 2, 1))
+        assert (total.total_quantum, total.count) == (5.0, 2)
+
+    # Migration scenario: data migrations run in batches
+    @patch("habito.models.MIGRATION_BATCH", 2)
+    def test_execute_resumes_interrupted_migrations(self):
+        self._setup_db_exist_config_version_two()
+        calls = []
+
+        def progress(version, done, total):
+            calls.append((version, done, total))
+            if done == 2 and calls.count((version, done, total)) == 1:
+                raise RuntimeError("Interrupted.")
+
+        migration = models.Migration(models.db, progress)
+        with pytest.raises(RuntimeError):
+            migration.execute()
+        assert migration.get_version() == 4
+        assert models.Config.get_value("migration_5") == "2"
+        with pytest.raises(RuntimeError):
+            migration.execute()
+        assert migration.get_version() == 9
+        assert models.Config.get_value("migration_10") == "2"
+
+        result = migration.execute()
+
+        assert result == self._migrations(9)
+        assert calls == [(5, 2, 4), (5, 4, 4), (10, 2, 4), (10, 4, 4)]
+        assert models.Config.get_value("migration_5") is None
+        assert models.Config.get_value("migration_10") is None
+        assert "activity_text" not in models.db.get_tables()
+        self._verify_version_5()
+        self._verify_version_10()
+
+    def test_execute_migrates_db_without_activities(self):
+        self._setup_db_exist_config_version_two()
+        models.db.execute_sql('DELETE FROM "activity"')
+        progress = Mock()
+
+        result = models.Migration(models.db, progress).execute()
+
+        assert result == self._migrations(2)
+        assert not progress.called
+        assert models.DailyTotal.select().count() == 0
+        assert "activity_text" not in models.db.get_tables()
+        indexes = [i.name for i in models.db.get_indexes("activity")]
+        assert "activity_for_habit_id_local_day" in indexes
+
+    # Migration scenario: DB is at latest version with user_version
+    def test_get_version_skips_introspection_for_latest_user_version(self):
+        self.migration.execute()
+
+        with patch("playhouse.reflection.introspect") as introspect:
+            version = self.migration.get_version()
+
+        assert not introspect.called
+        assert version == models.DB_VERSION
+        assert models.db.pragma("user_version") == models.DB_VERSION
+
+    def test_execute_sets_user_version_for_upgraded_db(self):
+        self._setup_db_exist_config_version_latest()
+
+        self.migration.execute()
+
+        assert models.db.pragma("user_version") == models.DB_VERSION
+
+    def test_execute_sets_user_version_for_each_migration(self):
+        self._setup_db_exist_config_version_two()
+
+        with patch.object(models.db, "pragma", wraps=models.db.pragma) as pragma:
+            self.migration.execute()
 
-    # Migration scenario: DB is at version 3 (latest)
+        versions = [c.args[1] for c in pragma.call_args_list if len(c.args) > 1]
+        assert versions == list(range(2, models.DB_VERSION + 1))
+
+    # Migration scenario: DB is at latest version
     def test_execute_list_result_db_exist_with_config(self):
         self._setup_db_exist_config_version_latest()
 
@@ -178,6 +678,10 @@ class MigrationTests(HabitoTestCase):
 
         assert result == {}
 
+    def _migrations(self, from_version, status=0):
+        """Get expected status of migrations till the latest version."""
+        return {v: status for v in range(from_version, models.DB_VERSION + 1)}
+
     # Fixtures for DB states
     def _setup_db_exist_no_config(self):
         """DB version 1 setup."""
@@ -201,9 +705,9 @@ class MigrationTests(HabitoTestCase):
                 models.db.execute_sql(s + ";")
 
     def _setup_db_exist_config_version_latest(self):
-        """DB version 2 setup."""
+        """DB latest version setup."""
         models.db.create_tables([models.Habit, models.Config])
-        models.Config.create(name="version", value="3")
+        models.Config.create(name="version", value=str(models.DB_VERSION))
 
     # Validations for DB states
     def _verify_row_counts_for_version_2(self):
@@ -225,6 +729,63 @@ class MigrationTests(HabitoTestCase):
             assert h.minimize is False
             assert h.start_date is None
 
+    def _verify_version_4(self):
+        indexes = [i.name for i in models.db.get_indexes("activity")]
+        assert "activity_for_habit_id" not in indexes
+        assert "activitymodel_for_habit_id" not in indexes
+
+    def _verify_version_5(self):
+        totals = models.DailyTotal.select().order_by(
+            models.DailyTotal.for_habit, models.DailyTotal.day
+        )
+        today = datetime.now().date()
+        assert [
+            (t.for_habit_id, (today - t.day).days, t.total_quantum) for t in totals
+        ] == [
+            (1, 2, 10.0),
+            (1, 1, 11.0),
+            (2, 3, 10.0),
+            (2, 1, 11.0),
+        ]
+
+    def _verify_version_6(self):
+        for s in models.Summary.select():
+            assert s.slot_start is None
+            assert s.previous_streak == 0
+
+    def _verify_version_7(self):
+        indexes = [i.name for i in models.db.get_indexes("habit")]
+        assert "habit_name_key" in indexes
+        for h in models.Habit.select():
+            assert h.name_key == h.name.lower()
+
+    def _verify_version_8(self):
+        assert "activityarchive" in models.db.get_tables()
+
+    def _verify_version_9(self):
+        cursor = models.db.execute_sql(
+            "SELECT tbl_name FROM sqlite_master WHERE type = 'trigger'"
+        )
+        tables = [row[0] for row in cursor]
+        for table in models.CHANGE_TABLES:
+            assert tables.count(table) == 3
+        assert models.get_change_marker().isdigit()
+
+    def _verify_version_10(self):
+        indexes = [i.name for i in models.db.get_indexes("activity")]
+        assert sorted(indexes) == [
+            "activity_for_habit_id_local_day",
+            "activity_local_day",
+            "activity_update_date",
+        ]
+        today = models.get_local_day(datetime.now())
+        days = [
+            a.local_day for a in models.Activity.select().order_by(models.Activity.id)
+        ]
+        assert days[:4] == [today - 1, today - 2, today - 1, today - 3]
+        for activity in models.Activity.select():
+            assert activity.local_day == models.get_local_day(activity.update_date)
+
 
 class HabitTests(HabitoTestCase):
     def setUp(self):
@@ -232,7 +793,8 @@ class HabitTests(HabitoTestCase):
 
     def tearDown(self):
         models.db.drop_tables(
-            [models.Habit, models.Activity, models.Summary], safe=True
+            [models.Habit, models.Activity, models.DailyTotal, models.Summary],
+            safe=True,
         )
 
     def test_habit_add_creates_a_habit(self):
@@ -261,6 +823,49 @@ class HabitTests(HabitoTestCase):
         summary = models.Summary.get(for_habit=habit)
         assert summary.streak == 0
 
+    def test_habit_save_updates_lowercase_name(self):
+        habit = self.create_habit(name="Écrire")
+
+        habit.name = "Read BOOKS"
+        habit.save()
+
+        assert models.Habit.get_by_id(habit.id).name_key == "read books"
+
+    def test_find_habit_matches_start_of_name_ignoring_case(self):
+        self.create_habit(name="Running")
+        self.create_habit(name="run fast")
+        self.create_habit(name="Morning run")
+        self.create_habit(name="Rune", active=False)
+
+        habits = models.Habit.find("RUN")
+
+        assert [h.name for h in habits] == ["Running", "run fast"]
+
+    def test_find_habit_prefers_exact_name(self):
+        self.create_habit(name="Run")
+        self.create_habit(name="Running")
+
+        habits = models.Habit.find("run")
+
+        assert [h.name for h in habits] == ["Run"]
+
+    def test_find_habit_returns_all_active_for_empty_query(self):
+        self.create_habit(name="Run")
+        self.create_habit(name="Read", active=False)
+        self.create_habit(name="Write")
+
+        habits = models.Habit.find("")
+
+        assert [h.name for h in habits] == ["Run", "Write"]
+
+    def test_find_habit_matches_regex_if_requested(self):
+        self.create_habit(name="Running")
+        self.create_habit(name="Morning run")
+
+        habits = models.Habit.find("ing( |$)", regex=True)
+
+        assert [h.name for h in habits] == ["Running", "Morning run"]
+
 
 class SummaryTests(HabitoTestCase):
     def setUp(self):
@@ -268,7 +873,8 @@ class SummaryTests(HabitoTestCase):
 
     def tearDown(self):
         models.db.drop_tables(
-            [models.Habit, models.Activity, models.Summary], safe=True
+            [models.Habit, models.Activity, models.DailyTotal, models.Summary],
+            safe=True,
         )
 
     def test_update_streak_sets_streak_unchanged_for_no_activities(self):
@@ -335,6 +941,32 @@ class SummaryTests(HabitoTestCase):
 
         assert summary.streak == 2
 
+    def test_update_streak_sums_all_days_in_a_slot(self):
+        habit = self.create_habit(
+            start_date=(datetime.now().date() - timedelta(days=3)),
+            quantum=5,
+            frequency=2,
+        )
+        self.add_summary(habit, streak=10)
+        self.add_activity(habit, quantum=3, update_date=SummaryTests.three_days_ago)
+        self.add_activity(habit, quantum=3, update_date=SummaryTests.two_days_ago)
+        self.add_activity(habit, quantum=2, update_date=SummaryTests.one_day_ago)
+        self.add_activity(habit, quantum=3, update_date=datetime.today())
+
+        summary = models.Summary.update_streak(habit)
+
+        assert summary.streak == 2
+
+    def test_update_streak_sets_streak_as_zero_if_goal_not_met(self):
+        habit = self.create_habit(quantum=5)
+        self.add_summary(habit, streak=10)
+        self.add_activity(habit, quantum=5, update_date=SummaryTests.one_day_ago)
+        self.add_activity(habit, quantum=2, update_date=datetime.today())
+
+        summary = models.Summary.update_streak(habit)
+
+        assert summary.streak == 0
+
     def test_update_streak_sets_streak_as_one_for_irregular_activity(self):
         habit = self.create_habit()
         self.add_summary(habit, streak=10)
@@ -345,6 +977,210 @@ class SummaryTests(HabitoTestCase):
 
         assert summary.streak == 1
 
+    def test_update_streak_should_range_scan_habit_date_index(self):
+        habit = self.create_habit()
+        self.add_summary(habit)
+        self.add_activity(habit, update_date=SummaryTests.one_day_ago)
+
+        plans = self.get_query_plans(
+            models.Summary.update_streak, habit, table="dailytotal"
+        )
+
+        assert len(plans) == 1
+        assert "INDEX dailytotal_for_habit_id_day (for_habit_id=?)" in plans[0]
+
+    def test_update_streak_saves_latest_slot_state(self):
+        habit = self.create_habit(quantum=5)
+        self.add_summary(habit)
+        self.add_activity(habit, quantum=5, update_date=SummaryTests.two_days_ago)
+        self.add_activity(habit, quantum=1, update_date=SummaryTests.one_day_ago)
+        self.add_activity(habit, quantum=2, update_date=SummaryTests.one_day_ago)
+
+        summary = models.Summary.update_streak(habit)
+
+        assert summary.streak == 0
+        assert summary.slot_start == SummaryTests.one_day_ago.date()
+        assert summary.slot_quantum == 3
+        assert summary.previous_streak == 1
+
+    def test_update_streak_stops_at_previous_slot_missing_goal(self):
+        habit = self.create_habit(quantum=5)
+        self.add_summary(habit)
+        self.add_activity(habit, quantum=5, update_date=SummaryTests.three_days_ago)
+        self.add_activity(habit, quantum=1, update_date=SummaryTests.two_days_ago)
+        self.add_activity(habit, quantum=5, update_date=SummaryTests.one_day_ago)
+
+        summary = models.Summary.update_streak(habit)
+
+        assert summary.streak == 1
+        assert summary.previous_streak == 0
+
+    def test_update_streak_updates_latest_slot_incrementally(self):
+        habit = self.create_habit(quantum=5)
+        self.add_summary(habit)
+        self._checkin(habit, 5, SummaryTests.one_day_ago)
+        self._checkin(habit, 2, datetime.today())
+
+        with patch.object(models.db, "execute_sql", wraps=models.db.execute_sql) as m:
+            summary = self._checkin(habit, 3, datetime.today())
+
+        assert not any('FROM "dailytotal"' in c.args[0] for c in m.call_args_list)
+        assert summary.streak == 2
+        assert summary.slot_quantum == 5
+        assert summary.previous_streak == 1
+
+    def test_update_streak_starts_new_slot_incrementally(self):
+        habit = self.create_habit(quantum=5)
+        self.add_summary(habit)
+        self._checkin(habit, 5, SummaryTests.two_days_ago)
+        self._checkin(habit, 5, SummaryTests.one_day_ago)
+
+        summary = self._checkin(habit, 6, datetime.today())
+
+        assert summary.streak == 3
+        assert summary.slot_start == datetime.today().date()
+        assert summary.previous_streak == 2
+
+    def test_update_streak_resets_streak_for_gap_in_slots(self):
+        habit = self.create_habit(quantum=5)
+        self.add_summary(habit)
+        self._checkin(habit, 5, SummaryTests.three_days_ago)
+        self._checkin(habit, 5, SummaryTests.two_days_ago)
+
+        summary = self._checkin(habit, 5, datetime.today())
+
+        assert summary.streak == 1
+        assert summary.previous_streak == 0
+
+    def test_update_streak_recomputes_for_back_dated_activity(self):
+        habit = self.create_habit(quantum=5)
+        self.add_summary(habit)
+        self._checkin(habit, 5, SummaryTests.three_days_ago)
+        self._checkin(habit, 5, SummaryTests.one_day_ago)
+        self._checkin(habit, 5, datetime.today())
+
+        summary = self._checkin(habit, 5, SummaryTests.two_days_ago)
+
+        assert summary.streak == 4
+        assert summary.slot_start == datetime.today().date()
+        assert summary.previous_streak == 3
+
+    def test_update_streak_incremental_matches_full_recompute(self):
+        habit = self.create_habit(
+            start_date=(datetime.now().date() - timedelta(days=5)),
+            quantum=4,
+            minimize=True,
+            frequency=2,
+        )
+        self.add_summary(habit)
+        for days, quantum in [(5, 1), (4, 2), (3, 3), (1, 2), (0, 2), (0, 1)]:
+            update_date = datetime.today() - timedelta(days=days)
+            incremental = self._checkin(habit, quantum, update_date)
+            full = models.Summary.update_streak(habit)
+
+            assert incremental.streak == full.streak
+            assert incremental.slot_quantum == full.slot_quantum
+            assert incremental.previous_streak == full.previous_streak
+
+    def test_update_streak_batch_applies_activities_in_a_slot_together(self):
+        habit = self.create_habit(quantum=5)
+        self.add_summary(habit)
+        self._checkin(habit, 5, SummaryTests.one_day_ago)
+        activities = [self.add_activity(habit, q, datetime.today()) for q in (2, 3)]
+
+        with patch.object(models.db, "execute_sql", wraps=models.db.execute_sql) as m:
+            summary = models.Summary.update_streak_batch(habit, activities)
+
+        assert not any('FROM "dailytotal"' in c.args[0] for c in m.call_args_list)
+        assert summary.streak == 2
+        assert summary.slot_quantum == 5
+        assert summary.slot_start == datetime.today().date()
+
+    def test_update_streak_batch_recomputes_activities_across_slots(self):
+        habit = self.create_habit(quantum=5)
+        self.add_summary(habit)
+        self._checkin(habit, 5, SummaryTests.two_days_ago)
+        activities = [
+            self.add_activity(habit, 5, SummaryTests.one_day_ago),
+            self.add_activity(habit, 1, datetime.today()),
+        ]
+
+        summary = models.Summary.update_streak_batch(habit, activities)
+
+        assert summary.streak == 0
+        assert summary.previous_streak == 2
+        assert summary.slot_quantum == 1
+
+    def test_update_all_streaks_matches_update_streak(self):
+        today = datetime.now().date()
+        habits = [
+            self.create_habit("Daily", quantum=5),
+            self.create_habit("Minimize", quantum=4, minimize=True),
+            self.create_habit(
+                "Every two days",
+                quantum=3,
+                start_date=today - timedelta(days=7),
+                frequency=2,
+            ),
+        ]
+        checkins = [(0, 6, 5), (0, 5, 5), (0, 3, 1), (0, 2, 6), (0, 1, 5), (0, 0, 5)]
+        checkins += [(1, 4, 1), (1, 3, 5), (1, 2, 2), (1, 1, 3), (1, 0, 1)]
+        checkins += [(2, 7, 3), (2, 4, 1), (2, 3, 2), (2, 2, 3), (2, 0, 1)]
+        for habit in habits:
+            self.add_summary(habit)
+        for i, days, quantum in checkins:
+            self.add_activity(habits[i], quantum, datetime.now() - timedelta(days))
+        expected = [models.Summary.update_streak(h) for h in habits]
+        models.Summary.update(
+            streak=0, slot_start=None, slot_quantum=0, previous_streak=0
+        ).execute()
+
+        count = models.Summary.update_all_streaks()
+
+        summaries = models.Summary.select().order_by(models.Summary.for_habit)
+        assert count == 3
+        assert [
+            (s.streak, s.slot_start, s.slot_quantum, s.previous_streak)
+            for s in summaries
+        ] == [
+            (s.streak, s.slot_start, s.slot_quantum, s.previous_streak)
+            for s in expected
+        ]
+        assert [s.streak for s in summaries] == [3, 3, 0]
+
+    def test_update_all_streaks_reads_daily_totals_once(self):
+        for i in range(3):
+            habit = self.create_habit(f"Habit {i}", quantum=1)
+            self.add_summary(habit, streak=5)
+            self.add_activity(habit, 1.0, SummaryTests.one_day_ago)
+        no_activities = self.create_habit("No activities")
+        self.add_summary(no_activities, streak=5)
+
+        with patch.object(models.db, "execute_sql", wraps=models.db.execute_sql) as m:
+            count = models.Summary.update_all_streaks()
+
+        sqls = [c.args[0] for c in m.call_args_list]
+        assert count == 3
+        assert len([sql for sql in sqls if 'FROM "dailytotal"' in sql]) == 1
+        assert len([sql for sql in sqls if sql.startswith('UPDATE "summary"')]) == 1
+        streaks = [
+            s.streak for s in models.Summary.select().order_by(models.Summary.id)
+        ]
+        assert streaks == [1, 1, 1, 5]
+
+    def test_update_all_streaks_updates_only_the_habits(self):
+        habit_one = self.create_habit(quantum=1)
+        habit_two = self.create_habit("HabitTwo", quantum=1)
+        for habit in [habit_one, habit_two]:
+            self.add_summary(habit)
+            self.add_activity(habit, 1.0)
+
+        count = models.Summary.update_all_streaks([habit_two.id])
+
+        assert count == 1
+        assert models.Summary.get(for_habit=habit_one).streak == 0
+        assert models.Summary.get(for_habit=habit_two).streak == 1
+
     def test_get_streak_should_add_days_for_plural_streak(self):
         for streak, expected in [(20, "20 days"), (1, "1 day"), (0, "0 days")]:
             habit = self.create_habit()
@@ -353,3 +1189,7 @@ class SummaryTests(HabitoTestCase):
             streak = habit.summary.get().get_streak()
 
             assert streak == expected
+
+    def _checkin(self, habit, quantum, update_date):
+        activity = self.add_activity(habit, quantum, update_date)
+        return models.Summary.update_streak(habit, activity)
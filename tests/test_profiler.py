@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""Tests for the SQL profiler."""
+
+import json
+
+import habito.models as models
+from habito.profiler import QueryProfiler
+from tests import HabitoTestCase
+
+
+class QueryProfilerTests(HabitoTestCase):
+    def setUp(self):
+        models.setup(":memory:")
+        self.profiler = QueryProfiler(models.db).start()
+
+    def tearDown(self):
+        self.profiler.stop()
+        models.db.drop_tables(
+            [models.Habit, models.Activity, models.DailyTotal, models.Summary],
+            safe=True,
+        )
+
+    def test_profiler_records_calls_and_rows_for_writes(self):
+        self.create_habit("HabitOne")
+        self.create_habit("HabitTwo")
+
+        stats = self.profiler.get_stats()
+
+        assert len(stats) == 1
+        assert stats[0].sql.startswith('INSERT INTO "habit"')
+        assert stats[0].calls == 2
+        assert stats[0].rows == 2
+        assert stats[0].total_ms > 0
+
+    def test_profiler_records_rows_read_by_queries(self):
+        for name in ("HabitOne", "HabitTwo", "HabitThree"):
+            self.create_habit(name)
+        self.profiler.queries.clear()
+
+        assert len(list(models.Habit.select())) == 3
+        cursor = models.db.execute_sql("SELECT id FROM habit")
+        assert len(cursor.fetchmany(2)) == 2
+        assert len([r for r in cursor]) == 1
+
+        stats = {q.sql: q for q in self.profiler.get_stats()}
+        assert stats["SELECT id FROM habit"].rows == 3
+        assert sum(q.calls for q in stats.values()) == 2
+        assert sum(q.rows for q in stats.values()) == 6
+
+    def test_profiler_sorts_statements_by_total_time(self):
+        self.profiler.queries.clear()
+        models.db.execute_sql("SELECT 1").fetchall()
+        models.db.execute_sql("SELECT 2").fetchall()
+        self.profiler.queries["SELECT 2"].total_ms += 1000
+
+        stats = self.profiler.get_stats()
+
+        assert [q.sql for q in stats] == ["SELECT 2", "SELECT 1"]
+
+    def test_profiler_formats_statements_within_width(self):
+        self.profiler.queries.clear()
+        models.db.execute_sql("SELECT 1").fetchone()
+        models.db.execute_sql("SELECT " + ", ".join(["1"] * 50)).fetchone()
+
+        lines = self.profiler.format(width=60).splitlines()
+
+        assert lines[0].startswith("SQL profile: 2 statements, 2 calls, ")
+        assert lines[1].split() == ["Total", "ms", "Calls", "Rows", "Statement"]
+        assert all(len(line) <= 60 for line in lines[1:])
+        assert any(line.endswith("  SELECT 1") for line in lines)
+        assert any(line.endswith("...") for line in lines)
+
+    def test_profiler_exports_statements_as_json(self):
+        self.profiler.queries.clear()
+        models.db.execute_sql("SELECT 1").fetchall()
+
+        report = json.loads(self.profiler.to_json())
+
+        assert report["statements"] == 1
+        assert report["calls"] == 1
+        assert report["queries"][0]["sql"] == "SELECT 1"
+        assert report["queries"][0]["rows"] == 1
+
+    def test_profiler_stop_restores_database(self):
+        self.profiler.stop()
+        self.profiler.queries.clear()
+
+        self.create_habit()
+
+        assert self.profiler.queries == {}
+        assert "execute_sql" not in vars(models.db)
+        self.profiler.start()
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""Tests for the command telemetry."""
+
+import importlib
+import json
+import os
+import tempfile
+import tracemalloc
+from unittest import TestCase
+from unittest.mock import patch
+
+from habito import telemetry
+
+
+class TelemetryTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, telemetry.FILE_NAME)
+
+    def tearDown(self):
+        telemetry._recorder = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.tmp.cleanup()
+
+    def test_is_enabled_checks_environment(self):
+        for value, expected in [("", False), ("0", False), ("1", True)]:
+            with patch.dict(os.environ, {telemetry.ENV: value}):
+                assert telemetry.is_enabled() is expected
+
+    def test_import_starts_memory_tracing_if_enabled(self):
+        with patch.dict(os.environ, {telemetry.ENV: "1"}):
+            importlib.reload(telemetry)
+
+        assert tracemalloc.is_tracing()
+
+    def test_phase_is_noop_without_recorder(self):
+        with telemetry.phase("fetch"):
+            pass
+
+        assert not tracemalloc.is_tracing()
+        telemetry.finish(self.path)
+        assert not os.path.exists(self.path)
+
+    def test_recorder_records_time_and_peak_memory_of_phases(self):
+        recorder = telemetry.start("list")
+
+        with telemetry.phase("fetch"):
+            data = [bytes(1024) for _ in range(1024)]
+        with telemetry.phase("render"):
+            pass
+        with telemetry.phase("render"):
+            pass
+        del data
+
+        record = recorder.to_record()
+        assert record["command"] == "list"
+        assert list(record["phases"]) == ["import", "fetch", "render"]
+        assert record["phases"]["fetch"]["peak_kb"] >= 1024
+        assert record["phases"]["fetch"]["ms"] > 0
+        assert record["total_ms"] >= record["phases"]["import"]["ms"]
+
+    def test_finish_appends_record_and_stops_tracing(self):
+        for command in ["list", "checkin"]:
+            telemetry.start(command)
+            with telemetry.phase("fetch"):
+                pass
+            telemetry.finish(self.path)
+
+        records = telemetry.read_records(self.path)
+
+        assert [r["command"] for r in records] == ["list", "checkin"]
+        assert telemetry._recorder is None
+        assert not tracemalloc.is_tracing()
+
+    def test_write_record_rotates_full_file(self):
+        record = {"command": "list", "data": "x" * 100}
+        with patch.object(telemetry, "MAX_BYTES", 300):
+            for i in range(10):
+                telemetry.write_record(self.path, {**record, "id": i})
+
+        names = sorted(os.listdir(self.tmp.name))
+        assert names == [f"telemetry.jsonl{s}" for s in ["", ".1", ".2", ".3"]]
+        records = telemetry.read_records(self.path)
+        assert [r["id"] for r in records] == [2, 3, 4, 5, 6, 7, 8, 9]
+
+    def test_read_records_skips_invalid_lines(self):
+        with open(self.path, "w") as f:
+            f.write(json.dumps({"id": 1}) + "\n{invalid\n" + json.dumps({"id": 2}))
+
+        assert telemetry.read_records(self.path) == [{"id": 1}, {"id": 2}]
+
+    def test_summarize_computes_percentiles_by_command_and_phase(self):
+        records = [
+            {
+                "command": "list",
+                "total_ms": 10.0 * i,
+                "phases": {"fetch": {"ms": float(i), "peak_kb": 10.0 * i}},
+            }
+            for i in range(1, 101)
+        ]
+        records.append(
+            {
+                "command": "checkin",
+                "total_ms": 5.0,
+                "phases": {"setup": {"ms": 2.0, "peak_kb": 1.0}},
+            }
+        )
+
+        summary = telemetry.summarize(records)
+
+        assert list(summary) == ["list", "checkin"]
+        assert list(summary["list"]) == ["fetch", "total"]
+        assert summary["list"]["fetch"] == (100, [50.0, 90.0, 99.0], 1000.0)
+        assert summary["list"]["total"] == (100, [500.0, 900.0, 990.0], 1000.0)
+        assert summary["checkin"]["setup"] == (1, [2.0, 2.0, 2.0], 1.0)
+
+    def test_percentile_uses_nearest_rank(self):
+        assert telemetry.percentile([1, 2, 3, 4], 50) == 2
+        assert telemetry.percentile([1, 2, 3, 4], 51) == 3
+        assert telemetry.percentile([1, 2, 3, 4], 0) == 1
+        assert telemetry.percentile([7], 99) == 7